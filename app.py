@@ -1,8 +1,10 @@
 """Main application entry point - MVC Architecture"""
+import os
 from app_factory import create_app
+from config import config_by_name
 
-# Create app instance
-app = create_app()
+# Create app instance (APP_CONFIG=production selects ProductionConfig)
+app = create_app(config_by_name[os.environ.get('APP_CONFIG', 'development')])
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
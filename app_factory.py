@@ -1,13 +1,20 @@
 """Application Factory - Creates Flask app with MVC structure"""
+import os
 from flask import Flask, session
+from jinja2 import FileSystemBytecodeCache
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from config import Config
-from translations import get_translation
-from utils.helpers import get_language, translate_symptom
+from utils.helpers import get_language
+from utils.http_cache import init_http_cache
+from utils.kb_version import kb_version
+from utils.metrics import metrics, init_metrics
+from utils.query_budget import init_query_budgets
+from utils.sqlite_tuning import init_sqlite_pragmas
+from utils.db_routing import RoutingSession, init_replica_routing
 
 # Initialize extensions (will be initialized in create_app)
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 
 def create_app(config_class=Config):
@@ -16,15 +23,28 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     
     # Initialize extensions
+    init_replica_routing(app)
     db.init_app(app)
+    init_sqlite_pragmas(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'welcome.welcome'
     login_manager.login_message = 'Please log in or register to access this page.'
     login_manager.login_message_category = 'info'
+    kb_version.init_app(app)
+    init_metrics(app)
+    init_query_budgets(app)
+    init_http_cache(app)
+    
+    # Compiled templates are kept on disk, so a new worker loads them instead
+    # of compiling them again (a changed template is recompiled)
+    bytecode_dir = app.config['JINJA_BYTECODE_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(bytecode_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
     
     # Initialize models
     from models import create_models
-    Disease, Symptom, DiseaseSymptom, ExpertRule, disease_symptom, User = create_models(db)
+    (Disease, Symptom, DiseaseSymptom, ExpertRule, User, DiagnosisLog,
+     DiagnosisDailyCount, SymptomPairCount, DiseaseTranslation, SymptomTranslation) = create_models(db)
     
     # Initialize Flask-Login user loader
     @login_manager.user_loader
@@ -32,29 +52,76 @@ def create_app(config_class=Config):
         """Load user for Flask-Login"""
         return User.query.get(int(user_id))
     
+    # Disease and symptom translations, by id, cached until the knowledge base changes
+    from services.content_translations import ContentTranslations
+    content_translations = ContentTranslations(db, DiseaseTranslation, SymptomTranslation, kb_version)
+    app.extensions['content_translations'] = content_translations
+    
     # Context processor for translations
     @app.context_processor
     def inject_language():
-        """Make translation function available to all templates"""
-        from utils.helpers import translate_disease
-        lang = get_language()
-        return dict(
-            t=lambda key, **kwargs: get_translation(key, lang, **kwargs),
-            tsym=lambda name: translate_symptom(name, lang),
-            tdis=lambda text: translate_disease(text, lang),
-            current_lang=lang
-        )
+        """Make translation functions (t, tsym, tdis) available to all templates"""
+        # Built once per language and knowledge base version, not on every render
+        return content_translations.get(get_language()).template_globals
     
     # Initialize Expert System Service
     from services.expert_system_service import ExpertSystem
-    expert_system = ExpertSystem(db, Disease, Symptom, DiseaseSymptom, ExpertRule)
+    from services.result_cache import LRUCache
+    result_cache = LRUCache(app.config['DIAGNOSIS_CACHE_SIZE'], app.config['DIAGNOSIS_CACHE_TTL'])
+    sharded_scorer = None
+    if app.config['DIAGNOSIS_SHARDS'] > 1:
+        from services.sharded_diagnosis import ShardedScorer
+        sharded_scorer = ShardedScorer(app.config['DIAGNOSIS_SHARDS'], app.config['DIAGNOSIS_SHARD_START_METHOD'])
+    expert_system = ExpertSystem(db, Disease, Symptom, DiseaseSymptom, ExpertRule, kb_version, result_cache,
+                                 sharded_scorer, app.config['DIAGNOSIS_SHARD_MIN_DISEASES'])
+    app.extensions['expert_system'] = expert_system
+    metrics.register_collector('diagnosis_cache', lambda: _diagnosis_cache_metrics(expert_system))
+    
+    # Diagnosis history writer, which keeps the analytics rollups up to date
+    from services.diagnosis_rollups import DiagnosisRollups
+    diagnosis_rollups = DiagnosisRollups(db, Disease, Symptom, DiagnosisLog, DiagnosisDailyCount, SymptomPairCount)
+    diagnosis_log = None
+    if app.config['DIAGNOSIS_LOG_ENABLED']:
+        from services.diagnosis_log import DiagnosisLogWriter
+        diagnosis_log = DiagnosisLogWriter(app, db, DiagnosisLog, app.config['DIAGNOSIS_LOG_BATCH_SIZE'],
+                                           app.config['DIAGNOSIS_LOG_FLUSH_INTERVAL'])
+        diagnosis_log.add_flush_hook(diagnosis_rollups.update)
+        app.extensions['diagnosis_log'] = diagnosis_log
+        metrics.register_collector('diagnosis_log', lambda: _diagnosis_log_metrics(diagnosis_log))
+    
+    # Full-text search over diseases and symptoms
+    from services.search_index import FtsSearchIndex, MemorySearchIndex
+    backend = app.config['SEARCH_BACKEND']
+    if backend == 'auto':
+        backend = 'fts5' if FtsSearchIndex.supported(app.config['SQLALCHEMY_DATABASE_URI']) else 'memory'
+    if backend == 'fts5':
+        search_index = FtsSearchIndex(db, Disease, Symptom, content_translations)
+    else:
+        search_index = MemorySearchIndex(db, Disease, Symptom, content_translations, kb_version)
+    app.extensions['search_index'] = search_index
+    
+    # Symptom autocomplete, ranked by the diagnosis rollups
+    from services.symptom_autocomplete import SymptomAutocomplete
+    symptom_autocomplete = SymptomAutocomplete(expert_system, content_translations, diagnosis_rollups,
+                                               app.config['SYMPTOM_AUTOCOMPLETE_MAX_AGE'])
+    
+    # Knowledge base export/import
+    from services.kb_transfer import KnowledgeBaseTransfer
+    kb_transfer = KnowledgeBaseTransfer(db, Disease, Symptom, DiseaseSymptom, ExpertRule,
+                                        app.config['KB_TRANSFER_BATCH_SIZE'])
+    
+    # Rendered fragments of the knowledge base pages, per language and knowledge base version
+    from services.fragment_cache import FragmentCache
+    fragment_cache = FragmentCache(kb_version, app.config['FRAGMENT_CACHE_SIZE'])
+    app.extensions['fragment_cache'] = fragment_cache
+    metrics.register_collector('fragment_cache', lambda: _fragment_cache_metrics(fragment_cache))
     
     # Register blueprints (controllers)
     from controllers.welcome_controller import welcome_bp
     app.register_blueprint(welcome_bp)
     
     from controllers.home_controller import init_home_controller
-    init_home_controller(Disease)
+    init_home_controller(Disease, fragment_cache)
     from controllers.home_controller import home_bp
     app.register_blueprint(home_bp)
     
@@ -62,212 +129,67 @@ def create_app(config_class=Config):
     init_auth_controller(app, db, User)
     
     from controllers.diagnosis_controller import init_diagnosis_controller
-    init_diagnosis_controller(Symptom, expert_system)
+    init_diagnosis_controller(Symptom, expert_system, app.config['DIAGNOSIS_SESSION_CACHE_SIZE'], diagnosis_log,
+                              symptom_autocomplete, fragment_cache)
     from controllers.diagnosis_controller import diagnosis_bp
     app.register_blueprint(diagnosis_bp)
     
     from controllers.disease_controller import init_disease_controller
-    init_disease_controller(Disease)
+    init_disease_controller(Disease, fragment_cache)
     from controllers.disease_controller import disease_bp
     app.register_blueprint(disease_bp)
     
+    from controllers.search_controller import init_search_controller
+    init_search_controller(Disease, Symptom, search_index)
+    from controllers.search_controller import search_bp
+    app.register_blueprint(search_bp)
+    
     from controllers.admin_controller import init_admin_controller
-    init_admin_controller(db, Disease, Symptom, User, ExpertRule)
+    init_admin_controller(db, Disease, Symptom, User, ExpertRule, expert_system, diagnosis_rollups, kb_transfer,
+                          search_index, symptom_autocomplete, content_translations)
     from controllers.admin_controller import admin_bp
     app.register_blueprint(admin_bp)
     
-    # Database initialization
-    with app.app_context():
-        db.create_all()
-        seed_database(db, Disease, Symptom, DiseaseSymptom, ExpertRule, disease_symptom)
-        seed_users(db, User)
+    # Register command line commands (flask <command>)
+    from cli import register_cli
+    register_cli(app, db, Disease, Symptom, DiseaseSymptom, ExpertRule, User, diagnosis_rollups, kb_transfer,
+                 search_index)
+    
+    # The schema and seed data are set up by `flask init-db` (see cli.py), not at
+    # startup, so a worker boots without running any queries
     
     return app
 
-def seed_database(db, Disease, Symptom, DiseaseSymptom, ExpertRule, disease_symptom):
-    """Seed the database with initial rice disease data"""
-    from werkzeug.security import generate_password_hash
-    
-    # Check if data already exists
-    if Disease.query.first():
-        return
-    
-    # Create symptoms
-    symptoms_data = [
-        'Brown spots on leaves',
-        'Yellowing of leaves',
-        'White powdery growth',
-        'Water-soaked lesions',
-        'Dark brown lesions',
-        'Leaf blight',
-        'Stem rot',
-        'Root rot',
-        'Grain discoloration',
-        'Stunted growth',
-        'Wilting',
-        'Leaf spots with yellow halo',
-        'Orange pustules',
-        'Black spots on grains',
-        'Leaf curling'
-    ]
-    
-    symptoms = {}
-    for symptom_name in symptoms_data:
-        symptom = Symptom(name=symptom_name)
-        db.session.add(symptom)
-        symptoms[symptom_name] = symptom
-    
-    # Create diseases
-    diseases_data = [
-        {
-            'name': 'Brown Spot',
-            'description': 'Caused by Bipolaris oryzae, affects leaves and grains',
-            'treatment': 'Use resistant varieties, apply fungicides like propiconazole',
-            'symptoms': ['Brown spots on leaves', 'Dark brown lesions', 'Grain discoloration']
-        },
-        {
-            'name': 'Blast Disease',
-            'description': 'Caused by Magnaporthe oryzae, most destructive rice disease',
-            'treatment': 'Use resistant varieties, avoid excessive nitrogen, apply tricyclazole',
-            'symptoms': ['Brown spots on leaves', 'Water-soaked lesions', 'Leaf blight', 'Stem rot']
-        },
-        {
-            'name': 'Sheath Blight',
-            'description': 'Caused by Rhizoctonia solani, affects sheaths and leaves',
-            'treatment': 'Use resistant varieties, proper spacing, apply validamycin',
-            'symptoms': ['Water-soaked lesions', 'Leaf blight', 'Stem rot', 'Wilting']
-        },
-        {
-            'name': 'Bacterial Leaf Blight',
-            'description': 'Caused by Xanthomonas oryzae, affects leaves',
-            'treatment': 'Use resistant varieties, avoid overhead irrigation, apply copper-based bactericides',
-            'symptoms': ['Yellowing of leaves', 'Water-soaked lesions', 'Leaf blight', 'Wilting']
-        },
-        {
-            'name': 'False Smut',
-            'description': 'Caused by Ustilaginoidea virens, affects grains',
-            'treatment': 'Use resistant varieties, proper field drainage, apply propiconazole',
-            'symptoms': ['Grain discoloration', 'Black spots on grains', 'Stunted growth']
-        },
-        {
-            'name': 'Rice Rust',
-            'description': 'Caused by Puccinia graminis, affects leaves',
-            'treatment': 'Use resistant varieties, apply fungicides like tebuconazole',
-            'symptoms': ['Orange pustules', 'Yellowing of leaves', 'Leaf spots with yellow halo']
-        },
-        {
-            'name': 'Powdery Mildew',
-            'description': 'Caused by Erysiphe graminis, affects leaves',
-            'treatment': 'Use resistant varieties, improve air circulation, apply sulfur-based fungicides',
-            'symptoms': ['White powdery growth', 'Yellowing of leaves', 'Leaf curling']
-        },
-        {
-            'name': 'Root Rot',
-            'description': 'Caused by various fungi, affects roots',
-            'treatment': 'Improve drainage, use healthy seeds, apply fungicides to soil',
-            'symptoms': ['Root rot', 'Stunted growth', 'Wilting', 'Yellowing of leaves']
-        }
-    ]
-    
-    for disease_info in diseases_data:
-        disease = Disease(
-            name=disease_info['name'],
-            description=disease_info['description'],
-            treatment=disease_info['treatment']
-        )
-        db.session.add(disease)
-        db.session.flush()
-        
-        # Link symptoms to disease
-        for symptom_name in disease_info['symptoms']:
-            if symptom_name in symptoms:
-                disease_symptom_assoc = DiseaseSymptom(
-                    disease_id=disease.id,
-                    symptom_id=symptoms[symptom_name].id,
-                    severity=1
-                )
-                db.session.add(disease_symptom_assoc)
-    
-    # Create expert rules
-    expert_rules = [
-        {
-            'condition': "has_symptom('Brown spots on leaves') and has_symptom('Dark brown lesions')",
-            'disease_name': 'Brown Spot',
-            'confidence': 0.9
-        },
-        {
-            'condition': "has_symptom('Water-soaked lesions') and has_symptom('Leaf blight')",
-            'disease_name': 'Blast Disease',
-            'confidence': 0.85
-        },
-        {
-            'condition': "has_symptom('Water-soaked lesions') and has_symptom('Stem rot')",
-            'disease_name': 'Sheath Blight',
-            'confidence': 0.8
-        },
-        {
-            'condition': "has_symptom('Yellowing of leaves') and has_symptom('Water-soaked lesions')",
-            'disease_name': 'Bacterial Leaf Blight',
-            'confidence': 0.85
-        },
-        {
-            'condition': "has_symptom('Grain discoloration') and has_symptom('Black spots on grains')",
-            'disease_name': 'False Smut',
-            'confidence': 0.9
-        },
-        {
-            'condition': "has_symptom('Orange pustules') and has_symptom('Yellowing of leaves')",
-            'disease_name': 'Rice Rust',
-            'confidence': 0.88
-        },
-        {
-            'condition': "has_symptom('White powdery growth') and has_symptom('Yellowing of leaves')",
-            'disease_name': 'Powdery Mildew',
-            'confidence': 0.87
-        },
-        {
-            'condition': "has_symptom('Root rot') and has_symptom('Stunted growth')",
-            'disease_name': 'Root Rot',
-            'confidence': 0.82
-        }
+def _diagnosis_cache_metrics(expert_system):
+    """Diagnosis result cache counters for the metrics endpoint"""
+    stats = expert_system.cache_stats()
+    if stats is None:
+        return []
+    return [
+        ('diagnosis_cache_entries', 'gauge', 'Entries in the diagnosis result cache', {(): stats['size']}),
+        ('diagnosis_cache_requests_total', 'counter', 'Diagnosis result cache lookups',
+         {(('result', 'hit'),): stats['hits'], (('result', 'miss'),): stats['misses']}),
+        ('diagnosis_cache_evictions_total', 'counter', 'Diagnosis result cache evictions',
+         {(('reason', 'size'),): stats['evictions'], (('reason', 'ttl'),): stats['expirations']}),
     ]
-    
-    for rule_info in expert_rules:
-        disease = Disease.query.filter_by(name=rule_info['disease_name']).first()
-        if disease:
-            rule = ExpertRule(
-                condition=rule_info['condition'],
-                disease_id=disease.id,
-                confidence=rule_info['confidence']
-            )
-            db.session.add(rule)
-    
-    db.session.commit()
 
-def seed_users(db, User):
-    """Seed default admin and test users"""
-    from werkzeug.security import generate_password_hash
-    
-    if User.query.first():
-        return
-    
-    # Create default admin user
-    admin = User(
-        username='admin',
-        email='admin@riceexpert.com',
-        password_hash=generate_password_hash('admin123'),
-        role='admin'
-    )
-    db.session.add(admin)
-    
-    # Create test end-user
-    enduser = User(
-        username='user',
-        email='user@riceexpert.com',
-        password_hash=generate_password_hash('user123'),
-        role='end-user'
-    )
-    db.session.add(enduser)
-    
-    db.session.commit()
+def _fragment_cache_metrics(fragment_cache):
+    """Fragment cache counters for the metrics endpoint"""
+    stats = fragment_cache.stats()
+    return [
+        ('fragment_cache_entries', 'gauge', 'Rendered fragments in the fragment cache', {(): stats['size']}),
+        ('fragment_cache_requests_total', 'counter', 'Fragment cache lookups',
+         {(('result', 'hit'),): stats['hits'], (('result', 'miss'),): stats['misses']}),
+        ('fragment_cache_evictions_total', 'counter', 'Fragment cache evictions', {(): stats['evictions']}),
+    ]
 
+def _diagnosis_log_metrics(diagnosis_log):
+    """Diagnosis history buffer counters for the metrics endpoint"""
+    stats = diagnosis_log.stats()
+    return [
+        ('diagnosis_log_pending', 'gauge', 'Diagnosis log rows waiting to be written', {(): stats['pending']}),
+        ('diagnosis_log_rows_total', 'counter', 'Diagnosis log rows by outcome',
+         {(('result', 'written'),): stats['written'], (('result', 'dropped'),): stats['dropped']}),
+        ('diagnosis_log_hook_failures_total', 'counter', 'Diagnosis log flush hooks that failed',
+         {(): stats['failed_hooks']}),
+    ]
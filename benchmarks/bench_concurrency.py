@@ -0,0 +1,150 @@
+"""
+Database concurrency benchmark
+
+Runs several worker processes against one SQLite database, as gunicorn
+workers would: most operations read (the disease list with its symptoms) and
+the rest write (a diagnosis log row and a commit). Each configuration is run
+for a fixed time and reports throughput, read latency and lock errors, so the
+default configuration can be compared with ProductionConfig.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--workers 4] [--seconds 10] [--write-ratio 0.2]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
+
+from config import Config, ProductionConfig
+
+CONFIGS = {'default': Config, 'production': ProductionConfig}
+
+
+def _config_class(name, workdir):
+    """Benchmark subclass of a configuration, pointing at the shared database"""
+    base = CONFIGS[name]
+
+    class BenchmarkConfig(base):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        KB_VERSION_FILE = os.path.join(workdir, 'kb_version')
+        DIAGNOSIS_LOG_ENABLED = False
+
+    return BenchmarkConfig
+
+
+def _worker(config_name, workdir, seconds, write_ratio, seed, start_at, queue):
+    """Read and write until the time is up, then report the counts"""
+    from app_factory import create_app, db
+
+    app = create_app(_config_class(config_name, workdir))
+    expert_system = app.extensions['expert_system']
+    Disease = expert_system.Disease
+    diagnosis_log = db.metadata.tables['diagnosis_log']
+    rnd = random.Random(seed)
+    reads, writes, errors, read_ms = 0, 0, 0, []
+
+    with app.app_context():
+        while time.time() < start_at:
+            time.sleep(0.001)
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            try:
+                if rnd.random() < write_ratio:
+                    db.session.execute(diagnosis_log.insert().values(
+                        symptom_ids='[1, 2]', results='[]', engine_version='bench'))
+                    db.session.commit()
+                    writes += 1
+                else:
+                    start = time.perf_counter()
+                    diseases = Disease.query.options(selectinload(Disease.symptoms)).all()
+                    sum(len(d.symptoms) for d in diseases)
+                    db.session.rollback()
+                    read_ms.append((time.perf_counter() - start) * 1000)
+                    reads += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+
+    queue.put({'reads': reads, 'writes': writes, 'errors': errors, 'read_ms': read_ms})
+
+
+def _create_database(config_name, workdir):
+    """Create and seed the database (create_app can only run once per process)"""
+    from app_factory import create_app, db
+    from migrations import upgrade_database
+    from seed import seed_knowledge_base
+
+    app = create_app(_config_class(config_name, workdir))
+    expert_system = app.extensions['expert_system']
+    with app.app_context():
+        upgrade_database(db)
+        seed_knowledge_base(db, expert_system.Disease, expert_system.Symptom,
+                            expert_system.DiseaseSymptom, expert_system.ExpertRule)
+
+
+def run(config_name, workers, seconds, write_ratio):
+    """Benchmark one configuration and return its summary"""
+    workdir = tempfile.mkdtemp(prefix='rice-bench-')
+    context = multiprocessing.get_context('spawn')
+
+    setup = context.Process(target=_create_database, args=(config_name, workdir))
+    setup.start()
+    setup.join()
+
+    queue = context.Queue()
+    start_at = time.time() + 3  # let every worker start up before the clock runs
+    processes = [
+        context.Process(target=_worker, args=(config_name, workdir, seconds, write_ratio, i, start_at, queue))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    read_ms = sorted(ms for report in reports for ms in report['read_ms'])
+    reads = sum(report['reads'] for report in reports)
+    writes = sum(report['writes'] for report in reports)
+    return {
+        'config': config_name,
+        'workers': workers,
+        'seconds': seconds,
+        'write_ratio': write_ratio,
+        'reads_per_s': reads / seconds,
+        'writes_per_s': writes / seconds,
+        'lock_errors': sum(report['errors'] for report in reports),
+        'read_p50_ms': read_ms[len(read_ms) // 2] if read_ms else None,
+        'read_p95_ms': read_ms[min(int(len(read_ms) * 0.95), len(read_ms) - 1)] if read_ms else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that write')
+    parser.add_argument('--out', help='JSON file to write results to')
+    args = parser.parse_args()
+
+    results = []
+    for config_name in CONFIGS:
+        result = run(config_name, args.workers, args.seconds, args.write_ratio)
+        results.append(result)
+        print(f"{config_name:>10}: {result['reads_per_s']:8.1f} reads/s {result['writes_per_s']:8.1f} writes/s "
+              f"p95 read {result['read_p95_ms']:.2f} ms, {result['lock_errors']} lock errors", file=sys.stderr)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
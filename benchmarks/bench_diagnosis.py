@@ -0,0 +1,177 @@
+"""
+Diagnosis engine benchmark
+
+Times ExpertSystem.diagnose and diagnose_many on synthetic knowledge bases of
+several sizes and counts the SQL statements they run. Results are written as
+JSON so runs from different releases can be compared.
+
+Usage:
+    python -m benchmarks.bench_diagnosis [--out bench_diagnosis.json] [--quick]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from config import Config
+
+# (diseases, symptoms, rules per disease, rule literals, rule style)
+KB_SIZES = [
+    (100, 200, 1, 2, 'and'),
+    (1000, 2000, 2, 3, 'and'),
+    (5000, 5000, 2, 4, 'mixed'),
+]
+QUICK_KB_SIZES = [(100, 200, 1, 2, 'and'), (500, 1000, 2, 3, 'mixed')]
+SYMPTOM_SET_SIZES = [1, 3, 5, 10]
+BATCH_SIZE = 1000
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _timed(fn, repeat):
+    """Run fn repeat times and return the durations in milliseconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def _summary(durations):
+    """Mean/median/p95 of a list of durations"""
+    ordered = sorted(durations)
+    return {
+        'mean_ms': statistics.fmean(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p95_ms': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+    }
+
+
+def _git_revision():
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(kb_sizes, repeat=50, seed=0):
+    """Run the benchmark and return the results as a dictionary"""
+    from app_factory import create_app, db
+    from benchmarks.kb_generator import clear_knowledge_base, generate_knowledge_base
+    from migrations import upgrade_database
+
+    workdir = tempfile.mkdtemp(prefix='rice-bench-')
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        KB_VERSION_FILE = os.path.join(workdir, 'kb_version')
+        DIAGNOSIS_CACHE_SIZE = 0  # measure the engine, not the result cache
+
+    app = create_app(BenchmarkConfig)
+    expert_system = app.extensions['expert_system']
+    models = (expert_system.Disease, expert_system.Symptom, expert_system.DiseaseSymptom, expert_system.ExpertRule)
+    rnd = random.Random(seed)
+    results = []
+
+    with app.app_context():
+        upgrade_database(db)
+        counter = QueryCounter(db.engine)
+
+        for diseases, symptoms, rules_per_disease, rule_literals, rule_style in kb_sizes:
+            clear_knowledge_base(db, *models)
+            rows = generate_knowledge_base(db, *models, diseases=diseases, symptoms=symptoms,
+                                           rules_per_disease=rules_per_disease, rule_literals=rule_literals,
+                                           rule_style=rule_style, seed=seed)
+            expert_system.invalidate()
+            symptom_ids = [sid for (sid,) in db.session.query(expert_system.Symptom.id)]
+
+            # Cold call: includes building the knowledge base snapshot
+            counter.count = 0
+            start = time.perf_counter()
+            expert_system.diagnose(rnd.sample(symptom_ids, 3))
+            snapshot_ms = (time.perf_counter() - start) * 1000
+            snapshot_queries = counter.count
+
+            for set_size in SYMPTOM_SET_SIZES:
+                sets = [rnd.sample(symptom_ids, set_size) for _ in range(repeat)]
+                it = iter(sets)
+                counter.count = 0
+                durations = _timed(lambda: expert_system.diagnose(next(it)), repeat)
+                entry = {
+                    'benchmark': 'diagnose',
+                    'rule_style': rule_style,
+                    'symptom_set_size': set_size,
+                    'queries_per_call': counter.count / repeat,
+                    'snapshot_build_ms': snapshot_ms,
+                    'snapshot_queries': snapshot_queries
+                }
+                entry.update(rows)
+                entry.update(_summary(durations))
+                results.append(entry)
+
+            sets = [rnd.sample(symptom_ids, rnd.choice(SYMPTOM_SET_SIZES)) for _ in range(BATCH_SIZE)]
+            counter.count = 0
+            durations = _timed(lambda: expert_system.diagnose_many(sets), 3)
+            entry = {
+                'benchmark': 'diagnose_many',
+                'rule_style': rule_style,
+                'batch_size': BATCH_SIZE,
+                'queries_per_call': counter.count / 3
+            }
+            entry.update(rows)
+            entry.update(_summary(durations))
+            entry['per_item_ms'] = entry['mean_ms'] / BATCH_SIZE
+            results.append(entry)
+
+            print(f"{diseases:>6} diseases {symptoms:>6} symptoms {rows['rules']:>6} rules: "
+                  f"diagnose(5) {next(r for r in results[-5:] if r.get('symptom_set_size') == 5)['mean_ms']:.3f} ms, "
+                  f"batch {entry['per_item_ms']:.4f} ms/item", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', default='bench_diagnosis.json', help='JSON file to write results to')
+    parser.add_argument('--repeat', type=int, default=50, help='Calls timed per measurement')
+    parser.add_argument('--quick', action='store_true', help='Only run the small knowledge bases')
+    args = parser.parse_args()
+
+    report = run(QUICK_KB_SIZES if args.quick else KB_SIZES, repeat=args.repeat)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {len(report["results"])} results to {args.out}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Synthetic knowledge base generator for scaling tests and benchmarks"""
+import random
+from sqlalchemy import insert
+
+RULE_STYLES = ('and', 'mixed')
+
+
+def clear_knowledge_base(db, Disease, Symptom, DiseaseSymptom, ExpertRule):
+    """Delete every rule, disease-symptom link, disease and symptom"""
+    for model in (ExpertRule, DiseaseSymptom, Disease, Symptom):
+        db.session.query(model).delete()
+    db.session.commit()
+
+
+def _condition(rnd, names, literals, style):
+    """Build a rule condition over the given symptom names"""
+    picked = rnd.sample(names, min(literals, len(names)))
+    terms = [f"has_symptom('{name}')" for name in picked]
+    if style == 'and' or len(terms) < 3:
+        return ' and '.join(terms)
+
+    # Mixed rules: (a and b) or (c and not d) ...
+    half = len(terms) // 2
+    left = ' and '.join(terms[:half])
+    right = ' and '.join(terms[half:-1] + [f'not {terms[-1]}'])
+    return f'({left}) or ({right})'
+
+
+def generate_knowledge_base(db, Disease, Symptom, DiseaseSymptom, ExpertRule,
+                            diseases=100, symptoms=200, symptoms_per_disease=(3, 8),
+                            rules_per_disease=1, rule_literals=2, rule_style='and', seed=0):
+    """
+    Insert a synthetic knowledge base with bulk inserts
+    
+    Args:
+        db, Disease, Symptom, DiseaseSymptom, ExpertRule: Database and models
+        diseases: Number of diseases
+        symptoms: Number of symptoms
+        symptoms_per_disease: (min, max) number of symptoms linked to each disease
+        rules_per_disease: Number of expert rules per disease
+        rule_literals: Number of has_symptom() literals per rule
+        rule_style: 'and' for pure conjunctions, 'mixed' for and/or/not rules
+        seed: Random seed, so the same arguments give the same knowledge base
+        
+    Returns:
+        Dictionary with the number of rows inserted per table
+    """
+    if rule_style not in RULE_STYLES:
+        raise ValueError(f'rule_style must be one of {RULE_STYLES}')
+
+    rnd = random.Random(seed)
+    symptom_names = [f'Synthetic symptom {i:05d}' for i in range(symptoms)]
+    db.session.execute(insert(Symptom), [{'name': name} for name in symptom_names])
+    symptom_ids = dict(db.session.query(Symptom.name, Symptom.id).filter(Symptom.name.like('Synthetic symptom %')))
+
+    disease_rows = [
+        {
+            'name': f'Synthetic disease {i:05d}',
+            'description': f'Synthetic disease number {i} for benchmarking',
+            'treatment': f'Synthetic treatment number {i}'
+        }
+        for i in range(diseases)
+    ]
+    db.session.execute(insert(Disease), disease_rows)
+    disease_ids = dict(db.session.query(Disease.name, Disease.id).filter(Disease.name.like('Synthetic disease %')))
+
+    low, high = symptoms_per_disease
+    links = []
+    rules = []
+    for row in disease_rows:
+        disease_id = disease_ids[row['name']]
+        linked = rnd.sample(symptom_names, min(rnd.randint(low, high), len(symptom_names)))
+        links.extend({'disease_id': disease_id, 'symptom_id': symptom_ids[name], 'severity': 1}
+                     for name in linked)
+        for _ in range(rules_per_disease):
+            rules.append({
+                'condition': _condition(rnd, linked, rule_literals, rule_style),
+                'disease_id': disease_id,
+                'confidence': round(rnd.uniform(0.5, 0.95), 2)
+            })
+
+    if links:
+        db.session.execute(insert(DiseaseSymptom), links)
+    if rules:
+        db.session.execute(insert(ExpertRule), rules)
+    db.session.commit()
+
+    return {'diseases': len(disease_rows), 'symptoms': len(symptom_names),
+            'disease_symptoms': len(links), 'rules': len(rules)}
@@ -0,0 +1,109 @@
+"""Command line interface - maintenance commands run with ``flask <command>``"""
+import sys
+import click
+from services.kb_transfer import FORMATS, format_for_filename, read_records
+from utils.kb_version import kb_version
+
+
+def register_cli(app, db, Disease, Symptom, DiseaseSymptom, ExpertRule, User, diagnosis_rollups, kb_transfer,
+                 search_index):
+    """Register the app's command line commands"""
+    
+    def upgrade():
+        from migrations import upgrade_database
+        for name, result in upgrade_database(db):
+            click.echo(f'{name}: {result}')
+        created = search_index.setup()
+        if created:
+            click.echo(f'search index: {created}')
+        click.echo('Database is up to date')
+    
+    def seed(users):
+        from migrations import copy_catalog_translations
+        from seed import seed_knowledge_base, seed_users
+        counts = seed_knowledge_base(db, Disease, Symptom, DiseaseSymptom, ExpertRule)
+        # Translations of the seeded rows come from the translation catalogs
+        with db.engine.begin() as connection:
+            counts['translations'] = copy_catalog_translations(db, connection) or 0
+        if any(counts.values()):
+            kb_version.bump()
+            search_index.rebuild()
+        if users:
+            counts['users'] = seed_users(db, User)
+        click.echo('Seeded ' + ', '.join(f'{count} {table}' for table, count in counts.items()))
+    
+    @app.cli.command('init-db')
+    @click.option('--users/--no-users', default=True, show_default=True, help='Create the default accounts if there are no users')
+    def init_db(users):
+        """Create or migrate the database and add the seed data"""
+        upgrade()
+        seed(users)
+    
+    @app.cli.command('upgrade-db')
+    def upgrade_db():
+        """Create missing tables and migrate an existing database"""
+        upgrade()
+    
+    @app.cli.command('seed-db')
+    @click.option('--users/--no-users', default=True, show_default=True, help='Create the default accounts if there are no users')
+    def seed_db(users):
+        """Add the seed knowledge base (and default accounts) rows that are missing"""
+        seed(users)
+    
+    @app.cli.command('rebuild-rollups')
+    @click.option('--batch-size', default=5000, show_default=True,
+                  help='Diagnosis log rows read per query')
+    def rebuild_rollups(batch_size):
+        """Rebuild the diagnosis analytics rollups from the diagnosis log"""
+        count = diagnosis_rollups.rebuild(batch_size)
+        click.echo(f'Rebuilt diagnosis rollups from {count} logged diagnoses')
+    
+    @app.cli.command('rebuild-search')
+    def rebuild_search():
+        """Rebuild the full-text search index from the knowledge base"""
+        search_index.setup()
+        search_index.rebuild()
+        click.echo(f'Rebuilt the {type(search_index).__name__} search index')
+    
+    @app.cli.command('check-translations')
+    def check_translations():
+        """Check every language's catalog against English (missing keys, placeholders)"""
+        from translations import LANGUAGES, get_catalog
+        problems = [problem for lang in LANGUAGES for problem in get_catalog(lang).problems]
+        for problem in problems:
+            click.echo(problem, err=True)
+        if problems:
+            sys.exit(1)
+        click.echo(f'{len(LANGUAGES)} catalogs are complete')
+    
+    @app.cli.command('export-kb')
+    @click.argument('path', type=click.Path(dir_okay=False, allow_dash=True))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Default: from the file extension')
+    def export_kb(path, fmt):
+        """Export the knowledge base to a JSON Lines or CSV file ('-' for stdout)"""
+        with click.open_file(path, 'w', encoding='utf-8') as f:
+            for chunk in kb_transfer.export(fmt or format_for_filename(path)):
+                f.write(chunk)
+    
+    @app.cli.command('import-kb')
+    @click.argument('path', type=click.Path(dir_okay=False, allow_dash=True))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Default: from the file extension')
+    def import_kb(path, fmt):
+        """Import diseases, symptoms, links and rules from a JSON Lines or CSV file ('-' for stdin)"""
+        summary = None
+        try:
+            with click.open_file(path, 'r', encoding='utf-8-sig') as f:
+                summary = kb_transfer.import_records(read_records(f, fmt or format_for_filename(path)))
+        finally:
+            # Batches committed before an error are kept, so they are picked up too
+            if summary is None or any(summary['created'].values()) or any(summary['updated'].values()):
+                kb_version.bump()
+                search_index.rebuild()
+        click.echo(f"Read {summary['records']} records")
+        for outcome in ('created', 'updated', 'unchanged'):
+            click.echo(f'{outcome}: ' + ', '.join(f'{count} {kind}s' for kind, count in summary[outcome].items()))
+        for line_no, message in summary['errors']:
+            click.echo(f'line {line_no}: {message}', err=True)
+        if summary['error_count']:
+            click.echo(f"{summary['error_count']} records were skipped", err=True)
+            sys.exit(1)
@@ -1,5 +1,22 @@
 import os
 
+def _engine_options(uri, pool_size, max_overflow):
+    """SQLAlchemy engine options for a database URI"""
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    if uri.startswith('sqlite'):
+        # SQLite connections are cheap; the pool only caps how many a worker keeps open
+        return {'pool_size': pool_size, 'max_overflow': max_overflow}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        # Recycle before MySQL's wait_timeout closes idle connections
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        # Check connections on checkout so a restarted server does not fail requests
+        'pool_pre_ping': True
+    }
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
 
@@ -8,4 +25,89 @@ class Config:
 
     # For MySQL: 'mysql+pymysql://root:@localhost/rice_expert_system'
     # SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://root:@localhost/riceexpertsystem'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replica: GET requests outside the primary-only blueprints read from it,
+    # except within the window (seconds) after the same user wrote something
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_PRIMARY_BLUEPRINTS = ('admin', 'auth')
+    REPLICA_READ_AFTER_WRITE_WINDOW = float(os.environ.get('REPLICA_READ_AFTER_WRITE_WINDOW', 5))
+
+    # PRAGMA name -> value run on every new SQLite connection (see ProductionConfig)
+    SQLITE_PRAGMAS = {}
+
+    # File holding the knowledge base version stamp (defaults to the instance folder)
+    KB_VERSION_FILE = os.environ.get('KB_VERSION_FILE')
+
+    # Maximum number of symptom sets accepted by POST /api/diagnose/batch
+    DIAGNOSIS_BATCH_LIMIT = int(os.environ.get('DIAGNOSIS_BATCH_LIMIT', 10000))
+
+    # Diagnosis result cache: maximum entries (0 disables) and entry lifetime in seconds (0 = no expiry)
+    DIAGNOSIS_CACHE_SIZE = int(os.environ.get('DIAGNOSIS_CACHE_SIZE', 1024))
+    DIAGNOSIS_CACHE_TTL = int(os.environ.get('DIAGNOSIS_CACHE_TTL', 3600))
+
+    # Interactive diagnosis sessions kept in memory per worker
+    DIAGNOSIS_SESSION_CACHE_SIZE = int(os.environ.get('DIAGNOSIS_SESSION_CACHE_SIZE', 256))
+
+    # Bearer token that lets a metrics scraper read /admin/metrics without logging in
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Sharded diagnosis: number of worker processes per app process (0 or 1 = serial),
+    # the knowledge base size from which it is used, and the multiprocessing start method
+    DIAGNOSIS_SHARDS = int(os.environ.get('DIAGNOSIS_SHARDS', 0))
+    DIAGNOSIS_SHARD_MIN_DISEASES = int(os.environ.get('DIAGNOSIS_SHARD_MIN_DISEASES', 5000))
+    DIAGNOSIS_SHARD_START_METHOD = os.environ.get('DIAGNOSIS_SHARD_START_METHOD', 'forkserver')
+
+    # Diagnosis history: rows are buffered and written in bulk when the buffer
+    # holds this many rows or every flush interval (seconds), whichever comes first
+    DIAGNOSIS_LOG_ENABLED = os.environ.get('DIAGNOSIS_LOG_ENABLED', 'true').lower() == 'true'
+    DIAGNOSIS_LOG_BATCH_SIZE = int(os.environ.get('DIAGNOSIS_LOG_BATCH_SIZE', 500))
+    DIAGNOSIS_LOG_FLUSH_INTERVAL = float(os.environ.get('DIAGNOSIS_LOG_FLUSH_INTERVAL', 5))
+
+    # Search index: 'fts5' (SQLite FTS5 tables, created by `flask upgrade-db`),
+    # 'memory' (in-process inverted index) or 'auto' (fts5 when SQLite supports it)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+
+    # Seconds before the symptom autocomplete ranking (by past diagnoses) is refreshed
+    SYMPTOM_AUTOCOMPLETE_MAX_AGE = int(os.environ.get('SYMPTOM_AUTOCOMPLETE_MAX_AGE', 3600))
+
+    # Rows per page of the disease, symptom and user lists (?per_page= up to 100)
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 25))
+
+    # Rendered page fragments (disease lists, disease pages, symptom form) kept per worker (0 disables)
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))
+
+    # Directory where compiled templates are kept for new workers (defaults to the instance folder)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+
+    # Rows per batch (and per transaction) when exporting or importing the knowledge base
+    KB_TRANSFER_BATCH_SIZE = int(os.environ.get('KB_TRANSFER_BATCH_SIZE', 1000))
+
+    # SQL statements a request may run when its view sets no query_budget, and what
+    # happens when a request goes over budget: 'raise', 'warn' or 'off'
+    # (default: raise when testing, warn in debug mode, otherwise off)
+    SQL_QUERY_BUDGET_DEFAULT = int(os.environ.get('SQL_QUERY_BUDGET_DEFAULT', 10))
+    SQL_QUERY_BUDGET_MODE = os.environ.get('SQL_QUERY_BUDGET_MODE')
+
+class ProductionConfig(Config):
+    """Configuration for running under several gunicorn workers"""
+    
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # readers and the writer no longer block each other
+        'synchronous': 'NORMAL',  # durable with WAL; fsync only at checkpoints
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms to wait for the write lock
+        'cache_size': -20000,  # 20 MB page cache per connection
+        'mmap_size': 268435456,  # read the database file through a 256 MB memory map
+        'temp_store': 'MEMORY'
+    }
+    
+    # Connection pool per worker process
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(Config.SQLALCHEMY_DATABASE_URI,
+                                                int(os.environ.get('DB_POOL_SIZE', 5)),
+                                                int(os.environ.get('DB_MAX_OVERFLOW', 10)))
+
+# Configuration classes selectable with the APP_CONFIG environment variable
+config_by_name = {
+    'development': Config,
+    'production': ProductionConfig
+}
@@ -1,8 +1,17 @@
 """Admin Controller - handles admin operations"""
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import hmac
+import io
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, current_app, Response,
+                   abort, stream_with_context)
 from utils.decorators import admin_required
 from utils.helpers import get_language
-from translations import get_translation
+from sqlalchemy.orm import selectinload
+from utils.metrics import metrics
+from utils.pagination import paginate
+from utils.query_budget import query_budget
+from services.content_translations import DISEASE_FIELDS
+from services.kb_transfer import FORMATS, format_for_filename, read_records
+from translations import DEFAULT_LANGUAGE, LANGUAGES, get_translation
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -11,18 +20,41 @@ Disease = None
 Symptom = None
 User = None
 ExpertRule = None
+ExpertSystem = None
+DiagnosisRollups = None
+KnowledgeBaseTransfer = None
+SearchIndex = None
+SymptomAutocomplete = None
+ContentTranslations = None
 db = None
 
-def init_admin_controller(db_instance, disease_model, symptom_model, user_model, expert_rule_model):
-    """Initialize admin controller with models"""
-    global Disease, Symptom, User, ExpertRule, db
+def _save_translations(item, kind, fields):
+    """Put the translations entered in an add form (fields named like ``name_km``) in the session"""
+    for lang in LANGUAGES:
+        if lang != DEFAULT_LANGUAGE:
+            ContentTranslations.save(item, kind, lang,
+                                     **{field: request.form.get(f'{field}_{lang}') for field in fields})
+
+def init_admin_controller(db_instance, disease_model, symptom_model, user_model, expert_rule_model, expert_system,
+                          diagnosis_rollups=None, kb_transfer=None, search_index=None, symptom_autocomplete=None,
+                          content_translations=None):
+    """Initialize admin controller with models and services"""
+    global Disease, Symptom, User, ExpertRule, ExpertSystem, DiagnosisRollups, KnowledgeBaseTransfer, SearchIndex, \
+        SymptomAutocomplete, ContentTranslations, db
     Disease = disease_model
     Symptom = symptom_model
     User = user_model
     ExpertRule = expert_rule_model
+    ExpertSystem = expert_system
+    DiagnosisRollups = diagnosis_rollups
+    KnowledgeBaseTransfer = kb_transfer
+    SearchIndex = search_index
+    SymptomAutocomplete = symptom_autocomplete
+    ContentTranslations = content_translations
     db = db_instance
     
     @admin_bp.route('/dashboard')
+    @query_budget(11)
     @admin_required
     def dashboard():
         """Admin dashboard"""
@@ -35,30 +67,73 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
                              total_diseases=total_diseases,
                              total_symptoms=total_symptoms,
                              total_users=total_users,
-                             total_rules=total_rules)
+                             total_rules=total_rules,
+                             cache_stats=ExpertSystem.cache_stats(),
+                             trends=DiagnosisRollups.summary() if DiagnosisRollups is not None else None)
+    
+    @admin_required
+    def admin_metrics():
+        """Metrics for a logged-in admin"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    @admin_bp.route('/metrics')
+    def metrics_endpoint():
+        """
+        Admin: Prometheus text metrics of this worker
+        
+        Open to logged-in admins, or to scrapers sending
+        ``Authorization: Bearer <METRICS_TOKEN>`` when METRICS_TOKEN is set.
+        """
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+        return admin_metrics()
     
     @admin_bp.route('/diseases')
+    @query_budget(5)
     @admin_required
     def diseases():
-        """Admin: Manage diseases"""
-        diseases_list = Disease.query.all()
-        return render_template('admin/diseases.html', diseases=diseases_list)
+        """Admin: Manage diseases (one page, filtered by name)"""
+        query = Disease.query.options(selectinload(Disease.symptoms))
+        search = request.args.get('q', '').strip()
+        if search:
+            query = query.filter(Disease.name.icontains(search, autoescape=True))
+        page = paginate(query, {'id': Disease.id, 'name': Disease.name}, Disease.id,
+                        per_page=current_app.config['LIST_PAGE_SIZE'])
+        return render_template('admin/diseases.html', diseases=page, search=search)
     
     @admin_bp.route('/symptoms')
+    @query_budget(5)
     @admin_required
     def symptoms():
-        """Admin: Manage symptoms"""
-        symptoms_list = Symptom.query.all()
-        return render_template('admin/symptoms.html', symptoms=symptoms_list)
+        """Admin: Manage symptoms (one page, filtered by name)"""
+        query = Symptom.query.options(selectinload(Symptom.diseases))
+        search = request.args.get('q', '').strip()
+        if search:
+            query = query.filter(Symptom.name.icontains(search, autoescape=True))
+        page = paginate(query, {'id': Symptom.id, 'name': Symptom.name}, Symptom.id,
+                        per_page=current_app.config['LIST_PAGE_SIZE'])
+        return render_template('admin/symptoms.html', symptoms=page, search=search)
     
     @admin_bp.route('/users')
+    @query_budget(2)
     @admin_required
     def users():
-        """Admin: Manage users"""
-        users_list = User.query.all()
-        return render_template('admin/users/users.html', users=users_list)
+        """Admin: Manage users (one page, filtered by username/email and role)"""
+        query = User.query
+        search = request.args.get('q', '').strip()
+        if search:
+            query = query.filter(User.username.icontains(search, autoescape=True) |
+                                 User.email.icontains(search, autoescape=True))
+        role = request.args.get('role')
+        if role in ('admin', 'end-user'):
+            query = query.filter(User.role == role)
+        page = paginate(query, {'id': User.id, 'username': User.username}, User.id,
+                        per_page=current_app.config['LIST_PAGE_SIZE'])
+        return render_template('admin/users/users.html', users=page, search=search, role=role)
     
     @admin_bp.route('/disease/add', methods=['GET', 'POST'])
+    @query_budget(12)  # includes reloading the content translations for the search index
     @admin_required
     def add_disease():
         """Admin: Add new disease"""
@@ -78,8 +153,11 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
                 return redirect(url_for('admin.add_disease'))
             
             disease = Disease(name=name, description=description, treatment=treatment)
+            _save_translations(disease, 'disease', DISEASE_FIELDS)
             db.session.add(disease)
             db.session.commit()
+            versions = ExpertSystem.invalidate()
+            SearchIndex.update('disease', disease, versions)
             
             flash(get_translation('disease_added', lang), 'success')
             return redirect(url_for('admin.diseases'))
@@ -95,10 +173,13 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
         disease = Disease.query.get_or_404(disease_id)
         db.session.delete(disease)
         db.session.commit()
+        versions = ExpertSystem.invalidate()
+        SearchIndex.remove('disease', disease_id, versions)
         flash(get_translation('disease_deleted', lang), 'success')
         return redirect(url_for('admin.diseases'))
     
     @admin_bp.route('/symptom/add', methods=['GET', 'POST'])
+    @query_budget(17)  # includes rebuilding the knowledge base snapshot for the autocomplete
     @admin_required
     def add_symptom():
         """Admin: Add new symptom"""
@@ -116,8 +197,12 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
                 return redirect(url_for('admin.add_symptom'))
             
             symptom = Symptom(name=name)
+            _save_translations(symptom, 'symptom', ('name',))
             db.session.add(symptom)
             db.session.commit()
+            versions = ExpertSystem.invalidate()
+            SearchIndex.update('symptom', symptom, versions)
+            SymptomAutocomplete.rebuild()
             
             flash(get_translation('symptom_added', lang), 'success')
             return redirect(url_for('admin.symptoms'))
@@ -125,6 +210,7 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
         return render_template('admin/add_symptom.html')
     
     @admin_bp.route('/symptom/<int:symptom_id>/delete', methods=['POST'])
+    @query_budget(17)  # includes rebuilding the knowledge base snapshot for the autocomplete
     @admin_required
     def delete_symptom(symptom_id):
         """Admin: Delete symptom"""
@@ -132,8 +218,57 @@ def init_admin_controller(db_instance, disease_model, symptom_model, user_model,
         symptom = Symptom.query.get_or_404(symptom_id)
         db.session.delete(symptom)
         db.session.commit()
+        versions = ExpertSystem.invalidate()
+        SearchIndex.remove('symptom', symptom_id, versions)
+        SymptomAutocomplete.rebuild()
         flash(get_translation('symptom_deleted', lang), 'success')
         return redirect(url_for('admin.symptoms'))
-
-
-
+    
+    @admin_bp.route('/knowledge-base')
+    @admin_required
+    def knowledge_base():
+        """Admin: Export and import the knowledge base"""
+        return render_template('admin/knowledge_base.html')
+    
+    @admin_bp.route('/knowledge-base/export')
+    @admin_required
+    def export_knowledge_base():
+        """Admin: Download the knowledge base as JSON Lines or CSV (streamed)"""
+        fmt = request.args.get('format', 'jsonl')
+        if fmt not in FORMATS:
+            abort(400)
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        return Response(stream_with_context(KnowledgeBaseTransfer.export(fmt)), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=knowledge_base.{fmt}'})
+    
+    @admin_bp.route('/knowledge-base/import', methods=['POST'])
+    @query_budget(None)
+    @admin_required
+    def import_knowledge_base():
+        """Admin: Import diseases, symptoms, links and rules from an uploaded file"""
+        lang = get_language()
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash(get_translation('import_file_required', lang), 'danger')
+            return redirect(url_for('admin.knowledge_base'))
+        
+        # Large uploads are spooled to disk by Werkzeug and read line by line
+        fmt = request.form.get('format') or format_for_filename(upload.filename)
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        summary = None
+        try:
+            summary = KnowledgeBaseTransfer.import_records(read_records(stream, fmt))
+        finally:
+            # Batches committed before an error are kept, so they are picked up too
+            if summary is None or any(summary['created'].values()) or any(summary['updated'].values()):
+                ExpertSystem.invalidate()
+                SearchIndex.rebuild()
+                SymptomAutocomplete.rebuild()
+        flash(get_translation('kb_imported', lang, records=summary['records'],
+                              created=sum(summary['created'].values()),
+                              updated=sum(summary['updated'].values()),
+                              errors=summary['error_count']),
+              'warning' if summary['error_count'] else 'success')
+        for line_no, message in summary['errors'][:5]:
+            flash(get_translation('import_error_line', lang, line=line_no, error=message), 'danger')
+        return redirect(url_for('admin.knowledge_base'))
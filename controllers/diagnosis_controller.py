@@ -1,22 +1,104 @@
 """Diagnosis Controller - handles disease diagnosis"""
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from flask_login import login_required
-from utils.helpers import get_language
+import uuid
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, session
+from flask_login import login_required, current_user
+from utils.helpers import get_language, translate_symptom
 from translations import get_translation
+from services.result_cache import LRUCache
+from utils.query_budget import query_budget
 
 diagnosis_bp = Blueprint('diagnosis', __name__)
 
 # These will be injected
 Symptom = None
 ExpertSystem = None
+DiagnosisLogWriter = None
+SymptomAutocomplete = None
+FragmentCache = None
 
-def init_diagnosis_controller(symptom_model, expert_system):
+# Live interactive diagnosis sessions of this worker, keyed by session token.
+# The answers are also kept in the user's cookie so a session that is not
+# here (evicted, or started on another worker) is rebuilt by replaying them.
+diagnosis_sessions = None
+
+def _result_to_dict(result):
+    """Convert a diagnosis result into a JSON-serializable dict"""
+    data = {
+        'disease_id': result['disease'].id,
+        'disease_name': result['disease'].name,
+        'confidence': result['confidence'],
+        'method': result['method']
+    }
+    if 'matched_symptoms_count' in result:
+        data['matched_symptoms_count'] = result['matched_symptoms_count']
+        data['total_symptoms_count'] = result['total_symptoms_count']
+    return data
+
+def _load_diagnosis_session():
+    """Get the user's interactive diagnosis session, or None if not started"""
+    state = session.get('diagnosis_session')
+    if not state:
+        return None
+    
+    # The answers may have been given on other workers, so the cached session
+    # is only used if it has exactly the answers in the cookie (a symptom
+    # answered twice keeps its first answer, as when the answers are replayed)
+    answers, answered = [], set()
+    try:
+        for symptom_id, present in state['answers']:
+            if symptom_id not in answered:
+                answered.add(symptom_id)
+                answers.append((symptom_id, bool(present)))
+    except (TypeError, ValueError):
+        return None
+    live = diagnosis_sessions.get(state['id'])
+    if live is None or live.version != ExpertSystem.get_snapshot().version or live.answers != answers:
+        try:
+            live = ExpertSystem.start_session(answers)
+        except (TypeError, ValueError):
+            # Answers that cannot be replayed: treat the session as expired
+            return None
+        diagnosis_sessions.set(state['id'], live)
+    return live
+
+def _new_diagnosis_session():
+    """Start a new interactive diagnosis session for the user"""
+    token = uuid.uuid4().hex
+    live = ExpertSystem.start_session()
+    diagnosis_sessions.set(token, live)
+    session['diagnosis_session'] = {'id': token, 'answers': []}
+    return live
+
+def _diagnosis_session_state(live):
+    """JSON response describing an interactive diagnosis session"""
+    lang = get_language()
+    next_symptom = None
+    suggestion = live.suggest()
+    if suggestion:
+        symptom_id, gain = suggestion
+        next_symptom = {
+            'symptom_id': symptom_id,
+            'name': translate_symptom(symptom_id, live.table.symptom_names.get(symptom_id), lang),
+            'information_gain': gain
+        }
+    return jsonify(confirmed=sorted(live.confirmed),
+                   denied=sorted(live.denied),
+                   results=[_result_to_dict(r) for r in live.results()],
+                   next_symptom=next_symptom)
+
+def init_diagnosis_controller(symptom_model, expert_system, session_cache_size=256, diagnosis_log=None,
+                              symptom_autocomplete=None, fragment_cache=None):
     """Initialize diagnosis controller with models and services"""
-    global Symptom, ExpertSystem
+    global Symptom, ExpertSystem, DiagnosisLogWriter, SymptomAutocomplete, FragmentCache, diagnosis_sessions
     Symptom = symptom_model
     ExpertSystem = expert_system
+    DiagnosisLogWriter = diagnosis_log
+    SymptomAutocomplete = symptom_autocomplete
+    FragmentCache = fragment_cache
+    diagnosis_sessions = LRUCache(session_cache_size)
     
     @diagnosis_bp.route('/diagnosis', methods=['GET', 'POST'])
+    @query_budget(8)  # includes rebuilding the knowledge base snapshot and translations after a change
     @login_required
     def diagnosis():
         """Diagnosis page"""
@@ -35,14 +117,103 @@ def init_diagnosis_controller(symptom_model, expert_system):
             # Run expert system
             results = ExpertSystem.diagnose(symptom_ids)
             
+            # Queued only; written in the background by the log writer
+            if DiagnosisLogWriter is not None:
+                DiagnosisLogWriter.log(current_user.id, symptom_ids, results, ExpertSystem.get_snapshot().version)
+            
             return render_template('results.html', 
                                  symptoms=symptoms, 
                                  results=results,
                                  selected_symptom_ids=symptom_ids)
         
         # GET request - show diagnosis form
-        symptoms = Symptom.query.order_by(Symptom.name).all()
-        return render_template('diagnosis.html', symptoms=symptoms)
-
-
-
+        def symptom_choices():
+            return {'symptoms': Symptom.query.order_by(Symptom.name).all()}
+        
+        return render_template('diagnosis.html',
+                               symptom_choices=FragmentCache.render('fragments/symptom_choices.html', None,
+                                                                    symptom_choices))
+    
+    @diagnosis_bp.route('/api/symptoms/autocomplete')
+    @query_budget(8)  # only the logged-in user, except when the trie is rebuilt after a change
+    @login_required
+    def symptom_autocomplete():
+        """
+        Symptom autocomplete API
+        
+        ``GET /api/symptoms/autocomplete?q=<prefix>&limit=<n>`` returns
+        ``{"suggestions": [{"id": 3, "name": "..."}, ...]}``, best first, with
+        names in the user's language. English and Khmer names both match.
+        """
+        lang = get_language()
+        limit = request.args.get('limit', 8, type=int)
+        suggestions = SymptomAutocomplete.suggest(request.args.get('q', ''), max(limit, 1))
+        return jsonify(suggestions=[{'id': symptom_id, 'name': translate_symptom(symptom_id, name, lang)}
+                                    for symptom_id, name in suggestions])
+    
+    @diagnosis_bp.route('/api/diagnose/batch', methods=['POST'])
+    @login_required
+    def diagnose_batch():
+        """
+        Batch diagnosis API
+        
+        Expects JSON ``{"symptom_sets": [[1, 2], [3, 5, 9], ...]}`` and returns
+        ``{"results": [[...], [...], ...]}`` with one ranked result list per set.
+        """
+        payload = request.get_json(silent=True)
+        symptom_sets = payload.get('symptom_sets') if isinstance(payload, dict) else None
+        
+        if not isinstance(symptom_sets, list):
+            return jsonify(error='Request body must be JSON with a "symptom_sets" list'), 400
+        
+        limit = current_app.config['DIAGNOSIS_BATCH_LIMIT']
+        if len(symptom_sets) > limit:
+            return jsonify(error=f'At most {limit} symptom sets can be diagnosed per request'), 400
+        
+        for symptom_ids in symptom_sets:
+            if not isinstance(symptom_ids, list) or not all(
+                    isinstance(sid, int) and not isinstance(sid, bool) for sid in symptom_ids):
+                return jsonify(error='Each symptom set must be a list of symptom IDs'), 400
+        
+        results = ExpertSystem.diagnose_many(symptom_sets)
+        return jsonify(results=[[_result_to_dict(r) for r in item] for item in results])
+    
+    @diagnosis_bp.route('/api/diagnose/session', methods=['GET', 'POST'])
+    @login_required
+    def diagnosis_session():
+        """
+        Interactive diagnosis session
+        
+        GET returns the current session (starting one if needed), POST starts
+        a new one. Both return the confirmed and denied symptoms, the current
+        ranked results and the most informative symptom to ask about next.
+        """
+        live = _load_diagnosis_session() if request.method == 'GET' else None
+        if live is None:
+            live = _new_diagnosis_session()
+        return _diagnosis_session_state(live)
+    
+    @diagnosis_bp.route('/api/diagnose/session/answer', methods=['POST'])
+    @login_required
+    def diagnosis_session_answer():
+        """
+        Answer one symptom in the interactive diagnosis session
+        
+        Expects JSON ``{"symptom_id": 3, "present": true}``.
+        """
+        payload = request.get_json(silent=True) or {}
+        symptom_id = payload.get('symptom_id')
+        present = payload.get('present')
+        
+        if not isinstance(symptom_id, int) or isinstance(symptom_id, bool) or not isinstance(present, bool):
+            return jsonify(error='Request body must be JSON with "symptom_id" and boolean "present"'), 400
+        
+        live = _load_diagnosis_session() or _new_diagnosis_session()
+        try:
+            live.answer(symptom_id, present)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        
+        state = session['diagnosis_session']
+        session['diagnosis_session'] = {'id': state['id'], 'answers': state['answers'] + [[symptom_id, present]]}
+        return _diagnosis_session_state(live)
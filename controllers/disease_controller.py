@@ -1,30 +1,55 @@
 """Disease Controller - handles disease listing and details"""
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, current_app
 from flask_login import login_required
+from sqlalchemy.orm import selectinload
+from utils.http_cache import kb_page
+from utils.pagination import paginate
+from utils.query_budget import query_budget
 
 disease_bp = Blueprint('disease', __name__)
 
 # These will be injected
 Disease = None
+FragmentCache = None
 
-def init_disease_controller(disease_model):
-    """Initialize disease controller with models"""
-    global Disease
+def init_disease_controller(disease_model, fragment_cache):
+    """Initialize disease controller with models and the fragment cache"""
+    global Disease, FragmentCache
     Disease = disease_model
+    FragmentCache = fragment_cache
     
     @disease_bp.route('/disease/<int:disease_id>')
+    @query_budget(5)  # includes loading the content translations after a change
+    @kb_page
     @login_required
     def disease_detail(disease_id):
         """Disease detail page - requires login"""
-        disease = Disease.query.get_or_404(disease_id)
-        return render_template('disease_detail.html', disease=disease)
+        def disease_card():
+            return {'disease': Disease.query.options(selectinload(Disease.symptoms)).get_or_404(disease_id)}
+        
+        return render_template('disease_detail.html',
+                               disease_card=FragmentCache.render('fragments/disease_detail.html', disease_id,
+                                                                 disease_card))
     
     @disease_bp.route('/diseases')
+    @query_budget(5)
+    @kb_page
     @login_required
     def diseases():
-        """List all diseases - requires login"""
-        diseases_list = Disease.query.all()
-        return render_template('diseases.html', diseases=diseases_list)
+        """List diseases, one page at a time - requires login"""
+        def disease_list():
+            query = Disease.query.options(selectinload(Disease.symptoms))
+            search = request.args.get('q', '').strip()
+            if search:
+                query = query.filter(Disease.name.icontains(search, autoescape=True))
+            page = paginate(query, {'id': Disease.id, 'name': Disease.name}, Disease.id,
+                            per_page=current_app.config['LIST_PAGE_SIZE'])
+            return {'diseases': page, 'search': search}
+        
+        # The filters, sort and cursor all come from the query string
+        key = tuple(sorted(request.args.items(multi=True)))
+        return render_template('diseases.html',
+                               disease_list=FragmentCache.render('fragments/disease_list.html', key, disease_list))
 
 
 
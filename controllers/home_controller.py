@@ -1,23 +1,32 @@
 """Home Controller - handles home page"""
 from flask import Blueprint, render_template
 from flask_login import login_required
+from utils.query_budget import query_budget
 
 home_bp = Blueprint('home', __name__)
 
 # These will be injected
 Disease = None
+FragmentCache = None
 
-def init_home_controller(disease_model):
-    """Initialize home controller with models"""
-    global Disease
+def init_home_controller(disease_model, fragment_cache):
+    """Initialize home controller with models and the fragment cache"""
+    global Disease, FragmentCache
     Disease = disease_model
+    FragmentCache = fragment_cache
     
     @home_bp.route('/home')
+    @query_budget(4)  # includes loading the content translations after a change
     @login_required
     def index():
         """Home page - requires login"""
-        diseases = Disease.query.all()
-        return render_template('index.html', diseases=diseases)
+        def common_diseases():
+            # The page shows six diseases; the seventh only tells it to link to the full list
+            return {'diseases': Disease.query.order_by(Disease.id).limit(7).all()}
+        
+        return render_template('index.html',
+                               common_diseases=FragmentCache.render('fragments/common_diseases.html', None,
+                                                                    common_diseases))
 
 
 
@@ -0,0 +1,74 @@
+"""Search Controller - full-text search over diseases and symptoms"""
+from flask import Blueprint, render_template, request, jsonify, url_for
+from flask_login import login_required
+from sqlalchemy.orm import selectinload
+from utils.helpers import get_language, translate_disease, translate_symptom
+from utils.query_budget import query_budget
+
+search_bp = Blueprint('search', __name__)
+
+# These will be injected
+Disease = None
+Symptom = None
+SearchIndex = None
+
+# Most results a search returns
+MAX_RESULTS = 50
+
+def _search(query, limit):
+    """
+    Run a search and load the matching rows
+    
+    Returns:
+        List of ('disease' or 'symptom', model instance), best match first
+    """
+    keys = SearchIndex.search(query, limit)
+    disease_ids = [item_id for kind, item_id in keys if kind == 'disease']
+    symptom_ids = [item_id for kind, item_id in keys if kind == 'symptom']
+    
+    items = {}
+    if disease_ids:
+        items.update((('disease', d.id), d) for d in Disease.query.filter(Disease.id.in_(disease_ids)))
+    if symptom_ids:
+        symptoms = Symptom.query.options(selectinload(Symptom.diseases)).filter(Symptom.id.in_(symptom_ids))
+        items.update((('symptom', s.id), s) for s in symptoms)
+    # Rows deleted since they were indexed are skipped
+    return [(kind, items[(kind, item_id)]) for kind, item_id in keys if (kind, item_id) in items]
+
+def init_search_controller(disease_model, symptom_model, search_index):
+    """Initialize search controller with models and the search index"""
+    global Disease, Symptom, SearchIndex
+    Disease = disease_model
+    Symptom = symptom_model
+    SearchIndex = search_index
+    
+    @search_bp.route('/search')
+    @query_budget(9)  # includes building the in-process index when there is no FTS5
+    @login_required
+    def search():
+        """Search page - requires login"""
+        query = request.args.get('q', '').strip()
+        results = _search(query, MAX_RESULTS) if query else []
+        return render_template('search.html', query=query, results=results)
+    
+    @search_bp.route('/api/search')
+    @query_budget(9)
+    @login_required
+    def search_api():
+        """
+        Search API
+        
+        ``GET /api/search?q=<text>&limit=<n>`` returns ``{"results": [...]}``
+        with the type, id and name (in the user's language) of each match.
+        """
+        query = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_RESULTS)
+        lang = get_language()
+        results = []
+        for kind, item in (_search(query, limit) if query else []):
+            if kind == 'disease':
+                results.append({'type': kind, 'id': item.id, 'name': translate_disease(item.id, item.name, lang),
+                                'url': url_for('disease.disease_detail', disease_id=item.id)})
+            else:
+                results.append({'type': kind, 'id': item.id, 'name': translate_symptom(item.id, item.name, lang)})
+        return jsonify(query=query, results=results)
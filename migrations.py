@@ -0,0 +1,129 @@
+"""Database migrations - bring existing databases up to the current schema"""
+from sqlalchemy import inspect, text
+from translations import DEFAULT_LANGUAGE, LANGUAGES, get_catalog
+from utils.kb_version import kb_version
+
+
+def merge_disease_symptom(db, connection):
+    """
+    Merge the old ``disease_symptom`` table into ``disease_symptom_assoc``
+
+    Earlier versions kept disease-symptom links in two tables: the pages read
+    ``disease_symptom`` while seeding and the expert system used
+    ``disease_symptom_assoc``. Links that exist only in the old table are
+    copied over (keeping their severity) and the old table is dropped.
+
+    Returns:
+        Number of links copied, or None if there was nothing to migrate
+    """
+    if not inspect(connection).has_table('disease_symptom'):
+        return None
+
+    copied = connection.execute(text("""
+        INSERT INTO disease_symptom_assoc (disease_id, symptom_id, severity)
+        SELECT old.disease_id, old.symptom_id, COALESCE(old.severity, 1)
+        FROM disease_symptom old
+        JOIN disease ON disease.id = old.disease_id
+        JOIN symptom ON symptom.id = old.symptom_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM disease_symptom_assoc assoc
+            WHERE assoc.disease_id = old.disease_id AND assoc.symptom_id = old.symptom_id
+        )
+    """)).rowcount
+    connection.execute(text('DROP TABLE disease_symptom'))
+    return copied
+
+
+def create_missing_indexes(db, connection):
+    """
+    Create indexes added to existing tables (``create_all`` only creates
+    the indexes of tables it creates)
+
+    Returns:
+        Names of the indexes created, or None if all exist
+    """
+    inspector = inspect(connection)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+    return created or None
+
+
+def copy_catalog_translations(db, connection):
+    """
+    Store the translation catalogs' disease and symptom texts by id
+
+    Earlier versions translated knowledge base texts by looking the English
+    text up in the catalog (translations/km.py), so anything added or edited
+    in the admin was shown in English. Diseases and symptoms whose English
+    text has a catalog translation, and that have no translation row in that
+    language yet, get one; existing rows are left as they are.
+
+    Returns:
+        Number of translation rows added, or None if there was nothing to copy
+    """
+    copied = 0
+    for lang in LANGUAGES:
+        if lang == DEFAULT_LANGUAGE:
+            continue
+        catalog = get_catalog(lang)
+
+        existing = set(connection.execute(text('SELECT disease_id FROM disease_translation WHERE lang = :lang'),
+                                          {'lang': lang}).scalars())
+        rows = []
+        for disease_id, name, description, treatment in connection.execute(
+                text('SELECT id, name, description, treatment FROM disease')):
+            texts = [catalog.diseases.get(value) for value in (name, description, treatment)]
+            if disease_id not in existing and any(texts):
+                rows.append({'lang': lang, 'disease_id': disease_id, 'name': texts[0],
+                             'description': texts[1], 'treatment': texts[2]})
+        if rows:
+            connection.execute(text('INSERT INTO disease_translation (lang, disease_id, name, description, treatment) '
+                                    'VALUES (:lang, :disease_id, :name, :description, :treatment)'), rows)
+            copied += len(rows)
+
+        existing = set(connection.execute(text('SELECT symptom_id FROM symptom_translation WHERE lang = :lang'),
+                                          {'lang': lang}).scalars())
+        rows = [{'lang': lang, 'symptom_id': symptom_id, 'name': catalog.symptoms[name]}
+                for symptom_id, name in connection.execute(text('SELECT id, name FROM symptom'))
+                if symptom_id not in existing and name in catalog.symptoms]
+        if rows:
+            connection.execute(text('INSERT INTO symptom_translation (lang, symptom_id, name) '
+                                    'VALUES (:lang, :symptom_id, :name)'), rows)
+            copied += len(rows)
+    return copied or None
+
+
+# Applied in order; each one checks whether it is needed, so running them
+# again is harmless
+MIGRATIONS = [
+    ('merge_disease_symptom', merge_disease_symptom),
+    ('create_missing_indexes', create_missing_indexes),
+    ('copy_catalog_translations', copy_catalog_translations),
+]
+
+
+def upgrade_database(db):
+    """
+    Create missing tables and apply the migrations an existing database needs
+
+    Returns:
+        List of (migration name, result) for the migrations that did something
+    """
+    db.create_all()
+    applied = []
+    with db.engine.begin() as connection:
+        for name, migration in MIGRATIONS:
+            result = migration(db, connection)
+            if result is not None:
+                applied.append((name, result))
+
+    if any(name in ('merge_disease_symptom', 'copy_catalog_translations') and result for name, result in applied):
+        kb_version.bump()
+    return applied
@@ -1,16 +1,11 @@
 # Models file - db will be imported from app after initialization
 # This avoids circular imports
+from sqlalchemy.orm import validates
+from services.rule_compiler import compile_condition
 
 def create_models(db):
     """Create all models with the db instance"""
     
-    # Association table for many-to-many relationship between Disease and Symptom
-    disease_symptom = db.Table('disease_symptom',
-        db.Column('disease_id', db.Integer, db.ForeignKey('disease.id'), primary_key=True),
-        db.Column('symptom_id', db.Integer, db.ForeignKey('symptom.id'), primary_key=True),
-        db.Column('severity', db.Integer, default=1)
-    )
-    
     class Disease(db.Model):
         """Model for rice diseases"""
         __tablename__ = 'disease'
@@ -22,8 +17,11 @@ def create_models(db):
         created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
         
         # Relationships
-        symptoms = db.relationship('Symptom', secondary=disease_symptom, lazy='subquery',
-                                   backref=db.backref('diseases', lazy=True))
+        # Read through the DiseaseSymptom association (links are written as
+        # DiseaseSymptom rows). Loaded on demand; views that show symptoms
+        # eager-load them with selectinload.
+        symptoms = db.relationship('Symptom', secondary='disease_symptom_assoc', lazy='select', viewonly=True,
+                                   backref=db.backref('diseases', lazy=True, viewonly=True))
         rules = db.relationship('ExpertRule', backref='disease', lazy=True, cascade='all, delete-orphan')
         
         def __repr__(self):
@@ -43,13 +41,19 @@ def create_models(db):
     class DiseaseSymptom(db.Model):
         """Association model for disease-symptom relationship with severity"""
         __tablename__ = 'disease_symptom_assoc'
+        __table_args__ = (
+            # The primary key serves disease -> symptom lookups, this index symptom -> disease
+            db.Index('ix_disease_symptom_assoc_symptom_disease', 'symptom_id', 'disease_id'),
+        )
         
         disease_id = db.Column(db.Integer, db.ForeignKey('disease.id'), primary_key=True)
         symptom_id = db.Column(db.Integer, db.ForeignKey('symptom.id'), primary_key=True)
         severity = db.Column(db.Integer, default=1)  # 1-5 scale
         
-        disease = db.relationship('Disease', backref='disease_symptom_assocs')
-        symptom = db.relationship('Symptom', backref='disease_symptom_assocs')
+        disease = db.relationship('Disease', backref=db.backref('disease_symptom_assocs',
+                                                                cascade='all, delete-orphan'))
+        symptom = db.relationship('Symptom', backref=db.backref('disease_symptom_assocs',
+                                                                cascade='all, delete-orphan'))
         
         def __repr__(self):
             return f'<DiseaseSymptom disease_id={self.disease_id} symptom_id={self.symptom_id}>'
@@ -66,10 +70,21 @@ def create_models(db):
         
         def __repr__(self):
             return f'<ExpertRule {self.id} -> Disease {self.disease_id}>'
+        
+        @validates('condition')
+        def validate_condition(self, key, condition):
+            """Reject conditions the rule compiler cannot parse (raises RuleSyntaxError)"""
+            compile_condition(condition)
+            return condition
     
     class User(db.Model):
         """Model for user authentication"""
         __tablename__ = 'user'
+        __table_args__ = (
+            # The admin user list filtered by role, sorted by username or id
+            db.Index('ix_user_role_username', 'role', 'username'),
+            db.Index('ix_user_role_id', 'role', 'id'),
+        )
         
         id = db.Column(db.Integer, primary_key=True)
         username = db.Column(db.String(80), unique=True, nullable=False)
@@ -100,4 +115,79 @@ def create_models(db):
             """Required for Flask-Login"""
             return False
     
-    return Disease, Symptom, DiseaseSymptom, ExpertRule, disease_symptom, User
+    class DiagnosisLog(db.Model):
+        """Model for the diagnosis history (written in batches by DiagnosisLogWriter)"""
+        __tablename__ = 'diagnosis_log'
+        
+        id = db.Column(db.Integer, primary_key=True)
+        user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), index=True)
+        symptom_ids = db.Column(db.Text, nullable=False)  # JSON list of symptom IDs
+        results = db.Column(db.Text, nullable=False)  # JSON list of ranked results
+        engine_version = db.Column(db.String(64))  # Knowledge base version used
+        created_at = db.Column(db.DateTime, default=db.func.current_timestamp(), index=True)
+        
+        def __repr__(self):
+            return f'<DiagnosisLog {self.id} user={self.user_id}>'
+    
+    class DiagnosisDailyCount(db.Model):
+        """Rollup of the diagnosis history: diagnoses per day by top-ranked disease"""
+        __tablename__ = 'diagnosis_daily_count'
+        
+        day = db.Column(db.Date, primary_key=True)
+        disease_id = db.Column(db.Integer, db.ForeignKey('disease.id', ondelete='CASCADE'), primary_key=True)
+        diagnoses = db.Column(db.Integer, nullable=False, default=0)
+        confidence_sum = db.Column(db.Float, nullable=False, default=0.0)  # Sum of top-result confidences
+        
+        def __repr__(self):
+            return f'<DiagnosisDailyCount {self.day} disease={self.disease_id} n={self.diagnoses}>'
+    
+    class SymptomPairCount(db.Model):
+        """Rollup of the diagnosis history: how often two symptoms are selected together"""
+        __tablename__ = 'symptom_pair_count'
+        
+        # symptom_a <= symptom_b; a row with equal ids counts the symptom on its own
+        symptom_a = db.Column(db.Integer, db.ForeignKey('symptom.id', ondelete='CASCADE'), primary_key=True)
+        symptom_b = db.Column(db.Integer, db.ForeignKey('symptom.id', ondelete='CASCADE'), primary_key=True)
+        diagnoses = db.Column(db.Integer, nullable=False, default=0, index=True)
+        
+        def __repr__(self):
+            return f'<SymptomPairCount {self.symptom_a},{self.symptom_b} n={self.diagnoses}>'
+    
+    class DiseaseTranslation(db.Model):
+        """Model for a disease's name, description and treatment in another language"""
+        __tablename__ = 'disease_translation'
+        __table_args__ = (
+            # The primary key serves loading a whole language, this index deleting a disease
+            db.Index('ix_disease_translation_disease', 'disease_id'),
+        )
+        
+        lang = db.Column(db.String(8), primary_key=True)
+        disease_id = db.Column(db.Integer, db.ForeignKey('disease.id', ondelete='CASCADE'), primary_key=True)
+        # Missing (NULL) fields are shown in English
+        name = db.Column(db.String(200))
+        description = db.Column(db.Text)
+        treatment = db.Column(db.Text)
+        
+        disease = db.relationship('Disease', backref=db.backref('translations', cascade='all, delete-orphan'))
+        
+        def __repr__(self):
+            return f'<DiseaseTranslation {self.lang} disease={self.disease_id}>'
+    
+    class SymptomTranslation(db.Model):
+        """Model for a symptom's name in another language"""
+        __tablename__ = 'symptom_translation'
+        __table_args__ = (
+            db.Index('ix_symptom_translation_symptom', 'symptom_id'),
+        )
+        
+        lang = db.Column(db.String(8), primary_key=True)
+        symptom_id = db.Column(db.Integer, db.ForeignKey('symptom.id', ondelete='CASCADE'), primary_key=True)
+        name = db.Column(db.String(200), nullable=False)
+        
+        symptom = db.relationship('Symptom', backref=db.backref('translations', cascade='all, delete-orphan'))
+        
+        def __repr__(self):
+            return f'<SymptomTranslation {self.lang} symptom={self.symptom_id}>'
+    
+    return (Disease, Symptom, DiseaseSymptom, ExpertRule, User, DiagnosisLog,
+            DiagnosisDailyCount, SymptomPairCount, DiseaseTranslation, SymptomTranslation)
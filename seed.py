@@ -0,0 +1,209 @@
+"""Seed data - initial rice disease knowledge base and default accounts
+
+Run with ``flask --app app init-db`` (create tables and seed) or
+``flask --app app seed-db``. Seeding only inserts what is missing, with one
+bulk insert per table, so running it again changes nothing.
+"""
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+
+SYMPTOMS = [
+    'Brown spots on leaves',
+    'Yellowing of leaves',
+    'White powdery growth',
+    'Water-soaked lesions',
+    'Dark brown lesions',
+    'Leaf blight',
+    'Stem rot',
+    'Root rot',
+    'Grain discoloration',
+    'Stunted growth',
+    'Wilting',
+    'Leaf spots with yellow halo',
+    'Orange pustules',
+    'Black spots on grains',
+    'Leaf curling'
+]
+
+DISEASES = [
+    {
+        'name': 'Brown Spot',
+        'description': 'Caused by Bipolaris oryzae, affects leaves and grains',
+        'treatment': 'Use resistant varieties, apply fungicides like propiconazole',
+        'symptoms': ['Brown spots on leaves', 'Dark brown lesions', 'Grain discoloration']
+    },
+    {
+        'name': 'Blast Disease',
+        'description': 'Caused by Magnaporthe oryzae, most destructive rice disease',
+        'treatment': 'Use resistant varieties, avoid excessive nitrogen, apply tricyclazole',
+        'symptoms': ['Brown spots on leaves', 'Water-soaked lesions', 'Leaf blight', 'Stem rot']
+    },
+    {
+        'name': 'Sheath Blight',
+        'description': 'Caused by Rhizoctonia solani, affects sheaths and leaves',
+        'treatment': 'Use resistant varieties, proper spacing, apply validamycin',
+        'symptoms': ['Water-soaked lesions', 'Leaf blight', 'Stem rot', 'Wilting']
+    },
+    {
+        'name': 'Bacterial Leaf Blight',
+        'description': 'Caused by Xanthomonas oryzae, affects leaves',
+        'treatment': 'Use resistant varieties, avoid overhead irrigation, apply copper-based bactericides',
+        'symptoms': ['Yellowing of leaves', 'Water-soaked lesions', 'Leaf blight', 'Wilting']
+    },
+    {
+        'name': 'False Smut',
+        'description': 'Caused by Ustilaginoidea virens, affects grains',
+        'treatment': 'Use resistant varieties, proper field drainage, apply propiconazole',
+        'symptoms': ['Grain discoloration', 'Black spots on grains', 'Stunted growth']
+    },
+    {
+        'name': 'Rice Rust',
+        'description': 'Caused by Puccinia graminis, affects leaves',
+        'treatment': 'Use resistant varieties, apply fungicides like tebuconazole',
+        'symptoms': ['Orange pustules', 'Yellowing of leaves', 'Leaf spots with yellow halo']
+    },
+    {
+        'name': 'Powdery Mildew',
+        'description': 'Caused by Erysiphe graminis, affects leaves',
+        'treatment': 'Use resistant varieties, improve air circulation, apply sulfur-based fungicides',
+        'symptoms': ['White powdery growth', 'Yellowing of leaves', 'Leaf curling']
+    },
+    {
+        'name': 'Root Rot',
+        'description': 'Caused by various fungi, affects roots',
+        'treatment': 'Improve drainage, use healthy seeds, apply fungicides to soil',
+        'symptoms': ['Root rot', 'Stunted growth', 'Wilting', 'Yellowing of leaves']
+    }
+]
+
+EXPERT_RULES = [
+    {
+        'condition': "has_symptom('Brown spots on leaves') and has_symptom('Dark brown lesions')",
+        'disease_name': 'Brown Spot',
+        'confidence': 0.9
+    },
+    {
+        'condition': "has_symptom('Water-soaked lesions') and has_symptom('Leaf blight')",
+        'disease_name': 'Blast Disease',
+        'confidence': 0.85
+    },
+    {
+        'condition': "has_symptom('Water-soaked lesions') and has_symptom('Stem rot')",
+        'disease_name': 'Sheath Blight',
+        'confidence': 0.8
+    },
+    {
+        'condition': "has_symptom('Yellowing of leaves') and has_symptom('Water-soaked lesions')",
+        'disease_name': 'Bacterial Leaf Blight',
+        'confidence': 0.85
+    },
+    {
+        'condition': "has_symptom('Grain discoloration') and has_symptom('Black spots on grains')",
+        'disease_name': 'False Smut',
+        'confidence': 0.9
+    },
+    {
+        'condition': "has_symptom('Orange pustules') and has_symptom('Yellowing of leaves')",
+        'disease_name': 'Rice Rust',
+        'confidence': 0.88
+    },
+    {
+        'condition': "has_symptom('White powdery growth') and has_symptom('Yellowing of leaves')",
+        'disease_name': 'Powdery Mildew',
+        'confidence': 0.87
+    },
+    {
+        'condition': "has_symptom('Root rot') and has_symptom('Stunted growth')",
+        'disease_name': 'Root Rot',
+        'confidence': 0.82
+    }
+]
+
+DEFAULT_USERS = [
+    {'username': 'admin', 'email': 'admin@riceexpert.com', 'password': 'admin123', 'role': 'admin'},
+    {'username': 'user', 'email': 'user@riceexpert.com', 'password': 'user123', 'role': 'end-user'}
+]
+
+
+def _insert_missing(db, table, rows):
+    """Bulk insert rows (a list of dicts); returns how many were inserted"""
+    if rows:
+        db.session.execute(table.insert(), rows)
+    return len(rows)
+
+
+def seed_knowledge_base(db, Disease, Symptom, DiseaseSymptom, ExpertRule):
+    """
+    Insert the seed symptoms, diseases, disease-symptom links and rules that
+    are not in the database yet
+
+    Existing rows are matched by name (symptoms, diseases), by disease and
+    symptom (links) and by disease and condition (rules) and left as they are.
+
+    Returns:
+        Dictionary with the number of rows inserted per table
+    """
+    session = db.session
+    counts = {}
+
+    existing = set(session.scalars(select(Symptom.name).where(Symptom.name.in_(SYMPTOMS))))
+    counts['symptoms'] = _insert_missing(db, Symptom.__table__,
+                                         [{'name': name} for name in SYMPTOMS if name not in existing])
+
+    disease_names = [d['name'] for d in DISEASES]
+    existing = set(session.scalars(select(Disease.name).where(Disease.name.in_(disease_names))))
+    counts['diseases'] = _insert_missing(db, Disease.__table__, [
+        {'name': d['name'], 'description': d['description'], 'treatment': d['treatment']}
+        for d in DISEASES if d['name'] not in existing
+    ])
+
+    symptom_ids = dict(session.execute(select(Symptom.name, Symptom.id).where(Symptom.name.in_(SYMPTOMS))).all())
+    disease_ids = dict(session.execute(
+        select(Disease.name, Disease.id).where(Disease.name.in_(disease_names))).all())
+
+    existing = set(session.execute(
+        select(DiseaseSymptom.disease_id, DiseaseSymptom.symptom_id)
+        .where(DiseaseSymptom.disease_id.in_(disease_ids.values()))).all())
+    links = []
+    for disease_info in DISEASES:
+        disease_id = disease_ids[disease_info['name']]
+        for symptom_name in disease_info['symptoms']:
+            key = (disease_id, symptom_ids[symptom_name])
+            if key not in existing:
+                existing.add(key)
+                links.append({'disease_id': key[0], 'symptom_id': key[1], 'severity': 1})
+    counts['disease_symptoms'] = _insert_missing(db, DiseaseSymptom.__table__, links)
+
+    existing = set(session.execute(
+        select(ExpertRule.disease_id, ExpertRule.condition)
+        .where(ExpertRule.disease_id.in_(disease_ids.values()))).all())
+    counts['rules'] = _insert_missing(db, ExpertRule.__table__, [
+        {'condition': rule['condition'], 'disease_id': disease_ids[rule['disease_name']],
+         'confidence': rule['confidence']}
+        for rule in EXPERT_RULES
+        if (disease_ids[rule['disease_name']], rule['condition']) not in existing
+    ])
+
+    session.commit()
+    return counts
+
+
+def seed_users(db, User):
+    """
+    Create the default accounts, only if there are no users at all
+
+    Accounts that were renamed or deleted are not recreated, so a database
+    in use never gets an account with a known password back.
+
+    Returns:
+        Number of users created
+    """
+    if db.session.query(User.id).first() is not None:
+        return 0
+    count = _insert_missing(db, User.__table__, [
+        {'username': u['username'], 'email': u['email'], 'role': u['role'], 'is_active': True,
+         'password_hash': generate_password_hash(u['password'])}
+        for u in DEFAULT_USERS
+    ])
+    db.session.commit()
+    return count
@@ -0,0 +1,137 @@
+"""Content Translations - disease and symptom texts in other languages, cached per process"""
+import threading
+from translations import DEFAULT_LANGUAGE, LANGUAGES, get_catalog
+from utils.db_routing import use_primary
+
+# Translated fields of a disease, in the order they are kept
+DISEASE_FIELDS = ('name', 'description', 'treatment')
+
+
+def _value(item, field):
+    """Attribute of a model or snapshot record, or key of a dict (dashboard rows)"""
+    return item.get(field) if isinstance(item, dict) else getattr(item, field)
+
+
+class LanguageContent:
+    """
+    Disease and symptom texts of one language, keyed by id.
+
+    Read-only; a new one is built when the knowledge base changes. Lookups
+    are one dict access per field, and fall back to the stored (English)
+    text for rows and fields that have no translation.
+    """
+
+    __slots__ = ('lang', 'version', 'diseases', 'symptoms', 'template_globals')
+
+    def __init__(self, lang, version, diseases, symptoms):
+        self.lang = lang
+        self.version = version
+        self.diseases = diseases  # disease id -> {field: text}
+        self.symptoms = symptoms  # symptom id -> name
+
+        # Handed to every template render as is (see app_factory.inject_language)
+        self.template_globals = dict(get_catalog(lang).template_globals, tsym=self.symptom, tdis=self.disease)
+
+    def symptom_name(self, symptom_id, default):
+        """Name of a symptom in this language, or default (the English name)"""
+        return self.symptoms.get(symptom_id, default or '')
+
+    def disease_text(self, disease_id, field, default):
+        """Name, description or treatment of a disease in this language, or default (the English text)"""
+        translated = self.diseases.get(disease_id)
+        if translated is not None and field in translated:
+            return translated[field]
+        return default or ''
+
+    def symptom(self, symptom):
+        """Template function: name of a symptom (model, record or dict with id and name)"""
+        if not symptom:
+            return ''
+        return self.symptom_name(_value(symptom, 'id'), _value(symptom, 'name'))
+
+    def disease(self, disease, field='name'):
+        """Template function: name, description or treatment of a disease (model, record or dict)"""
+        if not disease:
+            return ''
+        return self.disease_text(_value(disease, 'id'), field, _value(disease, field))
+
+
+class ContentTranslations:
+    """
+    Per-language disease and symptom translations, stored by id in the
+    database and cached in the process.
+
+    A language is loaded with one query per table the first time it is
+    used and kept until the knowledge base version changes, so admin
+    changes made by any worker (which invalidate the knowledge base) are
+    picked up on the next request. English is the language the knowledge
+    base is written in and never touches the database.
+    """
+
+    def __init__(self, db, DiseaseTranslation, SymptomTranslation, kb_version=None):
+        self.db = db
+        self.DiseaseTranslation = DiseaseTranslation
+        self.SymptomTranslation = SymptomTranslation
+        self.kb_version = kb_version
+        self._lock = threading.Lock()
+        self._content = {}
+
+    def _load(self, lang, version):
+        DiseaseTranslation, SymptomTranslation = self.DiseaseTranslation, self.SymptomTranslation
+        session = self.db.session
+        diseases = {}
+        # Read from the primary: a lagging replica could give old rows that
+        # would then be kept under the new version
+        with use_primary():
+            for row in session.query(DiseaseTranslation.disease_id, DiseaseTranslation.name,
+                                     DiseaseTranslation.description, DiseaseTranslation.treatment) \
+                    .filter(DiseaseTranslation.lang == lang):
+                diseases[row[0]] = {field: text for field, text in zip(DISEASE_FIELDS, row[1:]) if text}
+            symptoms = dict(session.query(SymptomTranslation.symptom_id, SymptomTranslation.name)
+                            .filter(SymptomTranslation.lang == lang))
+        return LanguageContent(lang, version, diseases, symptoms)
+
+    def get(self, lang):
+        """Texts of a language (the default language for unknown codes)"""
+        if lang not in LANGUAGES:
+            lang = DEFAULT_LANGUAGE
+        version = self.kb_version.current if self.kb_version is not None else None
+        content = self._content.get(lang)
+        if content is not None and (lang == DEFAULT_LANGUAGE or content.version == version):
+            return content
+
+        with self._lock:
+            content = self._content.get(lang)
+            if content is None or (lang != DEFAULT_LANGUAGE and content.version != version):
+                if lang == DEFAULT_LANGUAGE:
+                    content = LanguageContent(lang, None, {}, {})
+                else:
+                    content = self._load(lang, version)
+                self._content[lang] = content
+        return content
+
+    def save(self, item, kind, lang, **texts):
+        """
+        Add, change or (with all texts empty) delete a disease's or symptom's
+        translation in the session; the caller commits and invalidates the
+        knowledge base
+
+        Args:
+            item: Disease or Symptom (may not be flushed yet)
+            kind: 'disease' or 'symptom'
+            lang: Language code other than the default language
+            texts: Fields to set (name, and for diseases description and treatment)
+        """
+        texts = {field: (text or '').strip() or None for field, text in texts.items()}
+        Model = self.DiseaseTranslation if kind == 'disease' else self.SymptomTranslation
+        translation = next((t for t in item.translations if t.lang == lang), None)
+        if not any(texts.values()) or (kind == 'symptom' and not texts.get('name')):
+            if translation is not None:
+                item.translations.remove(translation)
+            return None
+        if translation is None:
+            translation = Model(lang=lang)
+            item.translations.append(translation)
+        for field, text in texts.items():
+            setattr(translation, field, text)
+        return translation
@@ -0,0 +1,163 @@
+"""Diagnosis Log - write-behind buffer for the diagnosis history"""
+import atexit
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DiagnosisLogWriter:
+    """
+    Buffers diagnosis log rows in memory and writes them with bulk inserts.
+
+    ``log`` only appends to the buffer, so logging never adds a statement or a
+    commit to the request. A background thread writes the buffer when it holds
+    ``batch_size`` rows or every ``flush_interval`` seconds, and whatever is
+    left is written when the process exits. If the buffer grows past
+    ``max_pending`` rows (e.g. the database is down) the oldest rows are
+    dropped and counted.
+
+    Functions added with ``add_flush_hook`` are called with a connection and
+    the rows once the rows are committed, e.g. to update rollup tables. Each
+    hook runs in its own transaction, so a failing hook is logged and counted
+    without losing the rows or the other hooks' work. Hooks get the rows
+    before JSON encoding: ``symptom_ids`` is a sorted list and ``results`` a
+    list of (disease_id, confidence, method) tuples.
+    """
+
+    def __init__(self, app, db, DiagnosisLog, batch_size=500, flush_interval=5.0, max_pending=50000):
+        self.app = app
+        self.db = db
+        self.table = DiagnosisLog.__table__
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.failed_hooks = 0
+        self._rows = []
+        self._flush_hooks = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def add_flush_hook(self, hook):
+        """Call hook(connection, rows) in a transaction of its own after every flush"""
+        self._flush_hooks.append(hook)
+
+    def log(self, user_id, symptom_ids, results, engine_version):
+        """
+        Queue one diagnosis for writing
+
+        Args:
+            user_id: ID of the user who ran the diagnosis (or None)
+            symptom_ids: Selected symptom IDs
+            results: Ranked results as returned by ExpertSystem.diagnose
+            engine_version: Knowledge base version the results were computed with
+        """
+        row = {
+            'user_id': user_id,
+            'symptom_ids': sorted(set(symptom_ids)),
+            'results': [(r['disease'].id, r['confidence'], r['method']) for r in results],
+            'engine_version': engine_version,
+            'created_at': datetime.now(timezone.utc).replace(tzinfo=None)
+        }
+        with self._condition:
+            if self._closed:
+                return
+            self._ensure_thread()
+            self._rows.append(row)
+            overflow = len(self._rows) - self.max_pending
+            if overflow > 0:
+                del self._rows[:overflow]
+                self.dropped += overflow
+            if len(self._rows) >= self.batch_size:
+                self._condition.notify()
+
+    def pending(self):
+        """Number of rows waiting to be written"""
+        return len(self._rows)
+
+    def _ensure_thread(self):
+        """Start the flush thread (again after a fork, which does not copy threads)"""
+        if self._thread is None or self._pid != os.getpid():
+            if self._pid is not None and self._pid != os.getpid():
+                # Rows copied from the parent process are written by the parent
+                self._rows = []
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='diagnosis-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        pid = os.getpid()
+        while True:
+            with self._condition:
+                if len(self._rows) < self.batch_size and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                if self._closed or self._pid != pid:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows now"""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+
+            params = [
+                dict(row, symptom_ids=json.dumps(row['symptom_ids']), results=json.dumps([
+                    {'disease_id': disease_id, 'confidence': confidence, 'method': method}
+                    for disease_id, confidence, method in row['results']
+                ]))
+                for row in rows
+            ]
+            with self.app.app_context():
+                try:
+                    with self.db.engine.begin() as connection:
+                        connection.execute(self.table.insert(), params)
+                except Exception:
+                    logger.exception('Could not write %d diagnosis log rows', len(rows))
+                    self.failed_flushes += 1
+                    self.dropped += len(rows)
+                    return 0
+                self.written += len(rows)
+
+                for hook in self._flush_hooks:
+                    try:
+                        with self.db.engine.begin() as connection:
+                            hook(connection, rows)
+                    except Exception:
+                        logger.exception('Diagnosis log flush hook %r failed for %d rows', hook, len(rows))
+                        self.failed_hooks += 1
+            return len(rows)
+
+    def close(self):
+        """Stop the flush thread and write what is left"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        """Buffer counters"""
+        return {
+            'pending': len(self._rows),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed_flushes': self.failed_flushes,
+            'failed_hooks': self.failed_hooks
+        }
@@ -0,0 +1,219 @@
+"""Diagnosis Rollups - pre-aggregated diagnosis analytics for the admin dashboard"""
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import combinations_with_replacement
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+# Diagnoses with more symptoms selected than this only count each symptom on
+# its own, not their pairs: a diagnosis of k symptoms writes at most
+# max(k, MAX_PAIRED_SYMPTOMS * (MAX_PAIRED_SYMPTOMS + 1) / 2) symptom pair rows
+MAX_PAIRED_SYMPTOMS = 8
+
+
+class DiagnosisRollups:
+    """
+    Keeps the rollup tables in step with the diagnosis history.
+
+    ``update`` is registered as a flush hook of the DiagnosisLogWriter, so each
+    batch of logged diagnoses adds its counts once the batch is committed, in
+    a transaction of its own. If that fails the rows stay in the history but
+    their counts are missing (the writer logs and counts the failure), and
+    the tables stay behind until ``rebuild`` recomputes them from the whole
+    history. ``summary`` reads the few pre-aggregated rows the dashboard shows.
+    """
+
+    def __init__(self, db, Disease, Symptom, DiagnosisLog, DiagnosisDailyCount, SymptomPairCount):
+        self.db = db
+        self.Disease = Disease
+        self.Symptom = Symptom
+        self.DiagnosisLog = DiagnosisLog
+        self.DiagnosisDailyCount = DiagnosisDailyCount
+        self.SymptomPairCount = SymptomPairCount
+
+    @staticmethod
+    def aggregate(rows, daily=None, pairs=None):
+        """
+        Add up the rollup counts of diagnosis log rows
+
+        Every selected symptom is counted (paired with itself), but pairs of
+        different symptoms only for diagnoses of at most MAX_PAIRED_SYMPTOMS
+        symptoms: the rows a diagnosis adds grow with the square of its
+        symptoms, and a long selection says little about which symptoms go
+        together.
+
+        Args:
+            rows: Rows with created_at, symptom_ids (list) and results
+                (list of (disease_id, confidence, method) tuples)
+            daily: Optional dict to add to, (day, disease_id) -> [diagnoses, confidence_sum]
+            pairs: Optional dict to add to, (symptom_a, symptom_b) -> diagnoses
+
+        Returns:
+            Tuple (daily, pairs)
+        """
+        daily = defaultdict(lambda: [0, 0.0]) if daily is None else daily
+        pairs = defaultdict(int) if pairs is None else pairs
+        for row in rows:
+            if row['results']:
+                disease_id, confidence, _ = row['results'][0]
+                counts = daily[(row['created_at'].date(), disease_id)]
+                counts[0] += 1
+                counts[1] += confidence
+            symptom_ids = sorted(set(row['symptom_ids']))
+            if len(symptom_ids) > MAX_PAIRED_SYMPTOMS:
+                for symptom_id in symptom_ids:
+                    pairs[(symptom_id, symptom_id)] += 1
+                continue
+            for pair in combinations_with_replacement(symptom_ids, 2):
+                pairs[pair] += 1
+        return daily, pairs
+
+    def update(self, connection, rows):
+        """Flush hook: add the counts of newly logged rows to the rollup tables"""
+        daily, pairs = self.aggregate(rows)
+        self._increment(connection, self.DiagnosisDailyCount.__table__, ('day', 'disease_id'),
+                        [{'day': day, 'disease_id': disease_id, 'diagnoses': n, 'confidence_sum': conf}
+                         for (day, disease_id), (n, conf) in daily.items()])
+        self._increment(connection, self.SymptomPairCount.__table__, ('symptom_a', 'symptom_b'),
+                        [{'symptom_a': a, 'symptom_b': b, 'diagnoses': n} for (a, b), n in pairs.items()])
+
+    @staticmethod
+    def _increment(connection, table, key_columns, rows):
+        """Insert rows, adding their counts to existing rows with the same key"""
+        if not rows:
+            return
+        value_columns = [name for name in rows[0] if name not in key_columns]
+        dialect = connection.dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={name: table.c[name] + stmt.excluded[name] for name in value_columns})
+            connection.execute(stmt, rows)
+        elif dialect in ('mysql', 'mariadb'):
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table)
+            stmt = stmt.on_duplicate_key_update(
+                {name: table.c[name] + stmt.inserted[name] for name in value_columns})
+            connection.execute(stmt, rows)
+        else:
+            # No upsert support: update, then insert the keys that did not exist
+            for row in rows:
+                key = [table.c[name] == row[name] for name in key_columns]
+                result = connection.execute(
+                    table.update().where(*key).values(
+                        {name: table.c[name] + row[name] for name in value_columns}))
+                if result.rowcount == 0:
+                    connection.execute(table.insert(), row)
+
+    def rebuild(self, batch_size=5000):
+        """
+        Recompute the rollup tables from the whole diagnosis history
+
+        The history is read in id order, batch_size rows per query, and the
+        tables are replaced in a single transaction. Diagnoses logged while
+        the rebuild runs may be missed, so run it when the site is quiet.
+
+        Returns:
+            Number of diagnosis log rows read
+        """
+        log = self.DiagnosisLog.__table__
+        daily, pairs = defaultdict(lambda: [0, 0.0]), defaultdict(int)
+        total = 0
+
+        with self.db.engine.begin() as connection:
+            connection.execute(self.DiagnosisDailyCount.__table__.delete())
+            connection.execute(self.SymptomPairCount.__table__.delete())
+
+            last_id = 0
+            while True:
+                batch = connection.execute(
+                    select(log.c.id, log.c.created_at, log.c.symptom_ids, log.c.results)
+                    .where(log.c.id > last_id).order_by(log.c.id).limit(batch_size)
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                total += len(batch)
+                self.aggregate(({
+                    'created_at': row.created_at,
+                    'symptom_ids': json.loads(row.symptom_ids),
+                    'results': [(r['disease_id'], r['confidence'], r['method']) for r in json.loads(row.results)]
+                } for row in batch), daily, pairs)
+
+            self._increment(connection, self.DiagnosisDailyCount.__table__, ('day', 'disease_id'),
+                            [{'day': day, 'disease_id': disease_id, 'diagnoses': n, 'confidence_sum': conf}
+                             for (day, disease_id), (n, conf) in daily.items()])
+            self._increment(connection, self.SymptomPairCount.__table__, ('symptom_a', 'symptom_b'),
+                            [{'symptom_a': a, 'symptom_b': b, 'diagnoses': n} for (a, b), n in pairs.items()])
+        return total
+
+    def symptom_popularity(self):
+        """
+        How often each symptom has been selected
+
+        The symptom pair counts include each symptom paired with itself,
+        which is the number of diagnoses that selected it.
+
+        Returns:
+            Dictionary of symptom ID -> number of diagnoses
+        """
+        Pair = self.SymptomPairCount
+        rows = self.db.session.query(Pair.symptom_a, Pair.diagnoses).filter(Pair.symptom_a == Pair.symptom_b)
+        return dict(rows.all())
+
+    def summary(self, days=30, top=10):
+        """
+        Diagnosis trends for the dashboard
+
+        Returns:
+            Dictionary with the window in days, total diagnoses and average
+            top-result confidence in the window, diagnoses per day, the most
+            diagnosed diseases and the symptom pairs most often selected together
+            (diseases and symptoms as dicts with their id and name)
+        """
+        session = self.db.session
+        Daily = self.DiagnosisDailyCount
+        # Log timestamps are UTC
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+        per_day = session.query(Daily.day, func.sum(Daily.diagnoses)) \
+            .filter(Daily.day >= since).group_by(Daily.day).order_by(Daily.day).all()
+
+        diagnoses = func.sum(Daily.diagnoses)
+        top_diseases = session.query(self.Disease.id, self.Disease.name, diagnoses, func.sum(Daily.confidence_sum)) \
+            .join(self.Disease, self.Disease.id == Daily.disease_id) \
+            .filter(Daily.day >= since) \
+            .group_by(self.Disease.id, self.Disease.name) \
+            .order_by(diagnoses.desc()).limit(top).all()
+
+        Pair = self.SymptomPairCount
+        first, second = aliased(self.Symptom), aliased(self.Symptom)
+        top_pairs = session.query(first.id, first.name, second.id, second.name, Pair.diagnoses) \
+            .join(first, first.id == Pair.symptom_a) \
+            .join(second, second.id == Pair.symptom_b) \
+            .filter(Pair.symptom_a < Pair.symptom_b) \
+            .order_by(Pair.diagnoses.desc()).limit(top).all()
+
+        total, confidence_sum = session.query(func.sum(Daily.diagnoses), func.sum(Daily.confidence_sum)) \
+            .filter(Daily.day >= since).one()
+        total = int(total or 0)
+
+        return {
+            'days': days,
+            'total_diagnoses': total,
+            'average_confidence': (confidence_sum or 0.0) / total if total else None,
+            'per_day': [(day, int(n)) for day, n in per_day],
+            'top_diseases': [
+                {'id': disease_id, 'name': name, 'diagnoses': int(n), 'average_confidence': conf / n}
+                for disease_id, name, n, conf in top_diseases
+            ],
+            'top_symptom_pairs': [({'id': a_id, 'name': a}, {'id': b_id, 'name': b}, n)
+                                  for a_id, a, b_id, b, n in top_pairs]
+        }
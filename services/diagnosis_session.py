@@ -0,0 +1,210 @@
+"""Diagnosis Session - interactive diagnosis with next-symptom suggestions"""
+import threading
+import numpy as np
+
+# Probability that a farmer reports a symptom wrongly (used to weight
+# diseases when picking the next question)
+ANSWER_NOISE = 0.1
+
+# Posterior weights are rescaled when they grow past this value
+_RESCALE_LIMIT = 1e100
+
+
+class SuggestionTable:
+    """
+    Per-snapshot tables used by diagnosis sessions.
+
+    Holds the sparse disease x symptom structure in both directions, the rules
+    that mention each symptom and the information gain of asking about each
+    symptom when nothing is known yet.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+
+        self.symptom_ids = np.fromiter(kb.symptom_columns.keys(), dtype=np.int64, count=len(kb.symptom_columns))
+        self.rows_by_column = kb.rows_by_column
+        self.columns_by_row = kb.columns_by_row
+        self.symptom_names = {sid: name for name, sid in kb.symptom_ids_by_name.items()}
+
+        rules_by_symptom = {}
+        for position, rule in enumerate(kb.rules):
+            if not rule.can_fire:
+                continue
+            for sid in rule.symptom_ids:
+                rules_by_symptom.setdefault(sid, []).append(position)
+        self.rules_by_symptom = {sid: tuple(p) for sid, p in rules_by_symptom.items()}
+
+        # With nothing answered every disease weighs 1, so a symptom's mass is its number of diseases
+        disease_count = max(len(kb.disease_order), 1)
+        self.initial_mass = np.fromiter((len(rows) for rows in kb.rows_by_column), dtype=np.float64,
+                                        count=len(kb.rows_by_column))
+        self.initial_gain = _binary_entropy(self.initial_mass / disease_count)
+
+
+def _binary_entropy(p):
+    """Entropy in bits of a yes/no answer with probability p of yes"""
+    p = np.clip(p, 0.0, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    return np.nan_to_num(h)
+
+
+class DiagnosisSession:
+    """
+    Diagnosis that is updated one answered symptom at a time.
+
+    Each answer only touches the diseases linked to the answered symptom and
+    the rules that mention it, so recording it costs the same however large
+    the knowledge base is. Picking the next question (``suggest``) is one
+    vectorised pass over all symptoms. Scores are the same as
+    ``ExpertSystem.diagnose`` run on the confirmed symptoms.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.kb = table.kb
+        self.confirmed = set()
+        self.denied = set()
+        self.answers = []
+        self._lock = threading.Lock()
+
+        disease_count = len(self.kb.disease_order)
+        self._matched = np.zeros(disease_count, dtype=np.int64)
+        self._touched_rows = set()
+
+        # Unnormalised posterior weight per disease and its sum per symptom
+        self._weights = np.ones(disease_count, dtype=np.float64)
+        self._mass = table.initial_mass.copy()
+        self._total = float(disease_count)
+        self._answered_columns = np.zeros(len(table.symptom_ids), dtype=bool)
+
+        # Rules that are true with nothing selected fire straight away
+        self._fired_rules = set(self.kb.unconditional_rules)
+
+    @property
+    def version(self):
+        """Knowledge base version the session was built against"""
+        return self.kb.version
+
+    def answer(self, symptom_id, present):
+        """
+        Record whether a symptom was observed.
+
+        Raises:
+            ValueError: If the symptom was already answered
+        """
+        with self._lock:
+            if symptom_id in self.confirmed or symptom_id in self.denied:
+                raise ValueError('Symptom has already been answered')
+
+            (self.confirmed if present else self.denied).add(symptom_id)
+            self.answers.append((symptom_id, bool(present)))
+
+            col = self.kb.symptom_columns.get(symptom_id)
+            if col is not None:
+                self._answered_columns[col] = True
+                rows = self.table.rows_by_column[col]
+                if present:
+                    self._matched[rows] += 1
+                    self._touched_rows.update(rows.tolist())
+                self._reweight(rows, 1 / ANSWER_NOISE if present else ANSWER_NOISE)
+
+            if present:
+                self._update_rules(symptom_id)
+
+    def _reweight(self, rows, factor):
+        """Multiply the weights of rows and keep the per-symptom sums in step"""
+        for row in rows.tolist():
+            delta = self._weights[row] * (factor - 1)
+            self._weights[row] += delta
+            self._mass[self.table.columns_by_row[row]] += delta
+            self._total += delta
+
+        if self._total > _RESCALE_LIMIT:
+            scale = 1 / self._total
+            self._weights *= scale
+            self._mass *= scale
+            self._total = 1.0
+
+    def _update_rules(self, symptom_id):
+        """Re-evaluate the rules that mention a newly confirmed symptom"""
+        selected = frozenset(self.confirmed)
+        rules = self.kb.rules
+        for position in self.table.rules_by_symptom.get(symptom_id, ()):
+            if rules[position].evaluate(selected):
+                self._fired_rules.add(position)
+            else:
+                self._fired_rules.discard(position)
+
+    def results(self):
+        """Ranked diagnosis for the confirmed symptoms, as returned by diagnose()"""
+        from services.expert_system_service import ExpertSystem
+
+        with self._lock:
+            if not self.confirmed:
+                return []
+
+            kb = self.kb
+            rule_matches = {}
+            for position in sorted(self._fired_rules):
+                rule = kb.rules[position]
+                disease = kb.diseases.get(rule.disease_id)
+                if disease is None:
+                    continue
+                if disease.id not in rule_matches:
+                    rule_matches[disease.id] = {
+                        'disease': disease,
+                        'confidence': rule.confidence,
+                        'method': 'rule-based'
+                    }
+                else:
+                    rule_matches[disease.id]['confidence'] = max(
+                        rule_matches[disease.id]['confidence'], rule.confidence
+                    )
+
+            symptom_matches = {}
+            totals = kb.symptom_counts
+            for row in sorted(self._touched_rows):
+                matched = int(self._matched[row])
+                total = int(totals[row])
+                confidence = min(matched / total * 1.2, 1.0)
+                if confidence > 0.3:
+                    disease = kb.disease_order[row]
+                    symptom_matches[disease.id] = {
+                        'disease': disease,
+                        'confidence': confidence,
+                        'method': 'symptom-matching',
+                        'matched_symptoms_count': matched,
+                        'total_symptoms_count': total
+                    }
+
+            return ExpertSystem._combine(rule_matches, symptom_matches)
+
+    def suggest(self):
+        """
+        Most discriminating symptom to ask about next.
+
+        Takes time linear in the number of symptoms: every answer reweights
+        diseases and so changes the yes/no probability of every unanswered
+        symptom, and their gains are recomputed with one vectorised entropy
+        over the per-symptom weight sums. Only the gains before the first
+        answer are precomputed (SuggestionTable.initial_gain).
+
+        Returns:
+            Tuple (symptom_id, information_gain_in_bits), or None if no
+            unanswered symptom can separate the remaining diseases
+        """
+        with self._lock:
+            if not len(self._mass):
+                return None
+            if not self.answers:
+                gain = self.table.initial_gain.copy()
+            else:
+                gain = _binary_entropy(self._mass / self._total)
+            gain[self._answered_columns] = -1.0
+
+            col = int(np.argmax(gain))
+            if gain[col] <= 0:
+                return None
+            return int(self.table.symptom_ids[col]), float(gain[col])
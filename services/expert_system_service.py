@@ -1,41 +1,121 @@
 """Expert System Service - business logic for disease diagnosis"""
+import threading
+import numpy as np
+from services.diagnosis_session import DiagnosisSession, SuggestionTable
+from services.knowledge_base import KnowledgeBaseSnapshot
+from services.rule_compiler import RuleCompiler
+from utils.db_routing import use_primary
+from utils.metrics import metrics
+
+# Symptom sets scored together in diagnose_many
+BATCH_CHUNK_SIZE = 256
 
 class ExpertSystem:
     """Expert system for diagnosing rice diseases based on symptoms"""
     
-    def __init__(self, db_session, Disease, Symptom, DiseaseSymptom, ExpertRule):
+    def __init__(self, db_session, Disease, Symptom, DiseaseSymptom, ExpertRule, kb_version=None,
+                 result_cache=None, sharded_scorer=None, shard_min_diseases=0):
         self.db = db_session
         self.Disease = Disease
         self.Symptom = Symptom
         self.DiseaseSymptom = DiseaseSymptom
         self.ExpertRule = ExpertRule
+        self.kb_version = kb_version
+        self.result_cache = result_cache
+        self.sharded_scorer = sharded_scorer
+        self.shard_min_diseases = shard_min_diseases
+        self.rule_compiler = RuleCompiler()
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+        self._suggestion_table = None
+    
+    def get_snapshot(self):
+        """
+        Get the knowledge base snapshot, rebuilding it if the knowledge base
+        version has changed since it was built
+        """
+        version = self.kb_version.current if self.kb_version is not None else None
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                # Read from the primary: a lagging replica could give old data
+                # that would then be kept under the new version
+                with use_primary():
+                    snapshot = KnowledgeBaseSnapshot.build(
+                        version, self.Disease, self.Symptom, self.DiseaseSymptom,
+                        self.ExpertRule, self.rule_compiler
+                    )
+                self._snapshot = snapshot
+                if self._uses_shards(snapshot):
+                    self.sharded_scorer.load(snapshot)
+        return snapshot
+    
+    def invalidate(self):
+        """
+        Mark the knowledge base as changed; call after committing a change
+        
+        Returns:
+            (version before, version after) the change, for caches that apply
+            the change in place (see MemorySearchIndex.update)
+        """
+        versions = (None, None)
+        if self.kb_version is not None:
+            previous = self.kb_version.current
+            versions = (previous, self.kb_version.bump())
+        self._snapshot = None
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        return versions
+    
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the diagnosis result cache"""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.stats()
+    
+    def start_session(self, answers=()):
+        """
+        Start an interactive diagnosis session
+        
+        Args:
+            answers: Optional (symptom_id, present) pairs to replay, e.g. to
+                restore a session after the knowledge base changed. A symptom
+                answered more than once keeps its first answer.
+            
+        Returns:
+            DiagnosisSession bound to the current knowledge base snapshot
+        """
+        kb = self.get_snapshot()
+        table = self._suggestion_table
+        if table is None or table.kb is not kb:
+            table = SuggestionTable(kb)
+            self._suggestion_table = table
+        
+        session = DiagnosisSession(table)
+        for symptom_id, present in answers:
+            if symptom_id not in session.confirmed and symptom_id not in session.denied:
+                session.answer(symptom_id, present)
+        return session
     
     def has_symptom(self, symptom_name, selected_symptom_ids):
         """Check if a symptom is in the selected symptoms"""
-        symptom = self.Symptom.query.filter_by(name=symptom_name).first()
-        if symptom:
-            return symptom.id in selected_symptom_ids
+        symptom_id = self.get_snapshot().symptom_ids_by_name.get(symptom_name)
+        if symptom_id is not None:
+            return symptom_id in selected_symptom_ids
         return False
     
     def evaluate_rule(self, rule, selected_symptom_ids):
         """Evaluate an expert rule condition"""
-        try:
-            # Create a safe evaluation context
-            context = {
-                'has_symptom': lambda name: self.has_symptom(name, selected_symptom_ids),
-                'True': True,
-                'False': False,
-                'and': lambda x, y: x and y,
-                'or': lambda x, y: x or y,
-                'not': lambda x: not x
-            }
-            
-            # Evaluate the condition
-            result = eval(rule.condition, {"__builtins__": {}}, context)
-            return result
-        except:
+        compiled = self.rule_compiler.get(rule)
+        if compiled is None:
             return False
+        return compiled.evaluate(lambda name: self.has_symptom(name, selected_symptom_ids))
     
+    @metrics.timed('diagnose')
     def diagnose(self, selected_symptom_ids):
         """
         Diagnose diseases based on selected symptoms
@@ -49,15 +129,77 @@ class ExpertSystem:
         if not selected_symptom_ids:
             return []
         
-        results = []
+        return self.diagnose_many([selected_symptom_ids])[0]
+    
+    @metrics.timed('diagnose_many')
+    def diagnose_many(self, symptom_id_lists, chunk_size=BATCH_CHUNK_SIZE):
+        """
+        Diagnose several symptom sets in one pass over the knowledge base
+        
+        Results are cached by symptom set and knowledge base version, so
+        repeated symptom combinations are not scored again.
+        
+        Args:
+            symptom_id_lists: List of symptom ID lists, one per diagnosis
+            chunk_size: Number of symptom sets scored together
+            
+        Returns:
+            List with one entry per symptom set, each the same as diagnose() would return
+        """
+        kb = self.get_snapshot()
+        cache = self.result_cache
+        results = [[] for _ in symptom_id_lists]
+        pending = []
+        
+        for i, ids in enumerate(symptom_id_lists):
+            if not ids:
+                continue
+            selected = frozenset(ids)
+            cached = cache.get((kb.version, selected)) if cache is not None else None
+            if cached is not None:
+                results[i] = [dict(r) for r in cached]
+            else:
+                pending.append((i, selected))
+        
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            scored = self._score(kb, [selected for _, selected in chunk])
+            for (i, selected), (rule_matches, symptom_matches) in zip(chunk, scored):
+                results[i] = self._combine(rule_matches, symptom_matches)
+                if cache is not None:
+                    # Cache a private copy so callers can modify what they get
+                    cache.set((kb.version, selected), [dict(r) for r in results[i]])
+        
+        return results
+    
+    def _score(self, kb, selections):
+        """
+        Rule and symptom matches for each symptom set
+        
+        Large knowledge bases are scored in parallel by the sharded scorer
+        when one is configured and its workers are loaded with kb; the output
+        is the same as the serial path.
+        """
+        if self._uses_shards(kb):
+            scored = self.sharded_scorer.score(kb, selections)
+            if scored is not None:
+                return scored
         
-        # Method 1: Rule-based diagnosis
-        rules = self.ExpertRule.query.all()
+        symptom_matches = self._match_symptoms(kb, selections)
+        return [(self._match_rules(kb, selected), matches)
+                for selected, matches in zip(selections, symptom_matches)]
+    
+    def _uses_shards(self, kb):
+        return self.sharded_scorer is not None and len(kb.disease_order) >= self.shard_min_diseases
+    
+    @staticmethod
+    def _match_rules(kb, selected):
+        """Method 1: Rule-based diagnosis (only rules the selected symptoms can fire)"""
         rule_matches = {}
         
-        for rule in rules:
-            if self.evaluate_rule(rule, selected_symptom_ids):
-                disease = self.Disease.query.get(rule.disease_id)
+        for rule in kb.candidate_rules(selected):
+            if rule.evaluate(selected):
+                disease = kb.diseases.get(rule.disease_id)
                 if disease:
                     if disease.id not in rule_matches:
                         rule_matches[disease.id] = {
@@ -72,37 +214,56 @@ class ExpertSystem:
                             rule.confidence
                         )
         
-        # Method 2: Symptom matching (calculate similarity)
-        diseases = self.Disease.query.all()
-        symptom_matches = {}
+        return rule_matches
+    
+    @staticmethod
+    def _match_symptoms(kb, selections):
+        """
+        Method 2: Symptom matching (calculate similarity)
+        
+        Matched counts for every disease and every symptom set are the product
+        of the sparse incidence matrix (kb.rows_by_column) with the symptom-set
+        selection matrix.
+        Only the (symptom set, disease) pairs that share a symptom are touched,
+        so the cost does not grow with the number of unrelated diseases.
+        """
+        disease_count = len(kb.disease_order)
+        rows_by_column = kb.rows_by_column
+        symptom_matches = [{} for _ in selections]
         
-        for disease in diseases:
-            # Get all symptoms for this disease
-            disease_symptoms = self.DiseaseSymptom.query.filter_by(disease_id=disease.id).all()
-            disease_symptom_ids = [ds.symptom_id for ds in disease_symptoms]
-            
-            if not disease_symptom_ids:
-                continue
-            
-            # Calculate match ratio
-            matched_symptoms = set(selected_symptom_ids) & set(disease_symptom_ids)
-            match_ratio = len(matched_symptoms) / len(disease_symptom_ids)
-            
-            # Calculate confidence based on match ratio
-            # Higher match ratio = higher confidence
-            confidence = min(match_ratio * 1.2, 1.0)  # Cap at 1.0
-            
-            if confidence > 0.3:  # Only include if confidence > 30%
-                if disease.id not in symptom_matches:
-                    symptom_matches[disease.id] = {
-                        'disease': disease,
-                        'confidence': confidence,
-                        'method': 'symptom-matching',
-                        'matched_symptoms_count': len(matched_symptoms),
-                        'total_symptoms_count': len(disease_symptom_ids)
-                    }
-        
-        # Combine results, prioritizing rule-based matches
+        # One key per (symptom set, disease) pair for each shared symptom
+        keys = [rows_by_column[col] + item * disease_count
+                for item, selected in enumerate(selections)
+                for col in kb.columns(selected)]
+        if not keys:
+            return symptom_matches
+        
+        # np.unique sorts the pairs by symptom set, then by disease order
+        pairs, matched_counts = np.unique(np.concatenate(keys), return_counts=True)
+        items, rows = np.divmod(pairs, disease_count)
+        totals = kb.symptom_counts[rows]
+        match_ratios = matched_counts / totals
+        
+        # Calculate confidence based on match ratio
+        # Higher match ratio = higher confidence
+        confidences = np.minimum(match_ratios * 1.2, 1.0)  # Cap at 1.0
+        
+        # Only include if confidence > 30%
+        for i in np.flatnonzero(confidences > 0.3).tolist():
+            disease = kb.disease_order[rows[i]]
+            symptom_matches[items[i]][disease.id] = {
+                'disease': disease,
+                'confidence': float(confidences[i]),
+                'method': 'symptom-matching',
+                'matched_symptoms_count': int(matched_counts[i]),
+                'total_symptoms_count': int(totals[i])
+            }
+        
+        return symptom_matches
+    
+    @staticmethod
+    def _combine(rule_matches, symptom_matches):
+        """Combine results, prioritizing rule-based matches"""
         all_matches = {}
         
         # Add rule-based matches (higher priority)
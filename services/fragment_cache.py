@@ -0,0 +1,78 @@
+"""Fragment Cache - rendered page fragments kept per language and knowledge base version"""
+from flask import current_app
+from markupsafe import Markup
+from services.result_cache import LRUCache
+from utils.db_routing import use_primary
+from utils.helpers import get_language
+
+
+class Fragment:
+    """
+    A rendered fragment template: its HTML (output as is by ``{{ fragment }}``)
+    and the variables the template sets at top level with ``{% set %}``,
+    for the parts of the page outside the fragment (such as the title)
+    """
+
+    __slots__ = ('html', 'vars')
+
+    def __init__(self, html, vars):
+        self.html = html
+        self.vars = vars
+
+    def __html__(self):
+        return self.html
+
+    def __str__(self):
+        return self.html
+
+
+class FragmentCache:
+    """
+    Caches the parts of pages that only depend on the knowledge base.
+
+    A fragment is keyed by its template, the user's language, the knowledge
+    base version and the view's own key (such as the disease id or the list's
+    query arguments). Any change to the knowledge base gives it a new version,
+    so stale fragments are never served; they are evicted as the least
+    recently used once the cache holds ``max_size`` fragments. On a hit the
+    view skips both its queries and the template.
+    """
+
+    def __init__(self, kb_version=None, max_size=256):
+        self.kb_version = kb_version
+        self._cache = LRUCache(max_size)
+
+    def render(self, template_name, key, build):
+        """
+        Rendered fragment, from the cache or by rendering template_name
+
+        Args:
+            template_name: Fragment template
+            key: Hashable value telling apart the fragments of one template
+            build: Function returning the template's context; it only runs
+                on a miss and may abort (e.g. with a 404), which is not cached
+        """
+        version = self.kb_version.current if self.kb_version is not None else None
+        cache_key = (template_name, get_language(), version, key)
+        fragment = self._cache.get(cache_key)
+        if fragment is not None:
+            return fragment
+
+        # Read from the primary: a lagging replica could give old rows that
+        # would then be kept under the new version
+        with use_primary():
+            context = build()
+            current_app.update_template_context(context)
+            module = current_app.jinja_env.get_template(template_name).make_module(context)
+        fragment = Fragment(Markup(str(module)), {name: getattr(module, name) for name in module.__dict__
+                                                  if not name.startswith('_')})
+        self._cache.set(cache_key, fragment)
+        return fragment
+
+    def clear(self):
+        """Drop every cached fragment"""
+        self._cache.clear()
+
+    def stats(self):
+        """Cache usage counters"""
+        return self._cache.stats()
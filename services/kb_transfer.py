@@ -0,0 +1,405 @@
+"""Knowledge Base Transfer - streaming export and bulk import of the knowledge base"""
+import csv
+import io
+import json
+import logging
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import SQLAlchemyError
+from services.rule_compiler import RuleSyntaxError, compile_condition
+
+FORMATS = ('jsonl', 'csv')
+RECORD_TYPES = ('symptom', 'disease', 'link', 'rule')
+CSV_FIELDS = ('type', 'name', 'description', 'treatment', 'disease', 'symptom', 'severity', 'condition', 'confidence')
+
+# Import errors kept for the report (all of them are counted)
+MAX_REPORTED_ERRORS = 100
+
+logger = logging.getLogger(__name__)
+
+
+class RecordError(ValueError):
+    """An import record is malformed or refers to something that does not exist"""
+
+
+# Text is decoded in blocks, so reading may stop a few lines before the bad bytes
+_NOT_UTF8 = 'The file is not UTF-8 text, the rest of it was not read'
+
+
+def format_for_filename(filename, default='jsonl'):
+    """Transfer format implied by a file name"""
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_records(stream, fmt):
+    """
+    Read import records from a text stream one at a time
+
+    Yields:
+        (line number, record dict), or (line number, RecordError) for a line
+        that cannot be parsed. A file that is not UTF-8 text, or not CSV,
+        ends with a RecordError at the line where reading stopped.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        try:
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, '')}
+        except UnicodeDecodeError:
+            yield reader.line_num + 1, RecordError(_NOT_UTF8)
+        except csv.Error as e:
+            yield reader.line_num, RecordError(f'Invalid CSV, the rest of the file was not read: {e}')
+        return
+
+    line_no = 0
+    try:
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, RecordError(f'Invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict):
+                yield line_no, RecordError('Each line must be a JSON object')
+                continue
+            yield line_no, record
+    except UnicodeDecodeError:
+        yield line_no + 1, RecordError(_NOT_UTF8)
+
+
+def _text(record, field, max_length=None):
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f'"{field}" is required')
+    value = value.strip()
+    if max_length is not None and len(value) > max_length:
+        raise RecordError(f'"{field}" is longer than {max_length} characters')
+    return value
+
+
+def _number(record, field, default, convert, low, high):
+    value = record.get(field, default)
+    try:
+        value = convert(value)
+    except (TypeError, ValueError):
+        raise RecordError(f'"{field}" must be a number')
+    if not low <= value <= high:
+        raise RecordError(f'"{field}" must be between {low} and {high}')
+    return value
+
+
+def validate_record(record):
+    """
+    Check an import record and normalise its values
+
+    Returns:
+        Tuple (record type, values)
+
+    Raises:
+        RecordError: If the record is not valid
+    """
+    kind = record.get('type')
+    if kind == 'symptom':
+        return kind, {'name': _text(record, 'name', 200)}
+    if kind == 'disease':
+        return kind, {
+            'name': _text(record, 'name', 100),
+            'description': _text(record, 'description'),
+            'treatment': _text(record, 'treatment')
+        }
+    if kind == 'link':
+        return kind, {
+            'disease': _text(record, 'disease'),
+            'symptom': _text(record, 'symptom'),
+            'severity': _number(record, 'severity', 1, int, 1, 5)
+        }
+    if kind == 'rule':
+        condition = _text(record, 'condition')
+        try:
+            compile_condition(condition)
+        except RuleSyntaxError as e:
+            raise RecordError(str(e))
+        return kind, {
+            'disease': _text(record, 'disease'),
+            'condition': condition,
+            'confidence': _number(record, 'confidence', 0.5, float, 0.0, 1.0)
+        }
+    raise RecordError(f'"type" must be one of {", ".join(RECORD_TYPES)}')
+
+
+class KnowledgeBaseTransfer:
+    """
+    Streams the knowledge base out as JSON Lines or CSV and imports such files.
+
+    Records refer to diseases and symptoms by name, so a file can be moved
+    between databases. Export writes symptoms and diseases before the links
+    and rules that refer to them; an import file must keep that order.
+    Both directions work in batches of ``batch_size`` rows, so memory use
+    does not depend on the size of the file.
+    """
+
+    def __init__(self, db, Disease, Symptom, DiseaseSymptom, ExpertRule, batch_size=1000):
+        self.db = db
+        self.Disease = Disease
+        self.Symptom = Symptom
+        self.DiseaseSymptom = DiseaseSymptom
+        self.ExpertRule = ExpertRule
+        self.batch_size = batch_size
+
+    def export_records(self):
+        """Yield every knowledge base row as an export record"""
+        Disease, Symptom, DiseaseSymptom, ExpertRule = self.Disease, self.Symptom, self.DiseaseSymptom, self.ExpertRule
+
+        def stream(statement):
+            return self.db.session.execute(statement.execution_options(yield_per=self.batch_size))
+
+        for (name,) in stream(select(Symptom.name).order_by(Symptom.id)):
+            yield {'type': 'symptom', 'name': name}
+
+        for name, description, treatment in stream(
+                select(Disease.name, Disease.description, Disease.treatment).order_by(Disease.id)):
+            yield {'type': 'disease', 'name': name, 'description': description, 'treatment': treatment}
+
+        for disease, symptom, severity in stream(
+                select(Disease.name, Symptom.name, DiseaseSymptom.severity)
+                .join(Disease, Disease.id == DiseaseSymptom.disease_id)
+                .join(Symptom, Symptom.id == DiseaseSymptom.symptom_id)
+                .order_by(DiseaseSymptom.disease_id, DiseaseSymptom.symptom_id)):
+            yield {'type': 'link', 'disease': disease, 'symptom': symptom, 'severity': severity or 1}
+
+        for disease, condition, confidence in stream(
+                select(Disease.name, ExpertRule.condition, ExpertRule.confidence)
+                .join(Disease, Disease.id == ExpertRule.disease_id)
+                .order_by(ExpertRule.id)):
+            yield {'type': 'rule', 'disease': disease, 'condition': condition, 'confidence': confidence}
+
+    def export(self, fmt):
+        """Yield the export file as text chunks of about batch_size records"""
+        buffer = io.StringIO()
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator='\n')
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write('\n')
+
+        for count, record in enumerate(self.export_records(), 1):
+            write(record)
+            if count % self.batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def import_records(self, records):
+        """
+        Import records in batches, one transaction per batch
+
+        Symptoms and diseases are matched by name and links and rules by
+        disease (and symptom or condition); new rows are bulk inserted and
+        changed values of existing ones updated. Invalid records are skipped
+        and reported, and so is a batch the database rejects (it is rolled
+        back; the other batches are still imported).
+
+        Args:
+            records: Iterable of (line number, record) as yielded by read_records
+
+        Returns:
+            Dictionary with the records read, created/updated/unchanged
+            counts per record type, the error count and the first errors as
+            (line number, message) pairs
+        """
+        summary = {
+            'records': 0,
+            'created': dict.fromkeys(RECORD_TYPES, 0),
+            'updated': dict.fromkeys(RECORD_TYPES, 0),
+            'unchanged': dict.fromkeys(RECORD_TYPES, 0),
+            'error_count': 0,
+            'errors': []
+        }
+        batch = []
+        for line_no, record in records:
+            summary['records'] += 1
+            batch.append((line_no, record))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, summary)
+                batch = []
+        if batch:
+            self._import_batch(batch, summary)
+        return summary
+
+    @staticmethod
+    def _error(summary, line_no, message, count=1):
+        summary['error_count'] += count
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append((line_no, str(message)))
+
+    def _import_batch(self, batch, summary):
+        # Later records for the same key replace earlier ones in the batch
+        valid = {kind: {} for kind in RECORD_TYPES}
+        keys = {
+            'symptom': lambda v: v['name'],
+            'disease': lambda v: v['name'],
+            'link': lambda v: (v['disease'], v['symptom']),
+            'rule': lambda v: (v['disease'], v['condition'])
+        }
+        for line_no, record in batch:
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                kind, values = validate_record(record)
+            except RecordError as e:
+                self._error(summary, line_no, e)
+                continue
+            values['_line'] = line_no
+            valid[kind][keys[kind](values)] = values
+
+        # Counts of a batch that is rolled back are put back as they were
+        counts = {outcome: dict(summary[outcome]) for outcome in ('created', 'updated', 'unchanged')}
+        errors = summary['error_count']
+        session = self.db.session
+        try:
+            self._import_symptoms(list(valid['symptom'].values()), summary)
+            self._import_diseases(list(valid['disease'].values()), summary)
+            self._import_links(list(valid['link'].values()), summary)
+            self._import_rules(list(valid['rule'].values()), summary)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception('Knowledge base import batch at lines %d-%d failed', batch[0][0], batch[-1][0])
+            summary.update(counts)
+            # Every valid record of the batch is skipped; those already
+            # reported (unknown disease or symptom) are not counted twice
+            skipped = sum(len(items) for items in valid.values()) - (summary['error_count'] - errors)
+            self._error(summary, batch[0][0], f'Lines {batch[0][0]}-{batch[-1][0]} were not imported: '
+                                              f'{getattr(e, "orig", None) or e}', max(skipped, 1))
+        except Exception:
+            session.rollback()
+            raise
+
+    def _ids_by_name(self, model, names):
+        if not names:
+            return {}
+        return dict(self.db.session.execute(select(model.name, model.id).where(model.name.in_(names))).all())
+
+    def _resolve(self, items, summary):
+        """Drop links/rules whose disease (or symptom) does not exist, adding their ids to the rest"""
+        disease_ids = self._ids_by_name(self.Disease, {v['disease'] for v in items})
+        symptom_ids = self._ids_by_name(self.Symptom, {v['symptom'] for v in items if 'symptom' in v})
+        resolved = []
+        for values in items:
+            values['disease_id'] = disease_ids.get(values['disease'])
+            if values['disease_id'] is None:
+                self._error(summary, values['_line'], f'Unknown disease "{values["disease"]}"')
+                continue
+            if 'symptom' in values:
+                values['symptom_id'] = symptom_ids.get(values['symptom'])
+                if values['symptom_id'] is None:
+                    self._error(summary, values['_line'], f'Unknown symptom "{values["symptom"]}"')
+                    continue
+            resolved.append(values)
+        return resolved
+
+    def _import_symptoms(self, items, summary):
+        if not items:
+            return
+        existing = self._ids_by_name(self.Symptom, [v['name'] for v in items])
+        new = [{'name': v['name']} for v in items if v['name'] not in existing]
+        if new:
+            self.db.session.execute(self.Symptom.__table__.insert(), new)
+        summary['created']['symptom'] += len(new)
+        summary['unchanged']['symptom'] += len(items) - len(new)
+
+    def _import_diseases(self, items, summary):
+        if not items:
+            return
+        table = self.Disease.__table__
+        existing = {
+            name: (disease_id, description, treatment)
+            for disease_id, name, description, treatment in self.db.session.execute(
+                select(table.c.id, table.c.name, table.c.description, table.c.treatment)
+                .where(table.c.name.in_([v['name'] for v in items])))
+        }
+        new, changed = [], []
+        for v in items:
+            current = existing.get(v['name'])
+            if current is None:
+                new.append({'name': v['name'], 'description': v['description'], 'treatment': v['treatment']})
+            elif current[1:] != (v['description'], v['treatment']):
+                changed.append({'_id': current[0], 'description': v['description'], 'treatment': v['treatment']})
+
+        if new:
+            self.db.session.execute(table.insert(), new)
+        if changed:
+            self.db.session.execute(
+                table.update().where(table.c.id == bindparam('_id'))
+                .values(description=bindparam('description'), treatment=bindparam('treatment')), changed)
+        summary['created']['disease'] += len(new)
+        summary['updated']['disease'] += len(changed)
+        summary['unchanged']['disease'] += len(items) - len(new) - len(changed)
+
+    def _import_links(self, items, summary):
+        items = self._resolve(items, summary)
+        if not items:
+            return
+        table = self.DiseaseSymptom.__table__
+        existing = {
+            (disease_id, symptom_id): severity
+            for disease_id, symptom_id, severity in self.db.session.execute(
+                select(table.c.disease_id, table.c.symptom_id, table.c.severity)
+                .where(table.c.disease_id.in_({v['disease_id'] for v in items})))
+        }
+        new, changed = [], []
+        for v in items:
+            key = (v['disease_id'], v['symptom_id'])
+            if key not in existing:
+                new.append({'disease_id': key[0], 'symptom_id': key[1], 'severity': v['severity']})
+            elif existing[key] != v['severity']:
+                changed.append({'_disease_id': key[0], '_symptom_id': key[1], 'severity': v['severity']})
+
+        if new:
+            self.db.session.execute(table.insert(), new)
+        if changed:
+            self.db.session.execute(
+                table.update()
+                .where(table.c.disease_id == bindparam('_disease_id'), table.c.symptom_id == bindparam('_symptom_id'))
+                .values(severity=bindparam('severity')), changed)
+        summary['created']['link'] += len(new)
+        summary['updated']['link'] += len(changed)
+        summary['unchanged']['link'] += len(items) - len(new) - len(changed)
+
+    def _import_rules(self, items, summary):
+        items = self._resolve(items, summary)
+        if not items:
+            return
+        table = self.ExpertRule.__table__
+        existing = {
+            (disease_id, condition): (rule_id, confidence)
+            for rule_id, disease_id, condition, confidence in self.db.session.execute(
+                select(table.c.id, table.c.disease_id, table.c.condition, table.c.confidence)
+                .where(table.c.disease_id.in_({v['disease_id'] for v in items})))
+        }
+        new, changed = [], []
+        for v in items:
+            current = existing.get((v['disease_id'], v['condition']))
+            if current is None:
+                new.append({'disease_id': v['disease_id'], 'condition': v['condition'], 'confidence': v['confidence']})
+            elif current[1] != v['confidence']:
+                changed.append({'_id': current[0], 'confidence': v['confidence']})
+
+        if new:
+            self.db.session.execute(table.insert(), new)
+        if changed:
+            self.db.session.execute(
+                table.update().where(table.c.id == bindparam('_id')).values(confidence=bindparam('confidence')),
+                changed)
+        summary['created']['rule'] += len(new)
+        summary['updated']['rule'] += len(changed)
+        summary['unchanged']['rule'] += len(items) - len(new) - len(changed)
@@ -0,0 +1,191 @@
+"""Knowledge Base Snapshot - immutable in-memory copy of the diagnosis data"""
+from types import MappingProxyType
+import numpy as np
+
+
+class DiseaseRecord:
+    """Read-only copy of a Disease row"""
+
+    __slots__ = ('id', 'name', 'description', 'treatment')
+
+    def __init__(self, id, name, description, treatment):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'description', description)
+        object.__setattr__(self, 'treatment', treatment)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('DiseaseRecord is read-only')
+
+    def __repr__(self):
+        return f'<DiseaseRecord {self.name}>'
+
+
+class RuleRecord:
+    """
+    Expert rule with its condition compiled against symptom ids.
+
+    ``required_ids`` are the symptoms that must all be selected for the rule
+    to fire; ``can_fire`` is False when one of them is not a known symptom.
+    """
+
+    __slots__ = ('id', 'disease_id', 'confidence', 'condition', 'symptom_ids', 'required_ids', 'can_fire',
+                 'evaluate')
+
+    def __init__(self, id, disease_id, confidence, condition, symptom_ids, required_ids, can_fire, evaluate):
+        self.id = id
+        self.disease_id = disease_id
+        self.confidence = confidence
+        self.condition = condition
+        self.symptom_ids = symptom_ids
+        self.required_ids = required_ids
+        self.can_fire = can_fire
+        self.evaluate = evaluate
+
+
+class KnowledgeBaseSnapshot:
+    """
+    Immutable snapshot of diseases, symptoms, disease-symptom links and rules.
+
+    Built with four queries; everything the diagnosis needs is then answered
+    from memory. Disease-symptom links are also kept as a sparse incidence
+    matrix (one row per disease in ``disease_order``, one column per linked
+    symptom), held as its column view ``rows_by_column`` and its row view
+    ``columns_by_row`` so symptom matching can be done with array operations,
+    and rules are indexed by the symptoms that can make them fire.
+    """
+
+    def __init__(self, version, diseases, symptom_ids_by_name, disease_symptom_ids, rules):
+        self.version = version
+        self.diseases = MappingProxyType(diseases)
+        self.symptom_ids_by_name = MappingProxyType(symptom_ids_by_name)
+        self.disease_symptom_ids = MappingProxyType(disease_symptom_ids)
+        self.rules = tuple(rules)
+
+        self.disease_order = tuple(diseases.values())
+        linked_symptom_ids = sorted(set().union(*disease_symptom_ids.values()))
+        self.symptom_columns = MappingProxyType({sid: col for col, sid in enumerate(linked_symptom_ids)})
+
+        rows_by_column = [[] for _ in linked_symptom_ids]
+        columns_by_row = []
+        for row, disease in enumerate(self.disease_order):
+            cols = sorted(self.symptom_columns[sid] for sid in disease_symptom_ids.get(disease.id, ()))
+            columns_by_row.append(np.array(cols, dtype=np.intp))
+            for col in cols:
+                rows_by_column[col].append(row)
+
+        # Sparse views of the incidence matrix: linked disease rows of each
+        # symptom column, and linked symptom columns of each disease row
+        self.rows_by_column = tuple(np.array(rows, dtype=np.int64) for rows in rows_by_column)
+        self.columns_by_row = tuple(columns_by_row)
+
+        symptom_counts = np.fromiter((len(cols) for cols in columns_by_row), dtype=np.int64,
+                                     count=len(columns_by_row))
+        symptom_counts.flags.writeable = False
+        self.symptom_counts = symptom_counts
+
+        # Symptom -> rule inverted index (rule positions in self.rules). A rule
+        # that is false with nothing selected can only fire once one of its
+        # symptoms is selected, so it is listed under one of its required
+        # symptoms, or under every symptom it mentions if none is required.
+        # Rules that are true with nothing selected are kept apart.
+        rules_by_symptom = {}
+        unconditional_rules = []
+        for position, rule in enumerate(self.rules):
+            if not rule.can_fire:
+                continue
+            if rule.evaluate(frozenset()):
+                unconditional_rules.append(position)
+                continue
+            if rule.required_ids:
+                keys = [min(rule.required_ids, key=lambda sid: (len(rules_by_symptom.get(sid, ())), sid))]
+            else:
+                keys = rule.symptom_ids
+            for sid in keys:
+                rules_by_symptom.setdefault(sid, []).append(position)
+        self.rules_by_symptom = MappingProxyType({sid: tuple(p) for sid, p in rules_by_symptom.items()})
+        self.unconditional_rules = tuple(unconditional_rules)
+
+    def columns(self, symptom_ids):
+        """Incidence matrix columns of the given symptom ids (unlinked ids are dropped)"""
+        columns = self.symptom_columns
+        return np.fromiter(sorted({columns[sid] for sid in symptom_ids if sid in columns}), dtype=np.intp)
+
+    def candidate_rules(self, selected):
+        """
+        Rules that can fire for a set of selected symptom ids, in rule order.
+
+        Only index entries of the selected symptoms are visited, and rules
+        missing one of their required symptoms are dropped without being
+        evaluated.
+        """
+        positions = set(self.unconditional_rules)
+        rules_by_symptom = self.rules_by_symptom
+        for sid in selected:
+            positions.update(rules_by_symptom.get(sid, ()))
+        rules = self.rules
+        return [rules[p] for p in sorted(positions) if rules[p].required_ids <= selected]
+
+    @classmethod
+    def build(cls, version, Disease, Symptom, DiseaseSymptom, ExpertRule, rule_compiler):
+        """
+        Load a snapshot from the database.
+
+        Args:
+            version: Knowledge base version stamp the snapshot belongs to
+            Disease, Symptom, DiseaseSymptom, ExpertRule: Model classes
+            rule_compiler: RuleCompiler used to parse rule conditions
+
+        Returns:
+            KnowledgeBaseSnapshot
+        """
+        diseases = {
+            row.id: DiseaseRecord(row.id, row.name, row.description, row.treatment)
+            for row in Disease.query.with_entities(
+                Disease.id, Disease.name, Disease.description, Disease.treatment).order_by(Disease.id)
+        }
+        symptom_ids_by_name = {s.name: s.id for s in Symptom.query.with_entities(Symptom.name, Symptom.id)}
+
+        links = {}
+        for disease_id, symptom_id in DiseaseSymptom.query.with_entities(
+                DiseaseSymptom.disease_id, DiseaseSymptom.symptom_id):
+            links.setdefault(disease_id, set()).add(symptom_id)
+        disease_symptom_ids = {disease_id: frozenset(ids) for disease_id, ids in links.items()}
+
+        rules = []
+        for rule in ExpertRule.query.order_by(ExpertRule.id):
+            compiled = rule_compiler.get(rule)
+            if compiled is not None:
+                rules.append(make_rule_record(rule.id, rule.disease_id, rule.confidence,
+                                              compiled, symptom_ids_by_name))
+
+        return cls(version, diseases, symptom_ids_by_name, disease_symptom_ids, rules)
+
+
+def make_rule_record(rule_id, disease_id, confidence, compiled, symptom_ids_by_name):
+    """
+    Resolve a compiled rule condition against symptom ids.
+
+    Args:
+        rule_id, disease_id, confidence: ExpertRule fields
+        compiled: CompiledRule for the rule's condition
+        symptom_ids_by_name: Symptom name -> id map
+
+    Returns:
+        RuleRecord
+    """
+    def literal(name):
+        symptom_id = symptom_ids_by_name.get(name)
+        if symptom_id is None:
+            return lambda selected: False
+        return lambda selected: symptom_id in selected
+
+    symptom_ids = frozenset(
+        symptom_ids_by_name[name] for name in compiled.symptom_names if name in symptom_ids_by_name
+    )
+    required_ids = frozenset(
+        symptom_ids_by_name[name] for name in compiled.required_names if name in symptom_ids_by_name
+    )
+    can_fire = len(required_ids) == len(compiled.required_names)
+    return RuleRecord(rule_id, disease_id, confidence, compiled.condition, symptom_ids,
+                      required_ids, can_fire, compiled.bind(literal))
@@ -0,0 +1,183 @@
+"""Rule Compiler - parses expert rule conditions once and caches the result"""
+import ast
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RuleSyntaxError(ValueError):
+    """Raised when a rule condition is not a valid rule expression"""
+
+
+class CompiledRule:
+    """
+    A validated rule condition.
+
+    Conditions may only use ``has_symptom('<name>')``, ``True``, ``False``,
+    ``and``, ``or``, ``not`` and parentheses.
+
+    ``symptom_names`` holds every symptom the condition mentions and
+    ``required_names`` the ones that must be present for it to be true
+    (e.g. both literals of ``has_symptom('a') and has_symptom('b')``).
+    """
+
+    __slots__ = ('condition', 'tree', 'symptom_names', 'required_names', '_evaluate')
+
+    def __init__(self, condition, tree, symptom_names):
+        self.condition = condition
+        self.tree = tree
+        self.symptom_names = symptom_names
+        self.required_names = _required(tree)
+        self._evaluate = _build(tree, lambda name: lambda has: has(name))
+
+    def bind(self, literal):
+        """
+        Build a closure for this condition.
+
+        Args:
+            literal: Function mapping a symptom name to a predicate that takes
+                the evaluation argument and returns True if the symptom is present
+
+        Returns:
+            Function taking the evaluation argument and returning a bool
+        """
+        return _build(self.tree, literal)
+
+    def evaluate(self, has_symptom):
+        """Evaluate the condition with a ``has_symptom(name)`` callback"""
+        return self._evaluate(has_symptom)
+
+
+def compile_condition(condition):
+    """
+    Parse and validate a rule condition.
+
+    Args:
+        condition: Rule condition string
+
+    Returns:
+        CompiledRule
+
+    Raises:
+        RuleSyntaxError: If the condition is empty, malformed or uses
+            anything other than the supported rule syntax
+    """
+    if not condition or not condition.strip():
+        raise RuleSyntaxError('Rule condition is empty')
+    try:
+        tree = ast.parse(condition.strip(), mode='eval').body
+    except SyntaxError as e:
+        raise RuleSyntaxError(f'Invalid rule condition: {e.msg}') from None
+
+    names = []
+    _validate(tree, names)
+    return CompiledRule(condition, tree, frozenset(names))
+
+
+def _validate(node, names):
+    """Check that node only uses the supported rule syntax"""
+    if isinstance(node, ast.BoolOp):
+        for value in node.values:
+            _validate(value, names)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        _validate(node.operand, names)
+    elif isinstance(node, ast.Constant) and isinstance(node.value, bool):
+        pass
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id == 'has_symptom'):
+            raise RuleSyntaxError('Only has_symptom() calls are allowed in rule conditions')
+        if node.keywords or len(node.args) != 1:
+            raise RuleSyntaxError('has_symptom() takes exactly one symptom name')
+        arg = node.args[0]
+        if not (isinstance(arg, ast.Constant) and isinstance(arg.value, str)):
+            raise RuleSyntaxError('has_symptom() argument must be a quoted symptom name')
+        names.append(arg.value)
+    else:
+        raise RuleSyntaxError(f'Unsupported expression in rule condition: {type(node).__name__}')
+
+
+def _required(node):
+    """Symptom names that must all be present for node to be true"""
+    if isinstance(node, ast.BoolOp):
+        parts = [_required(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return frozenset().union(*parts)
+        return frozenset.intersection(*parts)
+    if isinstance(node, ast.Call):
+        return frozenset([node.args[0].value])
+    # Negations and constants do not require any symptom
+    return frozenset()
+
+
+def _build(node, literal):
+    """Turn a validated AST node into a closure"""
+    if isinstance(node, ast.BoolOp):
+        parts = tuple(_build(value, literal) for value in node.values)
+        if isinstance(node.op, ast.And):
+            def evaluate_and(arg):
+                for part in parts:
+                    if not part(arg):
+                        return False
+                return True
+            return evaluate_and
+
+        def evaluate_or(arg):
+            for part in parts:
+                if part(arg):
+                    return True
+            return False
+        return evaluate_or
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _build(node.operand, literal)
+        return lambda arg: not operand(arg)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda arg: value
+
+    return literal(node.args[0].value)
+
+
+class RuleCompiler:
+    """Compiles rule conditions and caches them by rule id and change stamp"""
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, rule):
+        """
+        Get the compiled condition of a rule.
+
+        The rule's condition text is used as its change stamp, so editing a
+        rule recompiles it on next use.
+
+        Returns:
+            CompiledRule, or None if the stored condition is invalid (the
+            error is logged once per condition)
+        """
+        cached = self._cache.get(rule.id)
+        if cached is not None and cached[0] == rule.condition:
+            return cached[1]
+
+        try:
+            compiled = compile_condition(rule.condition)
+        except RuleSyntaxError as e:
+            logger.warning('Expert rule %s is invalid and will be skipped: %s', rule.id, e)
+            compiled = None
+
+        with self._lock:
+            self._cache[rule.id] = (rule.condition, compiled)
+        return compiled
+
+    def discard(self, rule_id):
+        """Drop a rule from the cache"""
+        with self._lock:
+            self._cache.pop(rule_id, None)
+
+    def clear(self):
+        """Drop all cached rules"""
+        with self._lock:
+            self._cache.clear()
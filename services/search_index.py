@@ -0,0 +1,347 @@
+"""Search Index - full-text search over diseases and symptoms in English and Khmer"""
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import text
+from utils.db_routing import use_primary
+
+KINDS = ('disease', 'symptom')
+
+# Khmer and Khmer Symbols blocks
+_KHMER = re.compile('[\u1780-\u17ff\u19e0-\u19ff]')
+_WORD = re.compile(r'\w+')
+
+# Ranking weight of a match in the name over one in the description/treatment
+NAME_WEIGHT = 10.0
+
+
+def is_khmer(query):
+    """Whether a query is Khmer text (searched in the Khmer index)"""
+    return bool(_KHMER.search(query))
+
+
+def _documents(diseases, symptoms, km):
+    """
+    Searchable documents of knowledge base rows
+
+    Each disease and symptom gives an English document and, if it has a
+    Khmer translation (km, the Khmer LanguageContent), a Khmer one.
+
+    Yields:
+        (language, kind, item id, name, body)
+    """
+    for disease_id, name, description, treatment in diseases:
+        yield 'en', 'disease', disease_id, name, f'{description}\n{treatment}'
+        texts = km.diseases.get(disease_id)
+        if texts:
+            yield ('km', 'disease', disease_id, texts.get('name', ''),
+                   '\n'.join(texts[field] for field in ('description', 'treatment') if field in texts))
+    for symptom_id, name in symptoms:
+        yield 'en', 'symptom', symptom_id, name, ''
+        if symptom_id in km.symptoms:
+            yield 'km', 'symptom', symptom_id, km.symptoms[symptom_id], ''
+
+
+class SearchIndex:
+    """
+    Common part of the search backends: reading the documents to index.
+
+    Backends implement ``setup``, ``rebuild``, ``update``, ``remove`` and
+    ``search``; ``search`` returns (kind, item id) pairs, best match first.
+    """
+
+    def __init__(self, db, Disease, Symptom, content_translations):
+        self.db = db
+        self.Disease = Disease
+        self.Symptom = Symptom
+        self.content_translations = content_translations
+
+    def _all_documents(self, session):
+        diseases = session.query(self.Disease.id, self.Disease.name,
+                                 self.Disease.description, self.Disease.treatment).all()
+        symptoms = session.query(self.Symptom.id, self.Symptom.name).all()
+        return _documents(diseases, symptoms, self.content_translations.get('km'))
+
+    def _item_documents(self, kind, item):
+        km = self.content_translations.get('km')
+        if kind == 'disease':
+            return _documents([(item.id, item.name, item.description, item.treatment)], [], km)
+        return _documents([], [(item.id, item.name)], km)
+
+    def setup(self):
+        """Create the index storage if needed (run by ``flask upgrade-db``)"""
+        return None
+
+
+class FtsSearchIndex(SearchIndex):
+    """
+    Search index stored in SQLite FTS5 tables next to the knowledge base.
+
+    English text uses the porter tokenizer, so word forms match ("spots"
+    finds "spot") and the last word of a query matches as a prefix. Khmer is
+    written without spaces between words, so it uses the trigram tokenizer,
+    which matches any substring of three or more characters. Each row's
+    rowid encodes its kind and item id, so updates touch one row per language.
+    """
+
+    TABLES = {
+        'en': ('search_en', 'porter unicode61 remove_diacritics 2'),
+        'km': ('search_km', 'trigram'),
+    }
+
+    @staticmethod
+    def supported(uri):
+        """Whether the database at uri can hold the FTS5 trigram index"""
+        if not uri.startswith('sqlite'):
+            return False
+        if sqlite3.sqlite_version_info < (3, 34, 0):
+            return False
+        connection = sqlite3.connect(':memory:')
+        try:
+            connection.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram')")
+            return True
+        except sqlite3.OperationalError:
+            return False
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _rowid(kind, item_id):
+        return item_id * len(KINDS) + KINDS.index(kind)
+
+    @staticmethod
+    def _key(rowid):
+        item_id, kind = divmod(rowid, len(KINDS))
+        return KINDS[kind], item_id
+
+    def _insert(self, session, documents):
+        rows = defaultdict(list)
+        for lang, kind, item_id, name, body in documents:
+            rows[lang].append({'rowid': self._rowid(kind, item_id), 'name': name, 'body': body})
+        for lang, params in rows.items():
+            table = self.TABLES[lang][0]
+            session.execute(text(f'INSERT INTO {table} (rowid, name, body) VALUES (:rowid, :name, :body)'), params)
+
+    def _delete(self, session, kind, item_id):
+        for table, _ in self.TABLES.values():
+            session.execute(text(f'DELETE FROM {table} WHERE rowid = :rowid'), {'rowid': self._rowid(kind, item_id)})
+
+    def setup(self):
+        """
+        Create the FTS tables if they are missing and index the knowledge base
+
+        Returns:
+            Names of the tables created, or None if they all exist
+        """
+        session = self.db.session
+        created = []
+        for table, tokenizer in self.TABLES.values():
+            exists = session.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                     {'name': table}).first()
+            if not exists:
+                session.execute(text(f"CREATE VIRTUAL TABLE {table} USING fts5(name, body, tokenize='{tokenizer}')"))
+                created.append(table)
+        session.commit()
+        if created:
+            self.rebuild()
+        return created or None
+
+    def rebuild(self):
+        """Re-index the whole knowledge base (after bulk changes such as an import)"""
+        session = self.db.session
+        try:
+            for table, _ in self.TABLES.values():
+                session.execute(text(f'DELETE FROM {table}'))
+            self._insert(session, self._all_documents(session))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+    def update(self, kind, item, versions=None):
+        """Index a disease or symptom that was added or changed (call after committing it)"""
+        session = self.db.session
+        self._delete(session, kind, item.id)
+        self._insert(session, self._item_documents(kind, item))
+        session.commit()
+
+    def remove(self, kind, item_id, versions=None):
+        """Drop a deleted disease or symptom from the index"""
+        self._delete(self.db.session, kind, item_id)
+        self.db.session.commit()
+
+    def search(self, query, limit=20):
+        """Diseases and symptoms matching query, best first, as (kind, item id) pairs"""
+        lang = 'km' if is_khmer(query) else 'en'
+        table = self.TABLES[lang][0]
+        terms = query.split() if lang == 'km' else _WORD.findall(query.lower())
+        if not terms:
+            return []
+
+        if lang == 'km' and min(len(term) for term in terms) < 3:
+            # Too short for trigrams: a scan of the (small) Khmer table
+            like = ' AND '.join(f"(name || ' ' || body) LIKE :t{i} ESCAPE '\\'" for i in range(len(terms)))
+            params = {f't{i}': '%' + re.sub(r'([%_\\])', r'\\\1', term) + '%' for i, term in enumerate(terms)}
+            sql = f'SELECT rowid FROM {table} WHERE {like} ORDER BY length(name) LIMIT :limit'
+        else:
+            phrases = ['"' + term.replace('"', '""') + '"' for term in terms]
+            if lang == 'en':
+                phrases[-1] += '*'  # the last word may still be being typed
+            params = {'match': ' AND '.join(phrases)}
+            sql = (f'SELECT rowid FROM {table} WHERE {table} MATCH :match '
+                   f'ORDER BY bm25({table}, {NAME_WEIGHT}, 1.0) LIMIT :limit')
+        params['limit'] = limit
+        return [self._key(rowid) for (rowid,) in self.db.session.execute(text(sql), params)]
+
+
+class MemorySearchIndex(SearchIndex):
+    """
+    In-process inverted index, for databases without FTS5.
+
+    English text is indexed by word and Khmer text by character trigram
+    (Khmer has no spaces between words). The index is built on the first
+    search and rebuilt when the knowledge base version changes, so every
+    worker sees changes made by the others; changes made through ``update``
+    and ``remove`` are applied in place without a rebuild.
+    """
+
+    def __init__(self, db, Disease, Symptom, content_translations, kb_version=None):
+        super().__init__(db, Disease, Symptom, content_translations)
+        self.kb_version = kb_version
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = {'en': defaultdict(dict), 'km': defaultdict(dict)}
+        self._terms_of = {}
+        self._sorted_terms = None
+
+    @staticmethod
+    def _terms(lang, value):
+        """Index terms of a text: lowercase words, or trigrams for Khmer"""
+        if lang == 'en':
+            return set(_WORD.findall(value.lower()))
+        terms = set()
+        for chunk in value.split():
+            if len(chunk) < 3:
+                terms.add(chunk)
+            terms.update(chunk[i:i + 3] for i in range(len(chunk) - 2))
+        return terms
+
+    def _current_version(self):
+        return self.kb_version.current if self.kb_version is not None else None
+
+    def _add(self, documents):
+        for lang, kind, item_id, name, body in documents:
+            key = (kind, item_id)
+            postings = self._postings[lang]
+            name_terms = self._terms(lang, name)
+            for term in name_terms | self._terms(lang, body):
+                postings[term][key] = postings[term].get(key, 0.0) + (NAME_WEIGHT if term in name_terms else 1.0)
+                self._terms_of.setdefault(key, set()).add((lang, term))
+        self._sorted_terms = None
+
+    def _discard(self, key):
+        for lang, term in self._terms_of.pop(key, ()):
+            postings = self._postings[lang]
+            postings[term].pop(key, None)
+            if not postings[term]:
+                del postings[term]
+        self._sorted_terms = None
+
+    def rebuild(self):
+        """Re-index the whole knowledge base from the database"""
+        version = self._current_version()
+        with use_primary():
+            documents = list(self._all_documents(self.db.session))
+        with self._lock:
+            self._postings = {'en': defaultdict(dict), 'km': defaultdict(dict)}
+            self._terms_of = {}
+            self._add(documents)
+            self._version = version
+
+    def _ensure_current(self):
+        if self._version is None or self._version != self._current_version():
+            self.rebuild()
+
+    def _patchable(self, versions):
+        """
+        Whether a change made between versions (before, after) can be applied
+        in place: only if the index was current just before it. Otherwise
+        another worker changed the knowledge base too, and the index is left
+        stale so the next search rebuilds it.
+        """
+        return versions is not None and self._version is not None and self._version == versions[0]
+
+    def update(self, kind, item, versions=None):
+        """
+        Index a disease or symptom that was added or changed
+
+        Args:
+            versions: (before, after) knowledge base versions returned by
+                ExpertSystem.invalidate for the change
+        """
+        with self._lock:
+            if not self._patchable(versions):
+                return  # Not built yet, or out of date: the next search rebuilds it
+            self._discard((kind, item.id))
+            self._add(self._item_documents(kind, item))
+            self._version = versions[1]
+
+    def remove(self, kind, item_id, versions=None):
+        """Drop a deleted disease or symptom from the index (versions as for update)"""
+        with self._lock:
+            if not self._patchable(versions):
+                return
+            self._discard((kind, item_id))
+            self._version = versions[1]
+
+    def _prefix_terms(self, prefix):
+        """English index terms starting with prefix"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings['en'])
+        terms = self._sorted_terms
+        start = bisect_left(terms, prefix)
+        end = start
+        while end < len(terms) and terms[end].startswith(prefix):
+            end += 1
+        return terms[start:end]
+
+    def search(self, query, limit=20):
+        """Diseases and symptoms matching query, best first, as (kind, item id) pairs"""
+        self._ensure_current()
+        lang = 'km' if is_khmer(query) else 'en'
+        with self._lock:
+            postings = self._postings[lang]
+            if lang == 'en':
+                words = _WORD.findall(query.lower())
+                if not words:
+                    return []
+                # Every word must match; the last one may still be being typed
+                groups = [[word] for word in words[:-1]] + [self._prefix_terms(words[-1])]
+            else:
+                groups = []
+                for chunk in query.split():
+                    if len(chunk) < 3:
+                        # Too short for trigrams: any term containing it
+                        groups.append([term for term in postings if chunk in term])
+                    else:
+                        groups.extend([term] for term in self._terms(lang, chunk))
+                if not groups:
+                    return []
+
+            scores = None
+            for group in groups:
+                matches = defaultdict(float)
+                for term in group:
+                    for key, weight in postings.get(term, {}).items():
+                        matches[key] = max(matches[key], weight)
+                if scores is None:
+                    scores = dict(matches)
+                else:
+                    scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [key for key, _ in ranked[:limit]]
@@ -0,0 +1,230 @@
+"""Sharded Diagnosis - scores very large knowledge bases on a pool of processes"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Knowledge base shard loaded into each worker process by _load_shard
+_shard = None
+
+
+def _load_shard(payload):
+    """Worker initializer: rebuild the shard's snapshot from plain data"""
+    global _shard
+    from services.knowledge_base import DiseaseRecord, KnowledgeBaseSnapshot, make_rule_record
+    from services.rule_compiler import compile_condition
+
+    version, diseases, symptom_ids_by_name, disease_symptom_ids, rules = payload
+    records = {row[0]: DiseaseRecord(*row) for row in diseases}
+    rule_records = []
+    positions = {}
+    for position, rule_id, disease_id, confidence, condition in rules:
+        rule_records.append(make_rule_record(rule_id, disease_id, confidence,
+                                             compile_condition(condition), symptom_ids_by_name))
+        positions[rule_id] = position
+    kb = KnowledgeBaseSnapshot(version, records, symptom_ids_by_name, disease_symptom_ids, rule_records)
+    _shard = (kb, positions)
+
+
+def _ready():
+    """Worker task: nothing; returns once the process has loaded its shard"""
+    return _shard is not None
+
+
+def _score_shard(selections):
+    """
+    Worker task: score symptom sets against this process's shard
+
+    Returns:
+        One (rule_hits, symptom_hits) pair per symptom set, where rule_hits
+        maps disease id -> [first fired rule position, best confidence] and
+        symptom_hits maps disease id -> (confidence, matched, total) in
+        disease order
+    """
+    from services.expert_system_service import ExpertSystem
+
+    kb, positions = _shard
+    symptom_matches = ExpertSystem._match_symptoms(kb, selections)
+    scored = []
+    for selected, matches in zip(selections, symptom_matches):
+        rule_hits = {}
+        for rule in kb.candidate_rules(selected):
+            if rule.evaluate(selected):
+                hit = rule_hits.get(rule.disease_id)
+                if hit is None:
+                    rule_hits[rule.disease_id] = [positions[rule.id], rule.confidence]
+                else:
+                    hit[1] = max(hit[1], rule.confidence)
+        symptom_hits = {
+            disease_id: (m['confidence'], m['matched_symptoms_count'], m['total_symptoms_count'])
+            for disease_id, m in matches.items()
+        }
+        scored.append((rule_hits, symptom_hits))
+    return scored
+
+
+class ShardedScorer:
+    """
+    Splits the knowledge base into shards scored in parallel by a persistent
+    pool of worker processes (one process per shard).
+
+    Diseases are split into contiguous blocks of the snapshot's disease order
+    and each rule goes to the shard of its disease, so every disease is scored
+    by exactly one shard. Shards are loaded into the workers once per
+    knowledge base version: ``load`` starts a new pool in a background thread
+    and swaps it in once every worker has loaded its shard. Until then
+    ``score`` returns None and the caller scores serially, so no request waits
+    for worker processes to start.
+
+    Workers are started with ``forkserver`` by default: forking the web
+    process itself, which runs other threads, can copy locks held by them.
+    """
+
+    def __init__(self, shards, start_method='forkserver'):
+        self.shards = shards
+        self.start_method = start_method
+        self._executors = []
+        self._kb = None  # Snapshot the executors are loaded with
+        self._loading = None  # Snapshot a new pool is being loaded with
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def load(self, kb):
+        """Start loading the shards of kb into a new worker pool in the background"""
+        with self._lock:
+            if kb is self._kb or kb is self._loading:
+                return
+            self._loading = kb
+        threading.Thread(target=self._load_executors, args=(kb,), name='diagnosis-shard-loader',
+                         daemon=True).start()
+
+    def _load_executors(self, kb):
+        context = multiprocessing.get_context(self.start_method)
+        executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_load_shard, initargs=(payload,))
+            for payload in self._payloads(kb)
+        ]
+        try:
+            # Start the processes and have them load their shard before the pool is used
+            for future in [executor.submit(_ready) for executor in executors]:
+                future.result()
+        except Exception:
+            logger.exception('Could not start the diagnosis shard workers')
+            _shutdown(executors, cancel=True)
+            with self._lock:
+                if self._loading is kb:
+                    self._loading = None
+            return
+
+        with self._lock:
+            if self._loading is kb:
+                executors, self._executors = self._executors, executors
+                self._kb = kb
+                self._loading = None
+            # else a newer snapshot is being loaded, or the scorer was shut down
+        # Requests still scoring on the old pool finish their tasks
+        _shutdown(executors)
+
+    def _payloads(self, kb):
+        """Split kb into picklable per-shard payloads"""
+        diseases = kb.disease_order
+        shard_count = max(1, min(self.shards, len(diseases)))
+        block = -(-len(diseases) // shard_count)
+        symptom_ids_by_name = dict(kb.symptom_ids_by_name)
+
+        shard_of_disease = {}
+        payloads = []
+        for shard in range(shard_count):
+            members = diseases[shard * block:(shard + 1) * block]
+            for disease in members:
+                shard_of_disease[disease.id] = shard
+            payloads.append((
+                kb.version,
+                [(d.id, d.name, d.description, d.treatment) for d in members],
+                symptom_ids_by_name,
+                {d.id: kb.disease_symptom_ids[d.id] for d in members if d.id in kb.disease_symptom_ids},
+                []
+            ))
+
+        for position, rule in enumerate(kb.rules):
+            shard = shard_of_disease.get(rule.disease_id)
+            if shard is not None:
+                payloads[shard][4].append((position, rule.id, rule.disease_id, rule.confidence, rule.condition))
+        return payloads
+
+    def score(self, kb, selections):
+        """
+        Score symptom sets on all shards and merge the partial results
+
+        Returns:
+            One (rule_matches, symptom_matches) pair per symptom set, in the
+            same form and order as the serial ExpertSystem methods produce,
+            or None while the workers are not loaded with kb yet
+        """
+        with self._lock:
+            executors = self._executors if self._kb is kb else None
+        if executors is None:
+            self.load(kb)
+            return None
+        try:
+            futures = [executor.submit(_score_shard, selections) for executor in executors]
+            partials = [future.result() for future in futures]
+        except Exception:
+            with self._lock:
+                replaced = self._executors is not executors
+                if not replaced:
+                    self._executors = []
+                    self._kb = None
+            if replaced:
+                return None  # The pool was replaced (and shut down) meanwhile
+            # E.g. BrokenProcessPool after a worker was killed: the pool cannot
+            # be used again, so a new one is loaded
+            logger.exception('Diagnosis shard workers failed; scoring serially until they are restarted')
+            _shutdown(executors, cancel=True)
+            self.load(kb)
+            return None
+
+        scored = []
+        for item in range(len(selections)):
+            rule_hits = {}
+            symptom_matches = {}
+            for shard_result in partials:
+                shard_rules, shard_symptoms = shard_result[item]
+                rule_hits.update(shard_rules)
+                # Shards are contiguous blocks of disease order, so appending
+                # them in shard order keeps the serial order
+                for disease_id, (confidence, matched, total) in shard_symptoms.items():
+                    symptom_matches[disease_id] = {
+                        'disease': kb.diseases[disease_id],
+                        'confidence': confidence,
+                        'method': 'symptom-matching',
+                        'matched_symptoms_count': matched,
+                        'total_symptoms_count': total
+                    }
+
+            # Rule matches are ordered by the first rule that fired, as in the serial path
+            rule_matches = {}
+            for disease_id, (_, confidence) in sorted(rule_hits.items(), key=lambda hit: hit[1][0]):
+                rule_matches[disease_id] = {
+                    'disease': kb.diseases[disease_id],
+                    'confidence': confidence,
+                    'method': 'rule-based'
+                }
+            scored.append((rule_matches, symptom_matches))
+        return scored
+
+    def shutdown(self):
+        """Stop the worker processes (also called when the process exits)"""
+        with self._lock:
+            executors, self._executors = self._executors, []
+            self._kb = None
+            self._loading = None
+        _shutdown(executors, cancel=True)
+
+
+def _shutdown(executors, cancel=False):
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=cancel)
@@ -0,0 +1,189 @@
+"""Symptom Autocomplete - prefix index over symptom names in English and Khmer"""
+import logging
+import re
+import threading
+import time
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Most suggestions kept per prefix (and returned per request)
+MAX_SUGGESTIONS = 10
+
+_KHMER = re.compile('[\u1780-\u17ff\u19e0-\u19ff]')
+_WORD_START = re.compile(r'(?<!\w)\w')
+
+
+def normalize(text):
+    """Lowercase text with runs of whitespace made single spaces"""
+    return ' '.join(text.casefold().split())
+
+
+def _starts(name):
+    """
+    Offsets in a normalized name where a typed prefix may begin
+
+    Latin text matches at the start of each word. Khmer is written without
+    spaces between words, so it matches from any character.
+    """
+    if _KHMER.search(name):
+        return [i for i, char in enumerate(name) if not char.isspace()]
+    return [match.start() for match in _WORD_START.finditer(name)]
+
+
+class PrefixTrie:
+    """
+    Character trie where every node keeps its best suggestions precomputed,
+    so a lookup walks len(prefix) nodes and copies one short list.
+    """
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = ({}, [])
+
+    @classmethod
+    def build(cls, entries, limit=MAX_SUGGESTIONS):
+        """
+        Build a trie of ranked entries
+
+        Args:
+            entries: Iterable of (text, rank, value); lower rank is better.
+                Each text is reachable from every prefix of its word starts
+                (see _starts), and matches at the start of the text rank
+                before matches later in it.
+            limit: Suggestions kept per node
+        """
+        trie = cls()
+        best = {}  # id(node) -> {value: sort key}
+        nodes = {id(trie.root): trie.root}
+        for text, rank, value in entries:
+            for start in _starts(text):
+                key = (start > 0, rank)
+                node = trie.root
+                for char in text[start:]:
+                    children = node[0]
+                    if char not in children:
+                        children[char] = ({}, [])
+                        nodes[id(children[char])] = children[char]
+                    node = children[char]
+                    candidates = best.setdefault(id(node), {})
+                    if value not in candidates or key < candidates[value]:
+                        candidates[value] = key
+
+        for node_id, candidates in best.items():
+            ranked = sorted(candidates.items(), key=lambda item: item[1])
+            nodes[node_id][1].extend(value for value, _ in ranked[:limit])
+        return trie
+
+    def lookup(self, prefix, limit=MAX_SUGGESTIONS):
+        """Best values under prefix"""
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1][:limit]
+
+
+class SymptomAutocomplete:
+    """
+    Suggests symptoms for a typed prefix without querying the database.
+
+    The trie is built from the expert system's knowledge base snapshot, so it
+    follows the knowledge base version, plus the Khmer names from the
+    content translations. Symptoms are ranked by how often they were selected in
+    past diagnoses (the diagnosis rollups), then by the number of diseases
+    they point to, then by name length.
+
+    A new knowledge base snapshot makes the first request rebuild the trie
+    (one rebuild at a time; other requests wait for it). Once the trie is
+    more than max_age seconds old its ranking is refreshed in a background
+    thread, one refresh at a time, and requests keep using the old trie
+    meanwhile.
+    """
+
+    def __init__(self, expert_system, content_translations, diagnosis_rollups=None, max_age=3600):
+        self.expert_system = expert_system
+        self.content_translations = content_translations
+        self.diagnosis_rollups = diagnosis_rollups
+        self.max_age = max_age
+        # (snapshot, trie, symptom name by id, build time), replaced as a whole
+        # so concurrent requests always see a consistent set
+        self._state = None
+        self._lock = threading.Lock()
+        # Held while a background refresh runs
+        self._refresh_lock = threading.Lock()
+
+    def rebuild(self):
+        """Rebuild the trie from the current knowledge base (after symptoms are added or deleted)"""
+        with self._lock:
+            return self._build()
+
+    def _build(self):
+        kb = self.expert_system.get_snapshot()
+        symptom_km = self.content_translations.get('km').symptoms
+        popularity = self.diagnosis_rollups.symptom_popularity() if self.diagnosis_rollups is not None else {}
+        entries = []
+        for name, symptom_id in kb.symptom_ids_by_name.items():
+            column = kb.symptom_columns.get(symptom_id)
+            linked = len(kb.rows_by_column[column]) if column is not None else 0
+            rank = (-popularity.get(symptom_id, 0), -linked, len(name), name)
+            entries.append((normalize(name), rank, symptom_id))
+            if symptom_id in symptom_km:
+                entries.append((normalize(symptom_km[symptom_id]), rank, symptom_id))
+
+        state = (kb, PrefixTrie.build(entries), {symptom_id: name for name, symptom_id in
+                                                 kb.symptom_ids_by_name.items()}, time.monotonic())
+        self._state = state
+        return state
+
+    def _current_state(self):
+        state = self._state
+        kb = self.expert_system.get_snapshot()
+        if state is None or state[0] is not kb:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] is not self.expert_system.get_snapshot():
+                    state = self._build()
+        elif time.monotonic() - state[3] > self.max_age:
+            self._start_refresh()
+        return state
+
+    def _start_refresh(self):
+        """Refresh the ranking in a background thread, unless a refresh is already running"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=self._refresh, args=(current_app._get_current_object(),),
+                             name='symptom-autocomplete-refresh', daemon=True).start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+
+    def _refresh(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception:
+            logger.exception('Could not refresh the symptom autocomplete ranking')
+            # Keep the old ranking until max_age has passed again
+            with self._lock:
+                state = self._state
+                if state is not None:
+                    self._state = state[:3] + (time.monotonic(),)
+        finally:
+            self._refresh_lock.release()
+
+    def suggest(self, prefix, limit=MAX_SUGGESTIONS):
+        """
+        Symptoms whose English or Khmer name has a word starting with prefix
+
+        Returns:
+            Up to limit (symptom ID, English name) pairs, best first
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        _, trie, names, _ = self._current_state()
+        return [(symptom_id, names[symptom_id]) for symptom_id in trie.lookup(prefix, min(limit, MAX_SUGGESTIONS))]
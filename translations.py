@@ -1,469 +0,0 @@
-# Translation dictionaries for Khmer and English
-
-TRANSLATIONS = {
-    'en': {
-        # Navigation
-        'home': 'Home',
-        'diagnosis': 'Diagnosis',
-        'diseases': 'Diseases',
-        'login': 'Login',
-        'register': 'Register',
-        'logout': 'Logout',
-        'admin': 'Admin',
-        'dashboard': 'Dashboard',
-        'manage_diseases': 'Manage Diseases',
-        'manage_symptoms': 'Manage Symptoms',
-        'manage_users': 'Manage Users',
-        'welcome': 'Welcome',
-        'main_menu': 'Main Menu',
-        'user': 'User',
-        'view_website': 'View Website',
-        
-        # Welcome page
-        'welcome_title': 'Rice Disease Expert System',
-        'welcome_subtitle': 'An intelligent system to diagnose and provide treatment recommendations for rice diseases',
-        'already_have_account': 'Already have an account?',
-        'login_to_access': 'Login to access all features',
-        'new_to_system': 'New to the system?',
-        'create_free_account': 'Create a free account to get started',
-        'how_it_works': 'How It Works',
-        'step1': 'Register/Login: Create an account or login to access the system.',
-        'step2': 'Select Symptoms: Choose the symptoms you observe in your rice plants from the comprehensive list.',
-        'step3': 'Expert Analysis: Our expert system analyzes the symptoms using rule-based logic and pattern matching.',
-        'step4': 'Get Results: Receive diagnosis results with confidence scores and detailed treatment recommendations.',
-        'step5': 'Take Action: Follow the treatment recommendations to manage and prevent disease spread.',
-        'default_accounts': 'Default Test Accounts',
-        'admin_account': 'Admin',
-        'user_account': 'User',
-        
-        # Home page
-        'quick_diagnosis': 'Quick Diagnosis',
-        'quick_diagnosis_desc': 'Select symptoms observed in your rice plants and get instant diagnosis with confidence scores.',
-        'disease_database': 'Disease Database',
-        'disease_database_desc': 'Browse comprehensive information about various rice diseases, their symptoms, and treatments.',
-        'expert_system': 'Expert System',
-        'expert_system_desc': 'Powered by rule-based expert system and symptom matching algorithms for accurate diagnosis.',
-        'common_diseases': 'Common Rice Diseases',
-        'view_details': 'View Details',
-        'view_all_diseases': 'View All Diseases',
-        
-        # Login/Register
-        'username': 'Username',
-        'email': 'Email',
-        'password': 'Password',
-        'confirm_password': 'Confirm Password',
-        'role': 'Role',
-        'end_user': 'End User',
-        'admin_role': 'Admin',
-        'dont_have_account': "Don't have an account?",
-        'register_now': 'Register Now',
-        'have_account': 'Already have an account?',
-        'login_now': 'Login',
-        'all_fields_required': 'All fields are required.',
-        'passwords_not_match': 'Passwords do not match.',
-        'username_exists': 'Username already exists.',
-        'email_exists': 'Email already registered.',
-        'invalid_credentials': 'Invalid username or password.',
-        'registration_success': 'Registration successful! Welcome, {username}!',
-        'login_success': 'Welcome back, {username}!',
-        'logout_success': 'You have been logged out.',
-        
-        # Diagnosis
-        'disease_diagnosis': 'Disease Diagnosis',
-        'select_symptoms': 'Select all symptoms you observe in your rice plants',
-        'select_symptoms_title': 'Select Symptoms',
-        'diagnose_disease': 'Diagnose Disease',
-        'back_to_home': 'Back to Home',
-        'tips_accurate_diagnosis': 'Tips for Accurate Diagnosis',
-        'tip1': 'Select all symptoms you observe, even if they seem minor',
-        'tip2': 'Check multiple parts of the plant (leaves, stems, roots, grains)',
-        'tip3': 'Consider the stage of plant growth when symptoms appear',
-        'tip4': 'Note the pattern and distribution of symptoms across the field',
-        'please_select_symptom': 'Please select at least one symptom.',
-        
-        # Results
-        'diagnosis_results': 'Diagnosis Results',
-        'based_on_symptoms': 'Based on the symptoms you selected',
-        'selected_symptoms': 'Selected Symptoms',
-        'most_likely': 'Most Likely',
-        'confidence': 'Confidence',
-        'confidence_level': 'Confidence Level',
-        'treatment_recommendations': 'Treatment Recommendations',
-        'view_full_details': 'View Full Details',
-        'new_diagnosis': 'New Diagnosis',
-        'no_diagnosis_found': 'No Diagnosis Found',
-        'no_diagnosis_msg': 'No diseases matched the selected symptoms. Please try selecting different symptoms or consult with an agricultural expert.',
-        'try_again': 'Try Again',
-        'method': 'Method',
-        
-        # Diseases
-        'rice_diseases_database': 'Rice Diseases Database',
-        'comprehensive_info': 'Comprehensive information about rice diseases',
-        'description': 'Description',
-        'common_symptoms': 'Common Symptoms',
-        'treatment': 'Treatment',
-        'treatment_recommendations': 'Treatment Recommendations',
-        'start_diagnosis': 'Start Diagnosis',
-        'go_to_diagnosis': 'Go to Diagnosis',
-        'view_all': 'View All',
-        'back_to_diseases': 'Back to Diseases',
-        
-        # Admin
-        'admin_dashboard': 'Admin Dashboard',
-        'admin_only': 'Admin Only',
-        'total_diseases': 'Total Diseases',
-        'total_symptoms': 'Total Symptoms',
-        'total_users': 'Total Users',
-        'total_rules': 'Expert Rules',
-        'quick_actions': 'Quick Actions',
-        'add_new_disease': 'Add New Disease',
-        'add_new_symptom': 'Add New Symptom',
-        'system_information': 'System Information',
-        'welcome_admin': 'Welcome, {username}!',
-        'admin_capabilities': 'You have full administrative access to manage:',
-        'capability1': 'Diseases and their information',
-        'capability2': 'Symptoms database',
-        'capability3': 'User accounts and roles',
-        'capability4': 'Expert system rules',
-        'manage': 'Manage',
-        'add': 'Add',
-        'delete': 'Delete',
-        'view': 'View',
-        'id': 'ID',
-        'name': 'Name',
-        'actions': 'Actions',
-        'related_diseases': 'Related Diseases',
-        'symptoms_count': '{count} symptoms',
-        'diseases_count': '{count} diseases',
-        'cancel': 'Cancel',
-        'save': 'Save',
-        'disease_name': 'Disease Name',
-        'symptom_name': 'Symptom Name',
-        'enter_symptom_description': 'Enter a clear description of the symptom',
-        'add_disease': 'Add Disease',
-        'add_symptom': 'Add Symptom',
-        'back_to_dashboard': 'Back to Dashboard',
-        'created': 'Created',
-        'status': 'Status',
-        'active': 'Active',
-        'inactive': 'Inactive',
-        'add_new_user': 'Add New User',
-        
-        # General
-        'language': 'Language',
-        'english': 'English',
-        'khmer': 'Khmer',
-        'welcome_to_system': 'Welcome to Rice Disease Expert System',
-        'please_login_register': 'Please login or register to access the system',
-        'start_diagnosis': 'Start Diagnosis',
-        'learn_more': 'Learn More',
-        'select_symptoms': 'Select Symptoms',
-        'diagnose_disease': 'Diagnose Disease',
-        'tips': 'Tips for Accurate Diagnosis',
-        'selected_symptoms_title': 'Selected Symptoms',
-        'most_likely': 'Most Likely',
-        'confidence': 'Confidence',
-        'confidence_level': 'Confidence Level',
-        'treatment': 'Treatment',
-        'view_full_details': 'View Full Details',
-        'new_diagnosis': 'New Diagnosis',
-        'no_diagnosis_found': 'No Diagnosis Found',
-        'no_diagnosis_message': 'No diseases matched the selected symptoms. Please try selecting different symptoms or consult with an agricultural expert.',
-        'try_again': 'Try Again',
-        'back_to_home': 'Back to Home',
-        'back_to_diseases': 'Back to Diseases',
-        'symptoms': 'Symptoms',
-        'view_details': 'View Details',
-        'view_all_diseases': 'View All Diseases',
-        'how_it_works': 'How It Works',
-        'select_symptoms_step': 'Select Symptoms: Choose the symptoms you observe in your rice plants from the comprehensive list.',
-        'expert_analysis_step': 'Expert Analysis: Our expert system analyzes the symptoms using rule-based logic and pattern matching.',
-        'get_results_step': 'Get Results: Receive diagnosis results with confidence scores and detailed treatment recommendations.',
-        'take_action_step': 'Take Action: Follow the treatment recommendations to manage and prevent disease spread.',
-        'method': 'Method',
-        'based_on_symptoms': 'Based on the symptoms you selected',
-        'common_symptoms': 'Common Symptoms',
-        'treatment_recommendations': 'Treatment Recommendations',
-        'start_diagnosis_title': 'Start Diagnosis',
-        'use_expert_system': 'Use our expert system to diagnose this disease based on symptoms',
-        'go_to_diagnosis': 'Go to Diagnosis',
-        'view_all': 'View All',
-        'browse_complete_database': 'Browse the complete database of rice diseases',
-        'copyright': 'Rice Disease Expert System. Built with Flask & SQLAlchemy.',
-        'choose_unique_username': 'Choose a unique username',
-        'minimum_chars': 'Minimum 6 characters',
-    },
-    'km': {
-        # Navigation
-        'home': 'ទំព័រដើម',
-        'diagnosis': 'ការវិនិច្ឆ័យ',
-        'diseases': 'ជំងឺ',
-        'login': 'ចូល',
-        'register': 'ចុះឈ្មោះ',
-        'logout': 'ចេញ',
-        'admin': 'អ្នកគ្រប់គ្រង',
-        'dashboard': 'ផ្ទាំងគ្រប់គ្រង',
-        'manage_diseases': 'គ្រប់គ្រងជំងឺ',
-        'manage_symptoms': 'គ្រប់គ្រងរោគសញ្ញា',
-        'manage_users': 'គ្រប់គ្រងអ្នកប្រើ',
-        'welcome': 'សូមស្វាគមន៍',
-        'main_menu': 'បញ្ជីមេ',
-        'user': 'អ្នកប្រើប្រាស់',
-        'view_website': 'មើលគេហទំព័រ',
-        
-        # Welcome page
-        'welcome_title': 'ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ',
-        'welcome_subtitle': 'ប្រព័ន្ធឆ្លាតវៃសម្រាប់វិនិច្ឆ័យនិងផ្តល់អនុសាសន៍ព្យាបាលជំងឺស្រូវ',
-        'already_have_account': 'មានគណនីរួចហើយ?',
-        'login_to_access': 'ចូលដើម្បីចូលប្រើប្រាស់',
-        'new_to_system': 'ថ្មីនៅក្នុងប្រព័ន្ធ?',
-        'create_free_account': 'បង្កើតគណនីឥតគិតថ្លៃដើម្បីចាប់ផ្តើម',
-        'how_it_works': 'របៀបដំណើរការ',
-        'step1': 'ចុះឈ្មោះ/ចូល: បង្កើតគណនីឬចូលដើម្បីចូលប្រើប្រាស់ប្រព័ន្ធ។',
-        'step2': 'ជ្រើសរោគសញ្ញា: ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក។',
-        'step3': 'ការវិភាគអ្នកជំនាញ: ប្រព័ន្ធអ្នកជំនាញរបស់យើងវិភាគរោគសញ្ញាដោយប្រើប្រាស់តក្កវិជ្ជា។',
-        'step4': 'ទទួលលទ្ធផល: ទទួលលទ្ធផលវិនិច្ឆ័យជាមួយនឹងពិន្ទុជឿជាក់និងអនុសាសន៍ព្យាបាលលម្អិត។',
-        'step5': 'ធ្វើសកម្មភាព: ធ្វើតាមអនុសាសន៍ព្យាបាលដើម្បីគ្រប់គ្រងនិងការពារការរីករាលដាលនៃជំងឺ។',
-        'default_accounts': 'គណនីសាកល្បង',
-        'admin_account': 'អ្នកគ្រប់គ្រង',
-        'user_account': 'អ្នកប្រើ',
-        
-        # Home page
-        'quick_diagnosis': 'ការវិនិច្ឆ័យរហ័ស',
-        'quick_diagnosis_desc': 'ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នកនិងទទួលការវិនិច្ឆ័យភ្លាមៗជាមួយនឹងពិន្ទុជឿជាក់។',
-        'disease_database': 'មូលដ្ឋានទិន្នន័យជំងឺ',
-        'disease_database_desc': 'រុករកព័ត៌មានពេញលេញអំពីជំងឺស្រូវផ្សេងៗ, រោគសញ្ញា, និងការព្យាបាល។',
-        'expert_system': 'ប្រព័ន្ធអ្នកជំនាញ',
-        'expert_system_desc': 'ដំណើរការដោយប្រព័ន្ធអ្នកជំនាញផ្អែកលើច្បាប់និងក្បួនដោះស្រាយផ្គូផ្គងរោគសញ្ញាសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ។',
-        'common_diseases': 'ជំងឺស្រូវទូទៅ',
-        'view_details': 'មើលលម្អិត',
-        'view_all_diseases': 'មើលជំងឺទាំងអស់',
-        
-        # Login/Register
-        'username': 'ឈ្មោះអ្នកប្រើ',
-        'email': 'អ៊ីម៉ែល',
-        'password': 'ពាក្យសម្ងាត់',
-        'confirm_password': 'បញ្ជាក់ពាក្យសម្ងាត់',
-        'role': 'តួនាទី',
-        'end_user': 'អ្នកប្រើ',
-        'admin_role': 'អ្នកគ្រប់គ្រង',
-        'dont_have_account': 'មិនមានគណនី?',
-        'register_now': 'ចុះឈ្មោះឥឡូវ',
-        'have_account': 'មានគណនីរួចហើយ?',
-        'login_now': 'ចូល',
-        'all_fields_required': 'ត្រូវការទាំងអស់។',
-        'passwords_not_match': 'ពាក្យសម្ងាត់មិនដូចគ្នា។',
-        'username_exists': 'ឈ្មោះអ្នកប្រើមានរួចហើយ។',
-        'email_exists': 'អ៊ីម៉ែលបានចុះឈ្មោះរួចហើយ។',
-        'invalid_credentials': 'ឈ្មោះអ្នកប្រើឬពាក្យសម្ងាត់មិនត្រឹមត្រូវ។',
-        'registration_success': 'ចុះឈ្មោះជោគជ័យ! សូមស្វាគមន៍, {username}!',
-        'login_success': 'សូមស្វាគមន៍មកវិញ, {username}!',
-        'logout_success': 'អ្នកបានចេញហើយ។',
-        
-        # Diagnosis
-        'disease_diagnosis': 'ការវិនិច្ឆ័យជំងឺ',
-        'select_symptoms': 'ជ្រើសរោគសញ្ញាទាំងអស់ដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក',
-        'select_symptoms_title': 'ជ្រើសរោគសញ្ញា',
-        'diagnose_disease': 'វិនិច្ឆ័យជំងឺ',
-        'back_to_home': 'ត្រលប់ទៅទំព័រដើម',
-        'tips_accurate_diagnosis': 'ព័ត៌មានជំនួយសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ',
-        'tip1': 'ជ្រើសរោគសញ្ញាទាំងអស់ដែលអ្នកសង្កេតឃើញ, សូម្បីតែវាហាក់ដូចជាតូច',
-        'tip2': 'ពិនិត្យផ្នែកផ្សេងៗនៃដើមឈើ (ស្លឹក, ដើម, ឫស, គ្រាប់)',
-        'tip3': 'ពិចារណាដំណាក់កាលនៃការលូតលាស់រុក្ខជាតិនៅពេលរោគសញ្ញាលេចឡើង',
-        'tip4': 'កត់ត្រាគំរូនិងការចែកចាយរោគសញ្ញានៅទូទាំងវាល',
-        'please_select_symptom': 'សូមជ្រើសរោគសញ្ញាយ៉ាងហោចណាស់មួយ។',
-        
-        # Results
-        'diagnosis_results': 'លទ្ធផលការវិនិច្ឆ័យ',
-        'based_on_symptoms': 'ផ្អែកលើរោគសញ្ញាដែលអ្នកបានជ្រើស',
-        'selected_symptoms': 'រោគសញ្ញាដែលបានជ្រើស',
-        'most_likely': 'មានលទ្ធភាពខ្ពស់បំផុត',
-        'confidence': 'ជឿជាក់',
-        'confidence_level': 'កម្រិតជឿជាក់',
-        'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
-        'view_full_details': 'មើលលម្អិតពេញលេញ',
-        'new_diagnosis': 'ការវិនិច្ឆ័យថ្មី',
-        'no_diagnosis_found': 'រកមិនឃើញការវិនិច្ឆ័យ',
-        'no_diagnosis_msg': 'គ្មានជំងឺផ្គូផ្គងនឹងរោគសញ្ញាដែលបានជ្រើស។ សូមព្យាយាមជ្រើសរោគសញ្ញាផ្សេងៗឬពិគ្រោះជាមួយអ្នកជំនាញកសិកម្ម។',
-        'try_again': 'ព្យាយាមម្តងទៀត',
-        'method': 'វិធីសាស្ត្រ',
-        
-        # Diseases
-        'rice_diseases_database': 'មូលដ្ឋានទិន្នន័យជំងឺស្រូវ',
-        'comprehensive_info': 'ព័ត៌មានពេញលេញអំពីជំងឺស្រូវ',
-        'description': 'ការពិពណ៌នា',
-        'common_symptoms': 'រោគសញ្ញាទូទៅ',
-        'treatment': 'ការព្យាបាល',
-        'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
-        'start_diagnosis': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
-        'go_to_diagnosis': 'ទៅការវិនិច្ឆ័យ',
-        'view_all': 'មើលទាំងអស់',
-        'back_to_diseases': 'ត្រលប់ទៅជំងឺ',
-        
-        # Admin
-        'admin_dashboard': 'ផ្ទាំងគ្រប់គ្រង',
-        'admin_only': 'សម្រាប់អ្នកគ្រប់គ្រងតែប៉ុណ្ណោះ',
-        'total_diseases': 'ជំងឺសរុប',
-        'total_symptoms': 'រោគសញ្ញាសរុប',
-        'total_users': 'អ្នកប្រើសរុប',
-        'total_rules': 'ច្បាប់អ្នកជំនាញ',
-        'quick_actions': 'សកម្មភាពរហ័ស',
-        'add_new_disease': 'បន្ថែមជំងឺថ្មី',
-        'add_new_symptom': 'បន្ថែមរោគសញ្ញាថ្មី',
-        'system_information': 'ព័ត៌មានប្រព័ន្ធ',
-        'welcome_admin': 'សូមស្វាគមន៍, {username}!',
-        'admin_capabilities': 'អ្នកមានសិទ្ធិគ្រប់គ្រងពេញលេញដើម្បីគ្រប់គ្រង:',
-        'capability1': 'ជំងឺនិងព័ត៌មានរបស់ពួកគេ',
-        'capability2': 'មូលដ្ឋានទិន្នន័យរោគសញ្ញា',
-        'capability3': 'គណនីអ្នកប្រើនិងតួនាទី',
-        'capability4': 'ច្បាប់ប្រព័ន្ធអ្នកជំនាញ',
-        'manage': 'គ្រប់គ្រង',
-        'add': 'បន្ថែម',
-        'delete': 'លុប',
-        'view': 'មើល',
-        'id': 'លេខសម្គាល់',
-        'name': 'ឈ្មោះ',
-        'actions': 'សកម្មភាព',
-        'related_diseases': 'ជំងឺដែលពាក់ព័ន្ធ',
-        'symptoms_count': '{count} រោគសញ្ញា',
-        'diseases_count': '{count} ជំងឺ',
-        'cancel': 'បោះបង់',
-        'save': 'រក្សាទុក',
-        'disease_name': 'ឈ្មោះជំងឺ',
-        'symptom_name': 'ឈ្មោះរោគសញ្ញា',
-        'enter_symptom_description': 'បញ្ចូលការពិពណ៌នារោគសញ្ញាឱ្យច្បាស់',
-        'add_disease': 'បន្ថែមជំងឺ',
-        'add_symptom': 'បន្ថែមរោគសញ្ញា',
-        'back_to_dashboard': 'ត្រលប់ទៅផ្ទាំងគ្រប់គ្រង',
-        'created': 'បានបង្កើត',
-        'status': 'ស្ថានភាព',
-        'active': 'សកម្ម',
-        'inactive': 'អសកម្ម',
-        'access_denied': 'បានបដិសេធ។ ត្រូវការសិទ្ធិអ្នកគ្រប់គ្រង។',
-        'disease_exists': 'ជំងឺមានរួចហើយ។',
-        'disease_added': 'បានបន្ថែមជំងឺដោយជោគជ័យ!',
-        'disease_deleted': 'បានលុបជំងឺដោយជោគជ័យ!',
-        'symptom_name_required': 'ត្រូវការឈ្មោះរោគសញ្ញា។',
-        'symptom_exists': 'រោគសញ្ញាមានរួចហើយ។',
-        'symptom_added': 'បានបន្ថែមរោគសញ្ញាដោយជោគជ័យ!',
-        'symptom_deleted': 'បានលុបរោគសញ្ញាដោយជោគជ័យ!',
-        'add_new_user': 'បន្ថែមអ្នកប្រើថ្មី',
-        
-        # General
-        'language': 'ភាសា',
-        'english': 'អង់គ្លេស',
-        'khmer': 'ខ្មែរ',
-        'welcome_to_system': 'សូមស្វាគមន៍មកកាន់ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ',
-        'please_login_register': 'សូមចូលឬចុះឈ្មោះដើម្បីចូលប្រើប្រាស់ប្រព័ន្ធ',
-        'start_diagnosis': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
-        'learn_more': 'ស្វែងយល់បន្ថែម',
-        'select_symptoms': 'ជ្រើសរោគសញ្ញា',
-        'diagnose_disease': 'វិនិច្ឆ័យជំងឺ',
-        'tips': 'ព័ត៌មានជំនួយសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ',
-        'selected_symptoms_title': 'រោគសញ្ញាដែលបានជ្រើស',
-        'most_likely': 'មានលទ្ធភាពខ្ពស់បំផុត',
-        'confidence': 'ជឿជាក់',
-        'confidence_level': 'កម្រិតជឿជាក់',
-        'treatment': 'ការព្យាបាល',
-        'view_full_details': 'មើលលម្អិតពេញលេញ',
-        'new_diagnosis': 'ការវិនិច្ឆ័យថ្មី',
-        'no_diagnosis_found': 'រកមិនឃើញការវិនិច្ឆ័យ',
-        'no_diagnosis_message': 'គ្មានជំងឺផ្គូផ្គងនឹងរោគសញ្ញាដែលបានជ្រើស។ សូមព្យាយាមជ្រើសរោគសញ្ញាផ្សេងៗឬពិគ្រោះជាមួយអ្នកជំនាញកសិកម្ម។',
-        'try_again': 'ព្យាយាមម្តងទៀត',
-        'back_to_home': 'ត្រលប់ទៅទំព័រដើម',
-        'back_to_diseases': 'ត្រលប់ទៅជំងឺ',
-        'symptoms': 'រោគសញ្ញា',
-        'view_details': 'មើលលម្អិត',
-        'view_all_diseases': 'មើលជំងឺទាំងអស់',
-        'how_it_works': 'របៀបដំណើរការ',
-        'select_symptoms_step': 'ជ្រើសរោគសញ្ញា: ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក។',
-        'expert_analysis_step': 'ការវិភាគអ្នកជំនាញ: ប្រព័ន្ធអ្នកជំនាញរបស់យើងវិភាគរោគសញ្ញាដោយប្រើប្រាស់តក្កវិជ្ជា។',
-        'get_results_step': 'ទទួលលទ្ធផល: ទទួលលទ្ធផលវិនិច្ឆ័យជាមួយនឹងពិន្ទុជឿជាក់និងអនុសាសន៍ព្យាបាលលម្អិត។',
-        'take_action_step': 'ធ្វើសកម្មភាព: ធ្វើតាមអនុសាសន៍ព្យាបាលដើម្បីគ្រប់គ្រងនិងការពារការរីករាលដាលនៃជំងឺ។',
-        'method': 'វិធីសាស្ត្រ',
-        'based_on_symptoms': 'ផ្អែកលើរោគសញ្ញាដែលអ្នកបានជ្រើស',
-        'common_symptoms': 'រោគសញ្ញាទូទៅ',
-        'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
-        'start_diagnosis_title': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
-        'use_expert_system': 'ប្រើប្រាស់ប្រព័ន្ធអ្នកជំនាញរបស់យើងដើម្បីវិនិច្ឆ័យជំងឺនេះផ្អែកលើរោគសញ្ញា',
-        'go_to_diagnosis': 'ទៅការវិនិច្ឆ័យ',
-        'view_all': 'មើលទាំងអស់',
-        'browse_complete_database': 'រុករកមូលដ្ឋានទិន្នន័យជំងឺស្រូវពេញលេញ',
-        'copyright': 'ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ។ បានបង្កើតដោយ Flask & SQLAlchemy។',
-        'choose_unique_username': 'ជ្រើសឈ្មោះអ្នកប្រើតែមួយ',
-        'minimum_chars': 'យ៉ាងហោចណាស់ ៦ តួអក្សរ',
-    }
-}
-
-# Symptom translations (English -> Khmer)
-SYMPTOM_TRANSLATIONS = {
-    'km': {
-        'Brown spots on leaves': 'ចំណុចខ្មៅលើស្លឹក',
-        'Yellowing of leaves': 'ស្លឹកលឿង',
-        'White powdery growth': 'គ្រាប់ម្សៅស',
-        'Water-soaked lesions': 'រោគសញ្ញាទឹកជ្រាប',
-        'Dark brown lesions': 'រោគសញ្ញា ខ្មៅដិត',
-        'Leaf blight': 'ជំងឺស្លឹកដាច់',
-        'Stem rot': 'កោងដើម',
-        'Root rot': 'រលួយឫស',
-        'Grain discoloration': 'គ្រាប់ប្រែពណ៌',
-        'Stunted growth': 'លូតលាស់យឺត',
-        'Wilting': 'ស្លេកស្រួយ',
-        'Leaf spots with yellow halo': 'ស្នាមលើស្លឹកជាមួយវង់លឿង',
-        'Orange pustules': 'ចំណុចពពុះពណ៌ទឹកក្រូច',
-        'Black spots on grains': 'ចំណុចខ្មៅលើគ្រាប់',
-        'Leaf curling': 'ស្លឹកក្រវិល',
-    },
-    'en': {
-        # English stays the same; mapping retained for clarity
-    },
-}
-
-# Disease translations (English -> Khmer)
-DISEASE_TRANSLATIONS = {
-    'km': {
-        # Disease Names
-        'Brown Spot': 'ជំងឺចំនុចពណ៌ត្នោត',
-        'Blast Disease': 'ជំងឺអគ្គិភ័យ (Blast)',
-        'Sheath Blight': 'ជំងឺរលាកស្រោមស្លឹក',
-        'Bacterial Leaf Blight': 'ជំងឺបាក់តេរីរលាកស្លឹក',
-        'False Smut': 'ជំងឺស្ពោធខ្មៅ',
-        'Rice Rust': 'ជំងឺច្រែះស្រូវ',
-        'Powdery Mildew': 'ជំងឺផ្សិតសល្បាយម្សៅ',
-        'Root Rot': 'ជំងឺរលួយឫស',
-        
-        # Descriptions
-        'Caused by Bipolaris oryzae, affects leaves and grains': 'បង្កឡើងដោយមេរោគ Bipolaris oryzae ដែលប៉ះពាល់ដល់ស្លឹកនិងគ្រាប់ស្រូវ',
-        'Caused by Magnaporthe oryzae, most destructive rice disease': 'បង្កឡើងដោយមេរោគ Magnaporthe oryzae ដែលជាជំងឺស្រូវដែលបំផ្លាញខ្លាំងបំផុត',
-        'Caused by Rhizoctonia solani, affects sheaths and leaves': 'បង្កឡើងដោយមេរោគ Rhizoctonia solani ដែលប៉ះពាល់ដល់ស្រោមនិងស្លឹកស្រូវ',
-        'Caused by Xanthomonas oryzae, affects leaves': 'បង្កឡើងដោយមេរោគ Xanthomonas oryzae ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
-        'Caused by Ustilaginoidea virens, affects grains': 'បង្កឡើងដោយមេរោគ Ustilaginoidea virens ដែលប៉ះពាល់ដល់គ្រាប់ស្រូវ',
-        'Caused by Puccinia graminis, affects leaves': 'បង្កឡើងដោយមេរោគ Puccinia graminis ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
-        'Caused by Erysiphe graminis, affects leaves': 'បង្កឡើងដោយមេរោគ Erysiphe graminis ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
-        'Caused by various fungi, affects roots': 'បង្កឡើងដោយផ្សិតផ្សេងៗ ដែលប៉ះពាល់ដល់ឫសស្រូវ',
-        
-        # Treatment Recommendations
-        'Use resistant varieties, apply fungicides like propiconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, បាញ់ថ្នាំសម្លាប់ផ្សិតដូចជា propiconazole',
-        'Use resistant varieties, avoid excessive nitrogen, apply tricyclazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ជៀសវាងការប្រើជីអាសូតច្រើនពេក, បាញ់ថ្នាំ tricyclazole',
-        'Use resistant varieties, proper spacing, apply validamycin': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ដាំដុះក្នុងចន្លោះសមស្រប, បាញ់ថ្នាំ validamycin',
-        'Use resistant varieties, avoid overhead irrigation, apply copper-based bactericides': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ជៀសវាងការស្រោចស្រពពីលើ, ប្រើថ្នាំបាក់តេរីដែលមានមូលដ្ឋានពីទង់ដែង',
-        'Use resistant varieties, proper field drainage, apply propiconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, រៀបចំប្រព័ន្ធបង្ហូរទឹកឱ្យបានល្អ, បាញ់ថ្នាំ propiconazole',
-        'Use resistant varieties, apply fungicides like tebuconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, បាញ់ថ្នាំសម្លាប់ផ្សិតដូចជា tebuconazole',
-        'Use resistant varieties, improve air circulation, apply sulfur-based fungicides': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ធ្វើឱ្យខ្យល់ចេញចូលបានល្អ, បាញ់ថ្នាំផ្សិតដែលមានមូលដ្ឋានពីស៊ុលហ្វ័រ',
-        'Improve drainage, use healthy seeds, apply fungicides to soil': 'កែលម្អប្រព័ន្ធបង្ហូរទឹក, ប្រើប្រាស់គ្រាប់ពូជដែលមានសុខភាពល្អ, ដាក់ថ្នាំសម្លាប់ផ្សិតក្នុងដី',
-    },
-    'en': {}
-}
-
-
-def get_translation(key, lang='en', **kwargs):
-    """Get translation for a key in the specified language"""
-    translations = TRANSLATIONS.get(lang, TRANSLATIONS['en'])
-    text = translations.get(key, key)
-    if kwargs:
-        try:
-            return text.format(**kwargs)
-        except:
-            return text
-    return text
-
@@ -0,0 +1,51 @@
+"""
+Translations - interface messages and knowledge base names per language
+
+Each language is a module of this package (``en.py``, ``km.py``) with
+MESSAGES, SYMPTOMS and DISEASES dictionaries. A language is imported and
+compiled into a Catalog the first time it is used, so startup does not
+depend on how many languages there are. English is the reference: other
+languages are checked against it and fall back to it for missing messages.
+
+SYMPTOMS and DISEASES only seed the knowledge base translations, which are
+stored by disease and symptom id in the database and served by
+services.content_translations.
+"""
+import importlib
+import logging
+import threading
+from translations.catalog import Catalog
+
+LANGUAGES = ('en', 'km')
+DEFAULT_LANGUAGE = 'en'
+
+logger = logging.getLogger(__name__)
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def get_catalog(lang):
+    """Compiled catalog of a language (the default language for unknown codes)"""
+    catalog = _catalogs.get(lang)
+    if catalog is not None:
+        return catalog
+    if lang not in LANGUAGES:
+        return get_catalog(DEFAULT_LANGUAGE)
+
+    reference = get_catalog(DEFAULT_LANGUAGE) if lang != DEFAULT_LANGUAGE else None
+    with _lock:
+        catalog = _catalogs.get(lang)
+        if catalog is None:
+            module = importlib.import_module(f'{__name__}.{lang}')
+            catalog = Catalog(lang, module.MESSAGES, getattr(module, 'SYMPTOMS', None),
+                              getattr(module, 'DISEASES', None), reference)
+            for problem in catalog.problems:
+                logger.warning('Translation catalog: %s', problem)
+            _catalogs[lang] = catalog
+    return catalog
+
+
+def get_translation(key, lang='en', **kwargs):
+    """Get translation for a key in the specified language"""
+    return get_catalog(lang).gettext(key, **kwargs)
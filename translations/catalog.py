@@ -0,0 +1,98 @@
+"""Translation catalogs - one language's messages compiled once for fast lookups"""
+from string import Formatter
+
+_formatter = Formatter()
+
+
+def _placeholders(text):
+    """
+    Names of the {placeholders} in a message
+
+    Returns:
+        frozenset of names (empty for a message with only escaped braces),
+        or None if the message has no braces and never needs formatting
+
+    Raises:
+        ValueError: If the message is not a valid format string or has
+            positional placeholders
+    """
+    if '{' not in text and '}' not in text:
+        return None
+    names = set()
+    for _, name, _, _ in _formatter.parse(text):
+        if name is None:
+            continue
+        if not name or name[0].isdigit():
+            raise ValueError('positional placeholder')
+        names.add(name.split('.')[0].split('[')[0])
+    return frozenset(names)
+
+
+class Catalog:
+    """
+    Interface messages of one language.
+
+    Messages are checked when the catalog is built rather than on every
+    lookup: keys missing from this language use the reference (English)
+    text, and every message's placeholders are parsed once, so ``gettext``
+    only has to look the key up and, if it has placeholders, format it.
+    What the check found is kept in ``problems``.
+    """
+
+    def __init__(self, lang, messages, symptoms=None, diseases=None, reference=None):
+        self.lang = lang
+        self.symptoms = dict(symptoms or {})
+        self.diseases = dict(diseases or {})
+        self.problems = []
+        self._texts = {}
+        self._placeholders = {}
+
+        for key, text in messages.items():
+            self._add(key, text)
+        if reference is not None:
+            for key in reference._texts.keys() - messages.keys():
+                self.problems.append(f'{lang}: "{key}" is missing (using the {reference.lang} text)')
+                self._texts[key] = reference._texts[key]
+                self._placeholders[key] = reference._placeholders.get(key)
+            for key in messages.keys() - reference._texts.keys():
+                self.problems.append(f'{lang}: "{key}" is not in the {reference.lang} catalog')
+            for key in messages.keys() & reference._texts.keys():
+                expected = reference._placeholders.get(key) or frozenset()
+                found = self._placeholders.get(key) or frozenset()
+                if found != expected:
+                    self.problems.append(f'{lang}: "{key}" has placeholders {sorted(found)}, '
+                                         f'the {reference.lang} text {sorted(expected)}')
+        self.problems.sort()
+
+        # Shared by every template render of this language; the content
+        # translations add tsym and tdis (see services.content_translations)
+        self.template_globals = {
+            't': self.gettext,
+            'current_lang': lang
+        }
+
+    def _add(self, key, text):
+        self._texts[key] = text
+        try:
+            self._placeholders[key] = _placeholders(text)
+        except ValueError as e:
+            # Shown as written, never formatted
+            self.problems.append(f'{self.lang}: "{key}" is not a valid message template ({e})')
+            self._placeholders[key] = None
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def gettext(self, key, **kwargs):
+        """
+        Message for key with its placeholders filled from kwargs
+
+        Unknown keys give the key itself; a message whose placeholders are
+        not all given is returned unformatted.
+        """
+        text = self._texts.get(key, key)
+        if kwargs:
+            names = self._placeholders.get(key)
+            if names is not None and names <= kwargs.keys():
+                return text.format_map(kwargs)
+        return text
@@ -0,0 +1,252 @@
+"""English catalog - the reference language every other catalog is checked against"""
+
+# Interface messages; {name} placeholders are filled in by get_translation
+MESSAGES = {
+    # Navigation
+    'home': 'Home',
+    'diagnosis': 'Diagnosis',
+    'diseases': 'Diseases',
+    'login': 'Login',
+    'register': 'Register',
+    'logout': 'Logout',
+    'admin': 'Admin',
+    'dashboard': 'Dashboard',
+    'manage_diseases': 'Manage Diseases',
+    'manage_symptoms': 'Manage Symptoms',
+    'manage_users': 'Manage Users',
+    'welcome': 'Welcome',
+    'main_menu': 'Main Menu',
+    'user': 'User',
+    'view_website': 'View Website',
+    
+    # Welcome page
+    'welcome_title': 'Rice Disease Expert System',
+    'welcome_subtitle': 'An intelligent system to diagnose and provide treatment recommendations for rice diseases',
+    'already_have_account': 'Already have an account?',
+    'login_to_access': 'Login to access all features',
+    'new_to_system': 'New to the system?',
+    'create_free_account': 'Create a free account to get started',
+    'how_it_works': 'How It Works',
+    'step1': 'Register/Login: Create an account or login to access the system.',
+    'step2': 'Select Symptoms: Choose the symptoms you observe in your rice plants from the comprehensive list.',
+    'step3': 'Expert Analysis: Our expert system analyzes the symptoms using rule-based logic and pattern matching.',
+    'step4': 'Get Results: Receive diagnosis results with confidence scores and detailed treatment recommendations.',
+    'step5': 'Take Action: Follow the treatment recommendations to manage and prevent disease spread.',
+    'default_accounts': 'Default Test Accounts',
+    'admin_account': 'Admin',
+    'user_account': 'User',
+    
+    # Home page
+    'quick_diagnosis': 'Quick Diagnosis',
+    'quick_diagnosis_desc': 'Select symptoms observed in your rice plants and get instant diagnosis with confidence scores.',
+    'disease_database': 'Disease Database',
+    'disease_database_desc': 'Browse comprehensive information about various rice diseases, their symptoms, and treatments.',
+    'expert_system': 'Expert System',
+    'expert_system_desc': 'Powered by rule-based expert system and symptom matching algorithms for accurate diagnosis.',
+    'common_diseases': 'Common Rice Diseases',
+    'view_details': 'View Details',
+    'view_all_diseases': 'View All Diseases',
+    
+    # Login/Register
+    'username': 'Username',
+    'email': 'Email',
+    'password': 'Password',
+    'confirm_password': 'Confirm Password',
+    'role': 'Role',
+    'end_user': 'End User',
+    'admin_role': 'Admin',
+    'dont_have_account': "Don't have an account?",
+    'register_now': 'Register Now',
+    'have_account': 'Already have an account?',
+    'login_now': 'Login',
+    'all_fields_required': 'All fields are required.',
+    'passwords_not_match': 'Passwords do not match.',
+    'username_exists': 'Username already exists.',
+    'email_exists': 'Email already registered.',
+    'invalid_credentials': 'Invalid username or password.',
+    'registration_success': 'Registration successful! Welcome, {username}!',
+    'login_success': 'Welcome back, {username}!',
+    'logout_success': 'You have been logged out.',
+    
+    # Diagnosis
+    'disease_diagnosis': 'Disease Diagnosis',
+    'select_symptoms': 'Select all symptoms you observe in your rice plants',
+    'select_symptoms_title': 'Select Symptoms',
+    'diagnose_disease': 'Diagnose Disease',
+    'back_to_home': 'Back to Home',
+    'tips_accurate_diagnosis': 'Tips for Accurate Diagnosis',
+    'tip1': 'Select all symptoms you observe, even if they seem minor',
+    'tip2': 'Check multiple parts of the plant (leaves, stems, roots, grains)',
+    'tip3': 'Consider the stage of plant growth when symptoms appear',
+    'tip4': 'Note the pattern and distribution of symptoms across the field',
+    'please_select_symptom': 'Please select at least one symptom.',
+    
+    # Results
+    'diagnosis_results': 'Diagnosis Results',
+    'based_on_symptoms': 'Based on the symptoms you selected',
+    'selected_symptoms': 'Selected Symptoms',
+    'most_likely': 'Most Likely',
+    'confidence': 'Confidence',
+    'confidence_level': 'Confidence Level',
+    'treatment_recommendations': 'Treatment Recommendations',
+    'view_full_details': 'View Full Details',
+    'new_diagnosis': 'New Diagnosis',
+    'no_diagnosis_found': 'No Diagnosis Found',
+    'no_diagnosis_msg': 'No diseases matched the selected symptoms. Please try selecting different symptoms or consult with an agricultural expert.',
+    'try_again': 'Try Again',
+    'method': 'Method',
+    
+    # Diseases
+    'rice_diseases_database': 'Rice Diseases Database',
+    'comprehensive_info': 'Comprehensive information about rice diseases',
+    'description': 'Description',
+    'common_symptoms': 'Common Symptoms',
+    'treatment': 'Treatment',
+    'treatment_recommendations': 'Treatment Recommendations',
+    'start_diagnosis': 'Start Diagnosis',
+    'go_to_diagnosis': 'Go to Diagnosis',
+    'view_all': 'View All',
+    'back_to_diseases': 'Back to Diseases',
+    
+    # Admin
+    'admin_dashboard': 'Admin Dashboard',
+    'admin_only': 'Admin Only',
+    'total_diseases': 'Total Diseases',
+    'total_symptoms': 'Total Symptoms',
+    'total_users': 'Total Users',
+    'total_rules': 'Expert Rules',
+    'quick_actions': 'Quick Actions',
+    'add_new_disease': 'Add New Disease',
+    'add_new_symptom': 'Add New Symptom',
+    'system_information': 'System Information',
+    'welcome_admin': 'Welcome, {username}!',
+    'admin_capabilities': 'You have full administrative access to manage:',
+    'capability1': 'Diseases and their information',
+    'capability2': 'Symptoms database',
+    'capability3': 'User accounts and roles',
+    'capability4': 'Expert system rules',
+    'diagnosis_cache': 'Diagnosis Cache',
+    'cache_entries': 'Entries',
+    'cache_hits': 'Hits',
+    'cache_misses': 'Misses',
+    'cache_evictions': 'Evictions',
+    'cache_hit_rate': 'Hit Rate',
+    'diagnosis_trends': 'Diagnosis Trends (last {days} days)',
+    'total_diagnoses': 'Diagnoses',
+    'average_confidence': 'Average Confidence',
+    'diagnoses_per_day': 'Diagnoses per Day',
+    'top_diagnosed_diseases': 'Most Diagnosed Diseases',
+    'common_symptom_pairs': 'Symptoms Most Often Selected Together',
+    'no_diagnoses_yet': 'No diagnoses have been recorded in this period.',
+    'knowledge_base': 'Knowledge Base',
+    'export_knowledge_base': 'Export',
+    'import_knowledge_base': 'Import',
+    'export_help': 'Download all symptoms, diseases, disease-symptom links and rules. Items refer to each other by name, so the file can be imported into another installation.',
+    'import_help': 'Upload a JSON Lines or CSV file in the export format. Symptoms and diseases must come before the links and rules that use them. Existing items are matched by name and updated; invalid lines are skipped.',
+    'import_file': 'File',
+    'import': 'Import',
+    'import_file_required': 'Please choose a file to import.',
+    'kb_imported': 'Read {records} records: {created} created, {updated} updated, {errors} skipped.',
+    'import_error_line': 'Line {line}: {error}',
+    'search_by_name': 'Search by name',
+    'search_users': 'Search by username or email',
+    'sort_by': 'Sort by',
+    'sort_order': 'Sort order',
+    'ascending': 'Ascending',
+    'descending': 'Descending',
+    'default_order': 'Default',
+    'all_roles': 'All roles',
+    'apply': 'Apply',
+    'no_results': 'Nothing matches these filters.',
+    'pagination': 'Pages',
+    'previous_page': 'Previous',
+    'next_page': 'Next',
+    'search': 'Search',
+    'search_help': 'Find diseases and symptoms by name, description or treatment, in English or Khmer.',
+    'search_placeholder': 'e.g. brown spots, blast, ស្លឹកលឿង',
+    'symptom_of': 'Symptom of',
+    'no_search_results': 'Nothing found for "{query}".',
+    'find_symptom': 'Type to find a symptom...',
+    'manage': 'Manage',
+    'add': 'Add',
+    'delete': 'Delete',
+    'view': 'View',
+    'id': 'ID',
+    'name': 'Name',
+    'actions': 'Actions',
+    'related_diseases': 'Related Diseases',
+    'symptoms_count': '{count} symptoms',
+    'diseases_count': '{count} diseases',
+    'cancel': 'Cancel',
+    'save': 'Save',
+    'disease_name': 'Disease Name',
+    'symptom_name': 'Symptom Name',
+    'enter_symptom_description': 'Enter a clear description of the symptom',
+    'khmer_translation': 'Khmer translation',
+    'khmer_translation_help': 'Optional. Left empty, the English text is shown in Khmer.',
+    'add_disease': 'Add Disease',
+    'add_symptom': 'Add Symptom',
+    'back_to_dashboard': 'Back to Dashboard',
+    'created': 'Created',
+    'status': 'Status',
+    'active': 'Active',
+    'inactive': 'Inactive',
+    'access_denied': 'Access denied. Admin privileges required.',
+    'disease_exists': 'Disease already exists.',
+    'disease_added': 'Disease added successfully!',
+    'disease_deleted': 'Disease deleted successfully!',
+    'symptom_name_required': 'Symptom name is required.',
+    'symptom_exists': 'Symptom already exists.',
+    'symptom_added': 'Symptom added successfully!',
+    'symptom_deleted': 'Symptom deleted successfully!',
+    'add_new_user': 'Add New User',
+    
+    # General
+    'language': 'Language',
+    'english': 'English',
+    'khmer': 'Khmer',
+    'welcome_to_system': 'Welcome to Rice Disease Expert System',
+    'please_login_register': 'Please login or register to access the system',
+    'start_diagnosis': 'Start Diagnosis',
+    'learn_more': 'Learn More',
+    'select_symptoms': 'Select Symptoms',
+    'diagnose_disease': 'Diagnose Disease',
+    'tips': 'Tips for Accurate Diagnosis',
+    'selected_symptoms_title': 'Selected Symptoms',
+    'most_likely': 'Most Likely',
+    'confidence': 'Confidence',
+    'confidence_level': 'Confidence Level',
+    'treatment': 'Treatment',
+    'view_full_details': 'View Full Details',
+    'new_diagnosis': 'New Diagnosis',
+    'no_diagnosis_found': 'No Diagnosis Found',
+    'no_diagnosis_message': 'No diseases matched the selected symptoms. Please try selecting different symptoms or consult with an agricultural expert.',
+    'try_again': 'Try Again',
+    'back_to_home': 'Back to Home',
+    'back_to_diseases': 'Back to Diseases',
+    'symptoms': 'Symptoms',
+    'view_details': 'View Details',
+    'view_all_diseases': 'View All Diseases',
+    'how_it_works': 'How It Works',
+    'select_symptoms_step': 'Select Symptoms: Choose the symptoms you observe in your rice plants from the comprehensive list.',
+    'expert_analysis_step': 'Expert Analysis: Our expert system analyzes the symptoms using rule-based logic and pattern matching.',
+    'get_results_step': 'Get Results: Receive diagnosis results with confidence scores and detailed treatment recommendations.',
+    'take_action_step': 'Take Action: Follow the treatment recommendations to manage and prevent disease spread.',
+    'method': 'Method',
+    'based_on_symptoms': 'Based on the symptoms you selected',
+    'common_symptoms': 'Common Symptoms',
+    'treatment_recommendations': 'Treatment Recommendations',
+    'start_diagnosis_title': 'Start Diagnosis',
+    'use_expert_system': 'Use our expert system to diagnose this disease based on symptoms',
+    'go_to_diagnosis': 'Go to Diagnosis',
+    'view_all': 'View All',
+    'browse_complete_database': 'Browse the complete database of rice diseases',
+    'copyright': 'Rice Disease Expert System. Built with Flask & SQLAlchemy.',
+    'choose_unique_username': 'Choose a unique username',
+    'minimum_chars': 'Minimum 6 characters',
+}
+
+# Knowledge base names and texts are stored in English, so they need no translation
+SYMPTOMS = {}
+
+DISEASES = {}
@@ -0,0 +1,303 @@
+"""Khmer catalog"""
+
+# Interface messages, with the same keys and placeholders as en.MESSAGES
+MESSAGES = {
+    # Navigation
+    'home': 'ទំព័រដើម',
+    'diagnosis': 'ការវិនិច្ឆ័យ',
+    'diseases': 'ជំងឺ',
+    'login': 'ចូល',
+    'register': 'ចុះឈ្មោះ',
+    'logout': 'ចេញ',
+    'admin': 'អ្នកគ្រប់គ្រង',
+    'dashboard': 'ផ្ទាំងគ្រប់គ្រង',
+    'manage_diseases': 'គ្រប់គ្រងជំងឺ',
+    'manage_symptoms': 'គ្រប់គ្រងរោគសញ្ញា',
+    'manage_users': 'គ្រប់គ្រងអ្នកប្រើ',
+    'welcome': 'សូមស្វាគមន៍',
+    'main_menu': 'បញ្ជីមេ',
+    'user': 'អ្នកប្រើប្រាស់',
+    'view_website': 'មើលគេហទំព័រ',
+    
+    # Welcome page
+    'welcome_title': 'ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ',
+    'welcome_subtitle': 'ប្រព័ន្ធឆ្លាតវៃសម្រាប់វិនិច្ឆ័យនិងផ្តល់អនុសាសន៍ព្យាបាលជំងឺស្រូវ',
+    'already_have_account': 'មានគណនីរួចហើយ?',
+    'login_to_access': 'ចូលដើម្បីចូលប្រើប្រាស់',
+    'new_to_system': 'ថ្មីនៅក្នុងប្រព័ន្ធ?',
+    'create_free_account': 'បង្កើតគណនីឥតគិតថ្លៃដើម្បីចាប់ផ្តើម',
+    'how_it_works': 'របៀបដំណើរការ',
+    'step1': 'ចុះឈ្មោះ/ចូល: បង្កើតគណនីឬចូលដើម្បីចូលប្រើប្រាស់ប្រព័ន្ធ។',
+    'step2': 'ជ្រើសរោគសញ្ញា: ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក។',
+    'step3': 'ការវិភាគអ្នកជំនាញ: ប្រព័ន្ធអ្នកជំនាញរបស់យើងវិភាគរោគសញ្ញាដោយប្រើប្រាស់តក្កវិជ្ជា។',
+    'step4': 'ទទួលលទ្ធផល: ទទួលលទ្ធផលវិនិច្ឆ័យជាមួយនឹងពិន្ទុជឿជាក់និងអនុសាសន៍ព្យាបាលលម្អិត។',
+    'step5': 'ធ្វើសកម្មភាព: ធ្វើតាមអនុសាសន៍ព្យាបាលដើម្បីគ្រប់គ្រងនិងការពារការរីករាលដាលនៃជំងឺ។',
+    'default_accounts': 'គណនីសាកល្បង',
+    'admin_account': 'អ្នកគ្រប់គ្រង',
+    'user_account': 'អ្នកប្រើ',
+    
+    # Home page
+    'quick_diagnosis': 'ការវិនិច្ឆ័យរហ័ស',
+    'quick_diagnosis_desc': 'ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នកនិងទទួលការវិនិច្ឆ័យភ្លាមៗជាមួយនឹងពិន្ទុជឿជាក់។',
+    'disease_database': 'មូលដ្ឋានទិន្នន័យជំងឺ',
+    'disease_database_desc': 'រុករកព័ត៌មានពេញលេញអំពីជំងឺស្រូវផ្សេងៗ, រោគសញ្ញា, និងការព្យាបាល។',
+    'expert_system': 'ប្រព័ន្ធអ្នកជំនាញ',
+    'expert_system_desc': 'ដំណើរការដោយប្រព័ន្ធអ្នកជំនាញផ្អែកលើច្បាប់និងក្បួនដោះស្រាយផ្គូផ្គងរោគសញ្ញាសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ។',
+    'common_diseases': 'ជំងឺស្រូវទូទៅ',
+    'view_details': 'មើលលម្អិត',
+    'view_all_diseases': 'មើលជំងឺទាំងអស់',
+    
+    # Login/Register
+    'username': 'ឈ្មោះអ្នកប្រើ',
+    'email': 'អ៊ីម៉ែល',
+    'password': 'ពាក្យសម្ងាត់',
+    'confirm_password': 'បញ្ជាក់ពាក្យសម្ងាត់',
+    'role': 'តួនាទី',
+    'end_user': 'អ្នកប្រើ',
+    'admin_role': 'អ្នកគ្រប់គ្រង',
+    'dont_have_account': 'មិនមានគណនី?',
+    'register_now': 'ចុះឈ្មោះឥឡូវ',
+    'have_account': 'មានគណនីរួចហើយ?',
+    'login_now': 'ចូល',
+    'all_fields_required': 'ត្រូវការទាំងអស់។',
+    'passwords_not_match': 'ពាក្យសម្ងាត់មិនដូចគ្នា។',
+    'username_exists': 'ឈ្មោះអ្នកប្រើមានរួចហើយ។',
+    'email_exists': 'អ៊ីម៉ែលបានចុះឈ្មោះរួចហើយ។',
+    'invalid_credentials': 'ឈ្មោះអ្នកប្រើឬពាក្យសម្ងាត់មិនត្រឹមត្រូវ។',
+    'registration_success': 'ចុះឈ្មោះជោគជ័យ! សូមស្វាគមន៍, {username}!',
+    'login_success': 'សូមស្វាគមន៍មកវិញ, {username}!',
+    'logout_success': 'អ្នកបានចេញហើយ។',
+    
+    # Diagnosis
+    'disease_diagnosis': 'ការវិនិច្ឆ័យជំងឺ',
+    'select_symptoms': 'ជ្រើសរោគសញ្ញាទាំងអស់ដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក',
+    'select_symptoms_title': 'ជ្រើសរោគសញ្ញា',
+    'diagnose_disease': 'វិនិច្ឆ័យជំងឺ',
+    'back_to_home': 'ត្រលប់ទៅទំព័រដើម',
+    'tips_accurate_diagnosis': 'ព័ត៌មានជំនួយសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ',
+    'tip1': 'ជ្រើសរោគសញ្ញាទាំងអស់ដែលអ្នកសង្កេតឃើញ, សូម្បីតែវាហាក់ដូចជាតូច',
+    'tip2': 'ពិនិត្យផ្នែកផ្សេងៗនៃដើមឈើ (ស្លឹក, ដើម, ឫស, គ្រាប់)',
+    'tip3': 'ពិចារណាដំណាក់កាលនៃការលូតលាស់រុក្ខជាតិនៅពេលរោគសញ្ញាលេចឡើង',
+    'tip4': 'កត់ត្រាគំរូនិងការចែកចាយរោគសញ្ញានៅទូទាំងវាល',
+    'please_select_symptom': 'សូមជ្រើសរោគសញ្ញាយ៉ាងហោចណាស់មួយ។',
+    
+    # Results
+    'diagnosis_results': 'លទ្ធផលការវិនិច្ឆ័យ',
+    'based_on_symptoms': 'ផ្អែកលើរោគសញ្ញាដែលអ្នកបានជ្រើស',
+    'selected_symptoms': 'រោគសញ្ញាដែលបានជ្រើស',
+    'most_likely': 'មានលទ្ធភាពខ្ពស់បំផុត',
+    'confidence': 'ជឿជាក់',
+    'confidence_level': 'កម្រិតជឿជាក់',
+    'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
+    'view_full_details': 'មើលលម្អិតពេញលេញ',
+    'new_diagnosis': 'ការវិនិច្ឆ័យថ្មី',
+    'no_diagnosis_found': 'រកមិនឃើញការវិនិច្ឆ័យ',
+    'no_diagnosis_msg': 'គ្មានជំងឺផ្គូផ្គងនឹងរោគសញ្ញាដែលបានជ្រើស។ សូមព្យាយាមជ្រើសរោគសញ្ញាផ្សេងៗឬពិគ្រោះជាមួយអ្នកជំនាញកសិកម្ម។',
+    'try_again': 'ព្យាយាមម្តងទៀត',
+    'method': 'វិធីសាស្ត្រ',
+    
+    # Diseases
+    'rice_diseases_database': 'មូលដ្ឋានទិន្នន័យជំងឺស្រូវ',
+    'comprehensive_info': 'ព័ត៌មានពេញលេញអំពីជំងឺស្រូវ',
+    'description': 'ការពិពណ៌នា',
+    'common_symptoms': 'រោគសញ្ញាទូទៅ',
+    'treatment': 'ការព្យាបាល',
+    'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
+    'start_diagnosis': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
+    'go_to_diagnosis': 'ទៅការវិនិច្ឆ័យ',
+    'view_all': 'មើលទាំងអស់',
+    'back_to_diseases': 'ត្រលប់ទៅជំងឺ',
+    
+    # Admin
+    'admin_dashboard': 'ផ្ទាំងគ្រប់គ្រង',
+    'admin_only': 'សម្រាប់អ្នកគ្រប់គ្រងតែប៉ុណ្ណោះ',
+    'total_diseases': 'ជំងឺសរុប',
+    'total_symptoms': 'រោគសញ្ញាសរុប',
+    'total_users': 'អ្នកប្រើសរុប',
+    'total_rules': 'ច្បាប់អ្នកជំនាញ',
+    'quick_actions': 'សកម្មភាពរហ័ស',
+    'add_new_disease': 'បន្ថែមជំងឺថ្មី',
+    'add_new_symptom': 'បន្ថែមរោគសញ្ញាថ្មី',
+    'system_information': 'ព័ត៌មានប្រព័ន្ធ',
+    'welcome_admin': 'សូមស្វាគមន៍, {username}!',
+    'admin_capabilities': 'អ្នកមានសិទ្ធិគ្រប់គ្រងពេញលេញដើម្បីគ្រប់គ្រង:',
+    'capability1': 'ជំងឺនិងព័ត៌មានរបស់ពួកគេ',
+    'capability2': 'មូលដ្ឋានទិន្នន័យរោគសញ្ញា',
+    'capability3': 'គណនីអ្នកប្រើនិងតួនាទី',
+    'capability4': 'ច្បាប់ប្រព័ន្ធអ្នកជំនាញ',
+    'diagnosis_cache': 'ឃ្លាំងសម្ងាត់រោគវិនិច្ឆ័យ',
+    'cache_entries': 'ធាតុ',
+    'cache_hits': 'ត្រូវ',
+    'cache_misses': 'ខកខាន',
+    'cache_evictions': 'ការបណ្តេញចេញ',
+    'cache_hit_rate': 'អត្រាត្រូវ',
+    'diagnosis_trends': 'និន្នាការរោគវិនិច្ឆ័យ ({days} ថ្ងៃចុងក្រោយ)',
+    'total_diagnoses': 'រោគវិនិច្ឆ័យ',
+    'average_confidence': 'ទំនុកចិត្តជាមធ្យម',
+    'diagnoses_per_day': 'រោគវិនិច្ឆ័យក្នុងមួយថ្ងៃ',
+    'top_diagnosed_diseases': 'ជំងឺដែលត្រូវបានវិនិច្ឆ័យញឹកញាប់បំផុត',
+    'common_symptom_pairs': 'រោគសញ្ញាដែលត្រូវបានជ្រើសរើសជាមួយគ្នាញឹកញាប់បំផុត',
+    'no_diagnoses_yet': 'មិនទាន់មានរោគវិនិច្ឆ័យត្រូវបានកត់ត្រាក្នុងរយៈពេលនេះទេ។',
+    'knowledge_base': 'មូលដ្ឋានចំណេះដឹង',
+    'export_knowledge_base': 'នាំចេញ',
+    'import_knowledge_base': 'នាំចូល',
+    'export_help': 'ទាញយករោគសញ្ញា ជំងឺ ទំនាក់ទំនងជំងឺ-រោគសញ្ញា និងច្បាប់ទាំងអស់។ ធាតុនីមួយៗយោងគ្នាតាមឈ្មោះ ដូច្នេះឯកសារអាចនាំចូលទៅក្នុងការដំឡើងផ្សេងទៀតបាន។',
+    'import_help': 'ផ្ទុកឡើងឯកសារ JSON Lines ឬ CSV ក្នុងទម្រង់នាំចេញ។ រោគសញ្ញា និងជំងឺត្រូវតែនៅមុនទំនាក់ទំនង និងច្បាប់ដែលប្រើវា។ ធាតុដែលមានស្រាប់ត្រូវបានផ្គូផ្គងតាមឈ្មោះ និងធ្វើបច្ចុប្បន្នភាព។ បន្ទាត់មិនត្រឹមត្រូវត្រូវបានរំលង។',
+    'import_file': 'ឯកសារ',
+    'import': 'នាំចូល',
+    'import_file_required': 'សូមជ្រើសរើសឯកសារដើម្បីនាំចូល។',
+    'kb_imported': 'បានអាន {records} កំណត់ត្រា៖ បង្កើត {created} ធ្វើបច្ចុប្បន្នភាព {updated} រំលង {errors}។',
+    'import_error_line': 'បន្ទាត់ {line}: {error}',
+    'search_by_name': 'ស្វែងរកតាមឈ្មោះ',
+    'search_users': 'ស្វែងរកតាមឈ្មោះអ្នកប្រើ ឬអ៊ីមែល',
+    'sort_by': 'តម្រៀបតាម',
+    'sort_order': 'លំដាប់តម្រៀប',
+    'ascending': 'ឡើង',
+    'descending': 'ចុះ',
+    'default_order': 'លំនាំដើម',
+    'all_roles': 'តួនាទីទាំងអស់',
+    'apply': 'អនុវត្ត',
+    'no_results': 'គ្មានអ្វីត្រូវនឹងតម្រងទាំងនេះទេ។',
+    'pagination': 'ទំព័រ',
+    'previous_page': 'មុន',
+    'next_page': 'បន្ទាប់',
+    'search': 'ស្វែងរក',
+    'search_help': 'ស្វែងរកជំងឺ និងរោគសញ្ញាតាមឈ្មោះ ការពិពណ៌នា ឬការព្យាបាល ជាភាសាអង់គ្លេស ឬខ្មែរ។',
+    'search_placeholder': 'ឧ. ស្លឹកលឿង, brown spots',
+    'symptom_of': 'រោគសញ្ញានៃ',
+    'no_search_results': 'រកមិនឃើញអ្វីសម្រាប់ "{query}"។',
+    'find_symptom': 'វាយដើម្បីស្វែងរករោគសញ្ញា...',
+    'manage': 'គ្រប់គ្រង',
+    'add': 'បន្ថែម',
+    'delete': 'លុប',
+    'view': 'មើល',
+    'id': 'លេខសម្គាល់',
+    'name': 'ឈ្មោះ',
+    'actions': 'សកម្មភាព',
+    'related_diseases': 'ជំងឺដែលពាក់ព័ន្ធ',
+    'symptoms_count': '{count} រោគសញ្ញា',
+    'diseases_count': '{count} ជំងឺ',
+    'cancel': 'បោះបង់',
+    'save': 'រក្សាទុក',
+    'disease_name': 'ឈ្មោះជំងឺ',
+    'symptom_name': 'ឈ្មោះរោគសញ្ញា',
+    'enter_symptom_description': 'បញ្ចូលការពិពណ៌នារោគសញ្ញាឱ្យច្បាស់',
+    'khmer_translation': 'ការបកប្រែជាភាសាខ្មែរ',
+    'khmer_translation_help': 'មិនចាំបាច់។ បើទុកទទេ អត្ថបទភាសាអង់គ្លេសនឹងត្រូវបង្ហាញជំនួស។',
+    'add_disease': 'បន្ថែមជំងឺ',
+    'add_symptom': 'បន្ថែមរោគសញ្ញា',
+    'back_to_dashboard': 'ត្រលប់ទៅផ្ទាំងគ្រប់គ្រង',
+    'created': 'បានបង្កើត',
+    'status': 'ស្ថានភាព',
+    'active': 'សកម្ម',
+    'inactive': 'អសកម្ម',
+    'access_denied': 'បានបដិសេធ។ ត្រូវការសិទ្ធិអ្នកគ្រប់គ្រង។',
+    'disease_exists': 'ជំងឺមានរួចហើយ។',
+    'disease_added': 'បានបន្ថែមជំងឺដោយជោគជ័យ!',
+    'disease_deleted': 'បានលុបជំងឺដោយជោគជ័យ!',
+    'symptom_name_required': 'ត្រូវការឈ្មោះរោគសញ្ញា។',
+    'symptom_exists': 'រោគសញ្ញាមានរួចហើយ។',
+    'symptom_added': 'បានបន្ថែមរោគសញ្ញាដោយជោគជ័យ!',
+    'symptom_deleted': 'បានលុបរោគសញ្ញាដោយជោគជ័យ!',
+    'add_new_user': 'បន្ថែមអ្នកប្រើថ្មី',
+    
+    # General
+    'language': 'ភាសា',
+    'english': 'អង់គ្លេស',
+    'khmer': 'ខ្មែរ',
+    'welcome_to_system': 'សូមស្វាគមន៍មកកាន់ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ',
+    'please_login_register': 'សូមចូលឬចុះឈ្មោះដើម្បីចូលប្រើប្រាស់ប្រព័ន្ធ',
+    'start_diagnosis': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
+    'learn_more': 'ស្វែងយល់បន្ថែម',
+    'select_symptoms': 'ជ្រើសរោគសញ្ញា',
+    'diagnose_disease': 'វិនិច្ឆ័យជំងឺ',
+    'tips': 'ព័ត៌មានជំនួយសម្រាប់ការវិនិច្ឆ័យត្រឹមត្រូវ',
+    'selected_symptoms_title': 'រោគសញ្ញាដែលបានជ្រើស',
+    'most_likely': 'មានលទ្ធភាពខ្ពស់បំផុត',
+    'confidence': 'ជឿជាក់',
+    'confidence_level': 'កម្រិតជឿជាក់',
+    'treatment': 'ការព្យាបាល',
+    'view_full_details': 'មើលលម្អិតពេញលេញ',
+    'new_diagnosis': 'ការវិនិច្ឆ័យថ្មី',
+    'no_diagnosis_found': 'រកមិនឃើញការវិនិច្ឆ័យ',
+    'no_diagnosis_message': 'គ្មានជំងឺផ្គូផ្គងនឹងរោគសញ្ញាដែលបានជ្រើស។ សូមព្យាយាមជ្រើសរោគសញ្ញាផ្សេងៗឬពិគ្រោះជាមួយអ្នកជំនាញកសិកម្ម។',
+    'try_again': 'ព្យាយាមម្តងទៀត',
+    'back_to_home': 'ត្រលប់ទៅទំព័រដើម',
+    'back_to_diseases': 'ត្រលប់ទៅជំងឺ',
+    'symptoms': 'រោគសញ្ញា',
+    'view_details': 'មើលលម្អិត',
+    'view_all_diseases': 'មើលជំងឺទាំងអស់',
+    'how_it_works': 'របៀបដំណើរការ',
+    'select_symptoms_step': 'ជ្រើសរោគសញ្ញា: ជ្រើសរោគសញ្ញាដែលអ្នកសង្កេតឃើញនៅក្នុងដើមស្រូវរបស់អ្នក។',
+    'expert_analysis_step': 'ការវិភាគអ្នកជំនាញ: ប្រព័ន្ធអ្នកជំនាញរបស់យើងវិភាគរោគសញ្ញាដោយប្រើប្រាស់តក្កវិជ្ជា។',
+    'get_results_step': 'ទទួលលទ្ធផល: ទទួលលទ្ធផលវិនិច្ឆ័យជាមួយនឹងពិន្ទុជឿជាក់និងអនុសាសន៍ព្យាបាលលម្អិត។',
+    'take_action_step': 'ធ្វើសកម្មភាព: ធ្វើតាមអនុសាសន៍ព្យាបាលដើម្បីគ្រប់គ្រងនិងការពារការរីករាលដាលនៃជំងឺ។',
+    'method': 'វិធីសាស្ត្រ',
+    'based_on_symptoms': 'ផ្អែកលើរោគសញ្ញាដែលអ្នកបានជ្រើស',
+    'common_symptoms': 'រោគសញ្ញាទូទៅ',
+    'treatment_recommendations': 'អនុសាសន៍ព្យាបាល',
+    'start_diagnosis_title': 'ចាប់ផ្តើមការវិនិច្ឆ័យ',
+    'use_expert_system': 'ប្រើប្រាស់ប្រព័ន្ធអ្នកជំនាញរបស់យើងដើម្បីវិនិច្ឆ័យជំងឺនេះផ្អែកលើរោគសញ្ញា',
+    'go_to_diagnosis': 'ទៅការវិនិច្ឆ័យ',
+    'view_all': 'មើលទាំងអស់',
+    'browse_complete_database': 'រុករកមូលដ្ឋានទិន្នន័យជំងឺស្រូវពេញលេញ',
+    'copyright': 'ប្រព័ន្ធអ្នកជំនាញជំងឺស្រូវ។ បានបង្កើតដោយ Flask & SQLAlchemy។',
+    'choose_unique_username': 'ជ្រើសឈ្មោះអ្នកប្រើតែមួយ',
+    'minimum_chars': 'យ៉ាងហោចណាស់ ៦ តួអក្សរ',
+}
+
+# Seed translations of the knowledge base, matched by the English text. They are
+# copied into the database by id (see migrations.copy_catalog_translations),
+# which is where the pages read them from.
+
+# Symptom names (English -> Khmer)
+SYMPTOMS = {
+    'Brown spots on leaves': 'ចំណុចខ្មៅលើស្លឹក',
+    'Yellowing of leaves': 'ស្លឹកលឿង',
+    'White powdery growth': 'គ្រាប់ម្សៅស',
+    'Water-soaked lesions': 'រោគសញ្ញាទឹកជ្រាប',
+    'Dark brown lesions': 'រោគសញ្ញា ខ្មៅដិត',
+    'Leaf blight': 'ជំងឺស្លឹកដាច់',
+    'Stem rot': 'កោងដើម',
+    'Root rot': 'រលួយឫស',
+    'Grain discoloration': 'គ្រាប់ប្រែពណ៌',
+    'Stunted growth': 'លូតលាស់យឺត',
+    'Wilting': 'ស្លេកស្រួយ',
+    'Leaf spots with yellow halo': 'ស្នាមលើស្លឹកជាមួយវង់លឿង',
+    'Orange pustules': 'ចំណុចពពុះពណ៌ទឹកក្រូច',
+    'Black spots on grains': 'ចំណុចខ្មៅលើគ្រាប់',
+    'Leaf curling': 'ស្លឹកក្រវិល',
+}
+
+# Disease names, descriptions and treatments (English -> Khmer)
+DISEASES = {
+    # Disease Names
+    'Brown Spot': 'ជំងឺចំនុចពណ៌ត្នោត',
+    'Blast Disease': 'ជំងឺអគ្គិភ័យ (Blast)',
+    'Sheath Blight': 'ជំងឺរលាកស្រោមស្លឹក',
+    'Bacterial Leaf Blight': 'ជំងឺបាក់តេរីរលាកស្លឹក',
+    'False Smut': 'ជំងឺស្ពោធខ្មៅ',
+    'Rice Rust': 'ជំងឺច្រែះស្រូវ',
+    'Powdery Mildew': 'ជំងឺផ្សិតសល្បាយម្សៅ',
+    'Root Rot': 'ជំងឺរលួយឫស',
+    
+    # Descriptions
+    'Caused by Bipolaris oryzae, affects leaves and grains': 'បង្កឡើងដោយមេរោគ Bipolaris oryzae ដែលប៉ះពាល់ដល់ស្លឹកនិងគ្រាប់ស្រូវ',
+    'Caused by Magnaporthe oryzae, most destructive rice disease': 'បង្កឡើងដោយមេរោគ Magnaporthe oryzae ដែលជាជំងឺស្រូវដែលបំផ្លាញខ្លាំងបំផុត',
+    'Caused by Rhizoctonia solani, affects sheaths and leaves': 'បង្កឡើងដោយមេរោគ Rhizoctonia solani ដែលប៉ះពាល់ដល់ស្រោមនិងស្លឹកស្រូវ',
+    'Caused by Xanthomonas oryzae, affects leaves': 'បង្កឡើងដោយមេរោគ Xanthomonas oryzae ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
+    'Caused by Ustilaginoidea virens, affects grains': 'បង្កឡើងដោយមេរោគ Ustilaginoidea virens ដែលប៉ះពាល់ដល់គ្រាប់ស្រូវ',
+    'Caused by Puccinia graminis, affects leaves': 'បង្កឡើងដោយមេរោគ Puccinia graminis ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
+    'Caused by Erysiphe graminis, affects leaves': 'បង្កឡើងដោយមេរោគ Erysiphe graminis ដែលប៉ះពាល់ដល់ស្លឹកស្រូវ',
+    'Caused by various fungi, affects roots': 'បង្កឡើងដោយផ្សិតផ្សេងៗ ដែលប៉ះពាល់ដល់ឫសស្រូវ',
+    
+    # Treatment Recommendations
+    'Use resistant varieties, apply fungicides like propiconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, បាញ់ថ្នាំសម្លាប់ផ្សិតដូចជា propiconazole',
+    'Use resistant varieties, avoid excessive nitrogen, apply tricyclazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ជៀសវាងការប្រើជីអាសូតច្រើនពេក, បាញ់ថ្នាំ tricyclazole',
+    'Use resistant varieties, proper spacing, apply validamycin': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ដាំដុះក្នុងចន្លោះសមស្រប, បាញ់ថ្នាំ validamycin',
+    'Use resistant varieties, avoid overhead irrigation, apply copper-based bactericides': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ជៀសវាងការស្រោចស្រពពីលើ, ប្រើថ្នាំបាក់តេរីដែលមានមូលដ្ឋានពីទង់ដែង',
+    'Use resistant varieties, proper field drainage, apply propiconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, រៀបចំប្រព័ន្ធបង្ហូរទឹកឱ្យបានល្អ, បាញ់ថ្នាំ propiconazole',
+    'Use resistant varieties, apply fungicides like tebuconazole': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, បាញ់ថ្នាំសម្លាប់ផ្សិតដូចជា tebuconazole',
+    'Use resistant varieties, improve air circulation, apply sulfur-based fungicides': 'ប្រើប្រាស់ពូជដែលធន់នឹងជំងឺ, ធ្វើឱ្យខ្យល់ចេញចូលបានល្អ, បាញ់ថ្នាំផ្សិតដែលមានមូលដ្ឋានពីស៊ុលហ្វ័រ',
+    'Improve drainage, use healthy seeds, apply fungicides to soil': 'កែលម្អប្រព័ន្ធបង្ហូរទឹក, ប្រើប្រាស់គ្រាប់ពូជដែលមានសុខភាពល្អ, ដាក់ថ្នាំសម្លាប់ផ្សិតក្នុងដី',
+}
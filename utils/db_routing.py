@@ -0,0 +1,102 @@
+"""Read-replica routing - sends the reads of read-only requests to a replica database"""
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+# Key in the user's session holding the time of their last write
+_LAST_WRITE_KEY = '_db_last_write'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends queries to the replica engine while a read-only
+    request is being handled.
+
+    Only queries that would go to the default (primary) engine are routed;
+    flushes, models with their own bind and work outside a request are left
+    alone. Once the session writes (a flush, or an INSERT, UPDATE or DELETE
+    statement run with ``execute``), the rest of the request uses the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and not self._flushing and _reads_from_replica():
+            engines = self._db.engines
+            if REPLICA_BIND in engines and engine is engines.get(None):
+                return engines[REPLICA_BIND]
+        return engine
+
+
+def _reads_from_replica():
+    """Whether the current request may read from the replica"""
+    return has_request_context() and g.get('db_use_replica', False) and not g.get('db_force_primary', False)
+
+
+def _remember_write():
+    if has_request_context():
+        g.db_wrote = True
+        g.db_use_replica = False
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_flush(db_session, flush_context):
+    _remember_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _remember_statement_write(orm_execute_state):
+    # Runs before the statement's bind is chosen, so the write itself goes to the primary
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _remember_write()
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. for data that is cached afterwards"""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_force_primary', False)
+    g.db_force_primary = True
+    try:
+        yield
+    finally:
+        g.db_force_primary = previous
+
+
+def init_replica_routing(app):
+    """
+    Add the replica bind and decide per request where reads go
+
+    Must run before ``db.init_app``. GET/HEAD/OPTIONS requests read from the
+    replica unless their blueprint is in REPLICA_PRIMARY_BLUEPRINTS or the
+    user wrote something less than REPLICA_READ_AFTER_WRITE_WINDOW seconds
+    ago, so users see their own changes even if the replica lags.
+    """
+    uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if not uri:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[REPLICA_BIND] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+    primary_blueprints = frozenset(app.config.get('REPLICA_PRIMARY_BLUEPRINTS', ()))
+    window = app.config.get('REPLICA_READ_AFTER_WRITE_WINDOW', 0)
+
+    @app.before_request
+    def route_reads():
+        last_write = session.get(_LAST_WRITE_KEY)
+        g.db_use_replica = (request.method in READ_METHODS
+                            and request.blueprint not in primary_blueprints
+                            and not (last_write and time.time() - last_write < window))
+
+    @app.after_request
+    def remember_write(response):
+        if g.get('db_wrote'):
+            session[_LAST_WRITE_KEY] = time.time()
+        return response
@@ -1,5 +1,6 @@
 """Helper functions"""
-from flask import session
+from flask import current_app, session
+from translations import LANGUAGES
 
 def get_language():
     """Get current language from session, default to English"""
@@ -7,30 +8,24 @@ def get_language():
 
 def set_language(lang):
     """Set language in session"""
-    if lang in ['en', 'km']:
+    if lang in LANGUAGES:
         session['language'] = lang
 
-def translate_symptom(symptom_name, lang):
+def get_content(lang=None):
+    """Disease and symptom texts of a language (the session's language by default)"""
+    return current_app.extensions['content_translations'].get(lang or get_language())
+
+def translate_symptom(symptom_id, name, lang):
     """
-    Translate symptom name based on selected language.
-    Falls back to the original name if no translation is found.
+    Translate a symptom name based on selected language.
+    Falls back to the stored (English) name if there is no translation.
     """
-    from translations import SYMPTOM_TRANSLATIONS
-    if not symptom_name:
-        return ''
-    if lang == 'km':
-        return SYMPTOM_TRANSLATIONS.get('km', {}).get(symptom_name, symptom_name)
-    return symptom_name
+    return get_content(lang).symptom_name(symptom_id, name)
 
-def translate_disease(text, lang):
+def translate_disease(disease_id, text, lang, field='name'):
     """
-    Translate disease name, description or treatment based on selected language.
-    Falls back to the original text if no translation is found.
+    Translate a disease's name, description or treatment (field) based on
+    selected language. Falls back to the stored (English) text.
     """
-    from translations import DISEASE_TRANSLATIONS
-    if not text:
-        return ''
-    if lang == 'km':
-        return DISEASE_TRANSLATIONS.get('km', {}).get(text, text)
-    return text
+    return get_content(lang).disease_text(disease_id, field, text)
 
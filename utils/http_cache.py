@@ -0,0 +1,67 @@
+"""HTTP conditional responses for pages that only change with the knowledge base"""
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, make_response, request, session
+from utils.helpers import get_language
+from utils.kb_version import kb_version
+
+# Sent with knowledge base pages: they show the logged-in user, so shared
+# caches must not keep them, and browsers revalidate them on every visit
+# (a cheap 304 while the knowledge base is unchanged)
+CACHE_CONTROL = 'private, no-cache'
+
+
+def init_http_cache(app):
+    """
+    Stamp the app's templates and translations, which the ETags include so
+    a deployment that changes how pages look does not answer 304
+    """
+    latest = 0
+    for folder in (os.path.join(app.root_path, app.template_folder), os.path.join(app.root_path, 'translations')):
+        for root, _, files in os.walk(folder):
+            for name in files:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    app.extensions['http_cache_release'] = str(latest)
+
+
+def kb_page_etag():
+    """
+    Strong ETag of a knowledge base page as the current user would get it
+
+    Built from the URL, the knowledge base version, the language, the
+    logged-in user (pages show the username) and the release stamp, without
+    any query.
+    None when the page has to be rendered anyway: no user in the session,
+    or flashed messages waiting to be shown.
+    """
+    user_id = session.get('_user_id')
+    if user_id is None or session.get('_flashes'):
+        return None
+    stamp = (f"{request.full_path}:{kb_version.current}:{get_language()}:{user_id}:"
+             f"{current_app.extensions.get('http_cache_release')}")
+    return hashlib.sha256(stamp.encode()).hexdigest()[:32]
+
+
+def kb_page(f):
+    """
+    Decorator for GET views whose output only changes with the knowledge base:
+    answers a matching ``If-None-Match`` with 304 before the view (and its login check
+    and queries) runs, and sets the ETag and Cache-Control of full responses.
+    Put it above ``login_required``.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        etag = kb_page_etag()
+        if etag is not None and request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if etag is not None:
+                response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return decorated_function
@@ -0,0 +1,58 @@
+"""Knowledge base version stamp shared by all worker processes"""
+import os
+import threading
+import uuid
+
+
+class KnowledgeBaseVersion:
+    """
+    Version stamp that changes whenever the knowledge base is modified.
+
+    The stamp lives in a small file in the instance folder so every gunicorn
+    worker on the host sees a bump made by any other worker. Reading it costs
+    one ``os.stat`` call; the file is only re-read when it has been replaced.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._key = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Set the stamp file location from app config and create it if missing"""
+        self.path = app.config.get('KB_VERSION_FILE') or os.path.join(app.instance_path, 'kb_version')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if not os.path.exists(self.path):
+            self.bump()
+
+    @property
+    def current(self):
+        """Current version stamp"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.bump()
+            st = os.stat(self.path)
+
+        # A bump replaces the file, so the inode changes even when the
+        # filesystem's mtime resolution is too coarse to notice
+        key = (st.st_ino, st.st_mtime_ns)
+        if key != self._key:
+            with open(self.path) as f:
+                value = f.read().strip()
+            with self._lock:
+                self._key, self._value = key, value
+        return self._value
+
+    def bump(self):
+        """Give the knowledge base a new version stamp"""
+        value = uuid.uuid4().hex
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(value)
+        os.replace(tmp_path, self.path)
+        return value
+
+
+kb_version = KnowledgeBaseVersion()
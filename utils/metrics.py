@@ -0,0 +1,161 @@
+"""Request, SQL and diagnosis metrics in the Prometheus text format"""
+import bisect
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ENGINE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Histogram with fixed buckets, one series per label set"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Lines of the Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = ','.join(labels + [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            label_text = ','.join(labels)
+            suffix = f'{{{label_text}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+def _escape(value):
+    """Escape a label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process.
+
+    Holds histograms plus collector callbacks that report current values
+    (such as cache counters) when the metrics are rendered. Each gunicorn
+    worker has its own registry.
+    """
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'Request latency by endpoint',
+            ('endpoint', 'method', 'status'), LATENCY_BUCKETS)
+        self.request_queries = Histogram(
+            'http_request_sql_queries', 'SQL statements executed per request',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.request_sql_time = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent in SQL per request',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.engine_time = Histogram(
+            'expert_system_duration_seconds', 'Time spent inside ExpertSystem methods',
+            ('method',), ENGINE_BUCKETS)
+        self._collectors = {}
+
+    def register_collector(self, key, collector):
+        """
+        Add (or replace) a callback returning (name, type, help, samples)
+        tuples with current values to include in the output, where samples
+        maps a tuple of (label, value) pairs to a number
+        """
+        self._collectors[key] = collector
+
+    def timed(self, method):
+        """Decorator recording how long a function takes under the given method label"""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.engine_time.observe(time.perf_counter() - start, method=method)
+            return wrapper
+        return decorator
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in (self.request_latency, self.request_queries, self.request_sql_time, self.engine_time):
+            lines.extend(histogram.render())
+        for collector in self._collectors.values():
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples.items():
+                    label_text = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                    lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+# The start time is kept on the statement's execution context, which is
+# dropped with it, so a statement that raises leaves nothing behind on the
+# pooled connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start', None)
+    if started is not None and has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += time.perf_counter() - started
+
+
+def init_metrics(app):
+    """Install request timing and SQL statement counting"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_start' in g:
+            endpoint = request.endpoint or 'unmatched'
+            metrics.request_latency.observe(time.perf_counter() - g.request_start, endpoint=endpoint,
+                                            method=request.method, status=response.status_code)
+            metrics.request_queries.observe(g.sql_count, endpoint=endpoint)
+            metrics.request_sql_time.observe(g.sql_time, endpoint=endpoint)
+        return response
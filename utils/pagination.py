@@ -0,0 +1,147 @@
+"""Keyset pagination - pages of sorted, filtered lists whose cost does not grow with the table"""
+import base64
+import json
+from flask import request, url_for
+from sqlalchemy import tuple_
+
+# Largest page a client may ask for with ?per_page=
+MAX_PER_PAGE = 100
+
+
+def encode_cursor(key):
+    """Opaque URL-safe cursor for a row's sort key (a list of JSON values)"""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _accepts(python_type, value):
+    """Whether a cursor value fits a column of python_type (never a list, dict, bool or null)"""
+    if isinstance(value, bool):
+        return False
+    if python_type is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, python_type)
+
+
+def decode_cursor(cursor, types):
+    """
+    Sort key of a cursor made by encode_cursor
+
+    Args:
+        cursor: Cursor from the request
+        types: Python type of each sort column (int, str, ...)
+
+    Returns:
+        List of one value per type, or None if the cursor is missing or
+        malformed (including values of the wrong type)
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(key, list) or len(key) != len(types):
+        return None
+    if not all(_accepts(python_type, value) for python_type, value in zip(types, key)):
+        return None
+    return key
+
+
+class KeysetPage:
+    """One page of a keyset-paginated list, with cursors for the pages around it"""
+
+    def __init__(self, items, sort, order, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.sort = sort
+        self.order = order
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def url(self, **changes):
+        """
+        URL of the current view with the current filters and sort, changed by
+        ``changes`` (None removes an argument); the page cursor is dropped
+        unless it is one of the changes
+        """
+        args = {key: value for key, value in request.args.items() if key not in ('after', 'before')}
+        args.update(changes)
+        args = {key: value for key, value in args.items() if value not in (None, '')}
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        return self.url(after=self.next_cursor) if self.next_cursor else None
+
+    @property
+    def prev_url(self):
+        return self.url(before=self.prev_cursor) if self.prev_cursor else None
+
+
+def paginate(query, sorts, id_column, default_sort='id', per_page=25):
+    """
+    Fetch one page of query, sorted and positioned by the request arguments
+
+    Rows are ordered by (sort column, id) and a page starts right after (or,
+    going back, right before) the key in its cursor, so the database reads
+    one page from the matching index however far into the list it is,
+    instead of skipping OFFSET rows. Request arguments:
+    ``sort`` (a key of sorts), ``order`` (asc/desc), ``after`` / ``before``
+    (cursors from the previous page) and ``per_page``.
+
+    Args:
+        query: Filtered query of the listed model (without ORDER BY or LIMIT)
+        sorts: Dictionary of sort name -> column (text or number); the columns
+            should be indexed
+        id_column: Unique column breaking ties between equal sort values
+        default_sort: Sort used when the request names none (or an unknown one)
+        per_page: Default page size
+
+    Returns:
+        KeysetPage
+    """
+    sort = request.args.get('sort', default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    per_page = min(max(request.args.get('per_page', per_page, type=int), 1), MAX_PER_PAGE)
+
+    sort_column = sorts[sort]
+    columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    key_of = (lambda row: [getattr(row, column.key) for column in columns])
+
+    backward = bool(request.args.get('before'))
+    cursor = decode_cursor(request.args.get('before') if backward else request.args.get('after'),
+                           [column.type.python_type for column in columns])
+    if cursor is None:
+        backward = False
+
+    # Going back reads the rows before the cursor in reverse and flips them
+    descending = (order == 'desc') != backward
+    if cursor is not None:
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        value = tuple_(*cursor) if len(columns) > 1 else cursor[0]
+        query = query.filter(key < value if descending else key > value)
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    page = KeysetPage(rows, sort, order, per_page)
+    if rows:
+        first, last = encode_cursor(key_of(rows[0])), encode_cursor(key_of(rows[-1]))
+        page.next_cursor = last if has_more or backward else None
+        page.prev_cursor = first if (has_more if backward else cursor is not None) else None
+    elif cursor is not None:
+        # Ran off the end (rows were deleted): offer the way back
+        page.prev_cursor = None if backward else request.args.get('after')
+    return page
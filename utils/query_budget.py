@@ -0,0 +1,60 @@
+"""Per-endpoint SQL query budgets that catch N+1 query regressions"""
+from flask import g, request
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more SQL statements than its endpoint's budget"""
+
+
+def query_budget(max_queries):
+    """
+    Decorator setting the maximum number of SQL statements a view may run,
+    including the one that loads the logged-in user (None: no limit, for
+    views whose work grows with their input, such as bulk imports)
+    """
+    def decorator(f):
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+
+def _budget_mode(app):
+    """'raise', 'warn' or 'off' from SQL_QUERY_BUDGET_MODE, or from testing/debug when unset"""
+    mode = app.config.get('SQL_QUERY_BUDGET_MODE')
+    if mode:
+        return mode
+    if app.testing:
+        return 'raise'
+    if app.debug:
+        return 'warn'
+    return 'off'
+
+
+def init_query_budgets(app):
+    """
+    Check each request's SQL statement count against its endpoint's budget
+
+    Relies on the statement counting installed by ``init_metrics``. Views
+    without a ``query_budget`` use SQL_QUERY_BUDGET_DEFAULT.
+    """
+
+    @app.after_request
+    def check_query_budget(response):
+        mode = _budget_mode(app)
+        if mode == 'off' or 'sql_count' not in g or request.endpoint is None:
+            return response
+
+        view = app.view_functions.get(request.endpoint)
+        if hasattr(view, 'query_budget'):
+            budget = view.query_budget
+        else:
+            budget = app.config.get('SQL_QUERY_BUDGET_DEFAULT')
+        if budget is None or g.sql_count <= budget:
+            return response
+
+        message = (f'{request.method} {request.path} ({request.endpoint}) ran '
+                   f'{g.sql_count} SQL statements, over its budget of {budget}')
+        if mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+        return response
@@ -0,0 +1,23 @@
+"""SQLite connection tuning - applies SQLITE_PRAGMAS to every new connection"""
+from sqlalchemy import event
+
+
+def init_sqlite_pragmas(app, db):
+    """Run the configured PRAGMA statements on each connection the SQLite engines open"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', set_sqlite_pragmas)